@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -12,11 +12,156 @@ class Settings(BaseSettings):
     # MongoDB
     MONGODB_URI: str = Field(..., env="MONGODB_URI")
     DATABASE_NAME: str = Field(..., env="DATABASE_NAME")
+    MONGODB_SECONDARY_READS: bool = False  # Route history/list reads to secondaries
+    MONGODB_MAX_STALENESS_SECONDS: int = 90  # Must be >= 90 (MongoDB minimum)
+    READ_YOUR_WRITES_WINDOW_SECONDS: int = 120  # How long a user's last write is tracked
 
     # JWT
     JWT_SECRET: str = Field(..., env="JWT_SECRET")
-    JWT_ALGORITHM: str = "HS256"
+    JWT_ALGORITHM: str = "HS256"  # HS256 (shared secret) or ES256/RS256 (key pair)
+    JWT_PRIVATE_KEY: Optional[str] = None  # PEM signing key for asymmetric algorithms
+    JWT_PRIVATE_KEY_FILE: Optional[str] = None  # Alternative to JWT_PRIVATE_KEY
+    JWT_KEY_ID: Optional[str] = None  # kid header; defaults to the key's JWK thumbprint
+    JWT_PREVIOUS_PUBLIC_KEYS: Dict[str, str] = Field(default_factory=dict)  # kid -> PEM, kept after rotation
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # "session": long-lived access token, user loaded from DB on every request
+    # "stateless": short-lived access token verified in memory + rotating refresh token
+    AUTH_MODE: str = "session"
+    STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    ACTIVITY_FLUSH_INTERVAL_SECONDS: float = 30.0  # Batch interval for session last_activity writes
+
+    # Generation quotas (per user, 0 disables a rate window)
+    QUOTA_MAX_CONCURRENT: int = 2
+    QUOTA_PER_MINUTE: int = 10
+    QUOTA_PER_DAY: int = 200
+
+    # Provider scheduling
+    PROVIDER_MAX_CONCURRENCY: int = 4  # Concurrent provider calls per process
+    LANE_WEIGHT_INTERACTIVE: int = 6
+    LANE_WEIGHT_STANDARD: int = 3
+    LANE_WEIGHT_BATCH: int = 1
+    LANE_STARVATION_SECONDS: float = 30.0  # Serve any request waiting longer than this next
+    INTERACTIVE_MAX_PIXELS: int = 512 * 512  # Largest image eligible for the interactive lane
+
+    # Load-aware degradation of text-to-image requests (opt out per request
+    # with settings.allow_degraded=false). A tier applies once the per-worker
+    # queue depth or the p90 inference latency reaches its threshold.
+    DEGRADE_ENABLED: bool = True
+    DEGRADE_REDUCED_QUEUE_DEPTH: int = 8
+    DEGRADE_REDUCED_LATENCY_SECONDS: float = 20.0
+    DEGRADE_REDUCED_STEPS: int = 18  # Instead of 30
+    DEGRADE_REDUCED_MAX_SIDE: int = 768
+    DEGRADE_FAST_QUEUE_DEPTH: int = 24
+    DEGRADE_FAST_LATENCY_SECONDS: float = 40.0
+    DEGRADE_FAST_MODEL: str = "stabilityai/sdxl-turbo"
+    DEGRADE_FAST_STEPS: int = 4
+    DEGRADE_FAST_MAX_SIDE: int = 512
+    DEGRADE_RECOVERY_RATIO: float = 0.5  # Step back down once load is below this share of the thresholds
+    DEGRADE_LATENCY_WINDOW: int = 50  # Recent inference calls in the latency percentile
+
+    # Hedged text-to-image calls: once a call has been running for the rolling
+    # p90, the same request is sent to HEDGE_PROVIDER and the first to finish
+    # wins. Off unless HEDGE_PROVIDER is set: each hedge is a second billed
+    # inference call, and the loser can't be aborted (it runs to completion
+    # in its thread).
+    HEDGE_PROVIDER: str = ""  # Alternate Hugging Face inference provider, e.g. "hf-inference"
+    HEDGE_BUDGET_PERCENT: float = 5.0  # Max hedges as a share of calls
+    HEDGE_MIN_DELAY_SECONDS: float = 2.0  # Never hedge earlier than this
+    HEDGE_LATENCY_WINDOW: int = 200  # Recent calls in the p90, per model and tier
+    HEDGE_MIN_SAMPLES: int = 20  # No hedging until this many calls were seen
+
+    # Startup warm-up: open provider/storage connections (and optionally run a
+    # tiny inference) before /health/ready reports ready
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 30.0  # Report ready anyway after this long
+    WARMUP_CONNECTIONS: int = 4  # Connections opened per provider endpoint
+    WARMUP_INFERENCE: bool = False  # Also run a 1-step, 256px text-to-image call
+    WARMUP_HUGGINGFACE_URLS: List[str] = Field(
+        default_factory=lambda: ["https://router.huggingface.co", "https://api-inference.huggingface.co"]
+    )
+
+    # Request deadlines
+    GENERATION_TIMEOUT_SECONDS: float = 120.0  # Default and maximum for X-Request-Timeout
+    DISCONNECT_POLL_SECONDS: float = 0.5  # How often to check if the client went away
+
+    # Image variants (thumbnails / responsive sizes)
+    IMAGE_VARIANT_SIZES: List[int] = Field(default_factory=lambda: [128, 256, 512])
+    THUMBNAIL_SIZE: int = 256  # Variant returned as thumbnail_url in history lists
+    IMAGE_VARIANT_QUALITY: int = 80  # WebP quality
+    IMAGE_WORKERS: int = 2  # Worker threads for resizing
+
+    # Uploaded source images (image-to-image / variations)
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024  # Larger uploads are rejected with 413
+    UPLOAD_SPOOL_BYTES: int = 1024 * 1024  # Uploads larger than this are spooled to disk
+    SOURCE_IMAGE_MAX_SIDE: int = 1024  # Sources are downscaled to this before the provider
+    SOURCE_IMAGE_MAX_PIXELS: int = 40_000_000  # Larger images are refused before decoding
+    IMAGE_TO_IMAGE_MODEL: str = "stabilityai/stable-diffusion-xl-refiner-1.0"  # Hugging Face
+    VARIATION_MODEL: str = "dall-e-2"  # OpenAI
+
+    # Profiling / diagnostics
+    SLOW_REQUEST_THRESHOLD_MS: float = 1000.0  # Requests slower than this are captured
+    SLOW_REQUEST_BUFFER_SIZE: int = 200
+    LOOP_LAG_THRESHOLD_MS: float = 100.0  # Log the blocking stack when the loop stalls longer
+    LOOP_LAG_CHECK_INTERVAL_MS: float = 50.0
+    PROFILE_MAX_SECONDS: float = 60.0
+
+    # Prompt validation / moderation (checked before quotas, DB and provider)
+    PROMPT_MIN_LENGTH: int = 3
+    PROMPT_MAX_LENGTH: int = 1000
+    PROMPT_BLOCKLIST: List[str] = []  # Blocked words/phrases (matched on whole words)
+    PROMPT_BLOCKLIST_FILE: Optional[str] = None  # One term per line, "#" for comments
+    MODERATION_ENABLED: bool = False  # Also ask the OpenAI moderation API
+    MODERATION_TIMEOUT_SECONDS: float = 3.0
+    MODERATION_CACHE_SIZE: int = 10_000  # Cached verdicts (per normalized prompt)
+    MODERATION_CACHE_TTL_SECONDS: int = 3600
+
+    # Near-duplicate prompt reuse (opt-in per request via settings.reuse_similar)
+    PROMPT_REUSE_ENABLED: bool = True
+    PROMPT_REUSE_THRESHOLD: float = 0.85  # Estimated Jaccard similarity of prompt 3-grams
+    PROMPT_REUSE_SCOPE: str = "user"  # "user" (own generations only) or "global"
+    PROMPT_REUSE_BANDS: int = 16  # LSH bands x rows = MinHash signature length
+    PROMPT_REUSE_ROWS: int = 4
+
+    # Cross-worker coordination (quotas, job claims, shared cache, pub/sub)
+    COORDINATION_BACKEND: str = "memory"  # "memory" (single process) or "redis"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    COORDINATION_PREFIX: str = "ai-image-gen:"
+
+    # Webhooks
+    WEBHOOK_MAX_ENDPOINTS: int = 5  # Per user
+    WEBHOOK_ALLOW_HTTP: bool = False  # Allow plain-http endpoint URLs (development)
+    WEBHOOK_ALLOW_PRIVATE: bool = False  # Allow private/loopback endpoint hosts (development)
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_MAX_CONCURRENCY: int = 20  # In-flight deliveries per worker
+    WEBHOOK_MAX_ATTEMPTS: int = 6  # Then the delivery goes to the dead letters
+    WEBHOOK_RETRY_BASE_SECONDS: float = 5.0  # Backoff: base * 2^(attempt-1), with jitter
+    WEBHOOK_RETRY_MAX_SECONDS: float = 3600.0
+    WEBHOOK_POLL_SECONDS: float = 2.0  # Outbox poll interval when idle
+
+    # History archival (python -m app.services.archive_service)
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_BUNDLE_SIZE: int = 500  # Generations per compressed archive document
+
+    # Bulk export (GET /api/generations/export)
+    EXPORT_CONCURRENCY: int = 8  # Images fetched in parallel per export
+    EXPORT_BUFFERED_IMAGES: int = 8  # Fetched images waiting to be written (backpressure)
+    EXPORT_FETCH_TIMEOUT_SECONDS: float = 30.0
+
+    # Cost / latency ledger
+    # Estimated provider cost in USD per generated megapixel, by model
+    # (1024x1024 is 1.05 MP); unknown models count as free
+    MODEL_COST_USD_PER_MEGAPIXEL: Dict[str, float] = Field(default_factory=lambda: {
+        "stabilityai/stable-diffusion-xl-base-1.0": 0.003,
+        "stabilityai/stable-diffusion-xl-refiner-1.0": 0.003,
+        "stabilityai/sdxl-turbo": 0.001,
+        "dall-e-2": 0.019,
+    })
+    USAGE_MAX_RANGE_DAYS: int = 92  # Longest period one usage report may cover
+
+    # History search
+    SEARCH_MAX_PAGE_SIZE: int = 100
+    SEARCH_MAX_TIME_MS: int = 2000  # Server-side time limit per search query
 
     # Server
     HOST: str = "127.0.0.1"
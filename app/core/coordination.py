@@ -0,0 +1,347 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+# Pub/sub callbacks receive the decoded message
+MessageHandler = Callable[[Dict[str, Any]], None]
+
+# Token bucket: (key, capacity, refill per second)
+Bucket = Tuple[str, int, float]
+
+# In-memory cache size at which expired entries are swept
+_CACHE_SWEEP_SIZE = 10_000
+
+
+class CoordinationBackend:
+    """
+    State shared by every worker process: rate limits, in-flight counters,
+    job claims, a small cache and pub/sub.
+
+    The in-memory backend is enough for a single process; the Redis backend
+    makes the same operations hold across workers and nodes.
+    """
+
+    def __init__(self):
+        # Set in start(), i.e. after a pre-forking server has forked
+        self.instance_id = ""
+        self._handlers: Dict[str, List[MessageHandler]] = {}
+
+    async def start(self) -> None:
+        self.instance_id = uuid.uuid4().hex
+
+    async def stop(self) -> None:
+        pass
+
+    # Rate limits
+
+    async def take_tokens(self, buckets: List[Bucket]) -> Tuple[Optional[str], float]:
+        """
+        Take one token from each bucket, or none at all if any is empty
+
+        Returns:
+            (None, 0) if the tokens were taken, otherwise (key of the empty
+            bucket that refills last, seconds until it has a token)
+        """
+        raise NotImplementedError
+
+    # In-flight counters
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        """Increment an in-flight counter if it is below the limit"""
+        raise NotImplementedError
+
+    async def release_slot(self, key: str) -> None:
+        """Decrement an in-flight counter"""
+        raise NotImplementedError
+
+    # Job claiming
+
+    async def claim(self, key: str, ttl_seconds: float) -> bool:
+        """Claim a job for this instance until released or `ttl_seconds` pass"""
+        raise NotImplementedError
+
+    async def release_claim(self, key: str) -> None:
+        """Release a claim held by this instance"""
+        raise NotImplementedError
+
+    # Cache
+
+    async def cache_get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def cache_set(self, key: str, value: str, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    # Pub/sub
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Send a message to every instance subscribed to `channel` (including this one)"""
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def _dispatch(self, channel: str, message: Dict[str, Any]) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(message)
+            except Exception as e:
+                print(f"⚠️  Handler for {channel} failed: {e}")
+
+
+class InMemoryBackend(CoordinationBackend):
+    """Process-local coordination state"""
+
+    def __init__(self):
+        super().__init__()
+        # key -> (tokens, last refill timestamp)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._slots: Dict[str, int] = {}
+        # key -> (owner, expires at)
+        self._claims: Dict[str, Tuple[str, float]] = {}
+        self._cache: Dict[str, Tuple[str, float]] = {}
+        self._cache_sweep_at = _CACHE_SWEEP_SIZE
+
+    async def take_tokens(self, buckets: List[Bucket]) -> Tuple[Optional[str], float]:
+        now = time.monotonic()
+        refilled = {}
+        empty, wait = None, 0.0
+        for key, capacity, refill_per_second in buckets:
+            tokens, updated_at = self._buckets.get(key, (float(capacity), now))
+            refilled[key] = min(float(capacity), tokens + (now - updated_at) * refill_per_second)
+            if refilled[key] < 1 and (1 - refilled[key]) / refill_per_second > wait:
+                empty, wait = key, (1 - refilled[key]) / refill_per_second
+
+        taken = 0 if empty else 1
+        for key, tokens in refilled.items():
+            self._buckets[key] = (tokens - taken, now)
+        return empty, wait
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        in_flight = self._slots.get(key, 0)
+        if in_flight >= limit:
+            return False
+        self._slots[key] = in_flight + 1
+        return True
+
+    async def release_slot(self, key: str) -> None:
+        in_flight = self._slots.get(key, 0) - 1
+        if in_flight > 0:
+            self._slots[key] = in_flight
+        else:
+            self._slots.pop(key, None)
+
+    async def claim(self, key: str, ttl_seconds: float) -> bool:
+        now = time.monotonic()
+        owner, expires_at = self._claims.get(key, ("", 0.0))
+        if owner and owner != self.instance_id and expires_at > now:
+            return False
+        self._claims[key] = (self.instance_id, now + ttl_seconds)
+        return True
+
+    async def release_claim(self, key: str) -> None:
+        if self._claims.get(key, ("",))[0] == self.instance_id:
+            del self._claims[key]
+
+    async def cache_get(self, key: str) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._cache[key]
+            return None
+        return entry[0]
+
+    async def cache_set(self, key: str, value: str, ttl_seconds: float) -> None:
+        now = time.monotonic()
+        if len(self._cache) >= self._cache_sweep_at:
+            # Expired entries are otherwise only dropped when read again
+            self._cache = {k: entry for k, entry in self._cache.items() if entry[1] >= now}
+            self._cache_sweep_at = max(_CACHE_SWEEP_SIZE, 2 * len(self._cache))
+        self._cache[key] = (value, now + ttl_seconds)
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._dispatch(channel, message)
+
+
+# Token buckets refill-and-take, all or none, atomic on the server (time
+# from the server clock). ARGV holds capacity and rate for each key.
+_TAKE_TOKENS = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local refilled = {}
+local empty = 0
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    refilled[i] = tokens
+    if tokens < 1 and (1 - tokens) / rate > wait then
+        empty = i
+        wait = (1 - tokens) / rate
+    end
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local tokens = refilled[i]
+    if empty == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return {empty, tostring(wait)}
+"""
+
+# Increment below a limit. The TTL frees slots leaked by crashed workers:
+# it is set when the counter is created and not extended by later acquires,
+# so a user who keeps generating can't keep a leaked slot alive forever.
+_ACQUIRE_SLOT = """
+local in_flight = tonumber(redis.call('GET', KEYS[1]) or '0')
+if in_flight >= tonumber(ARGV[1]) then
+    return 0
+end
+if redis.call('INCR', KEYS[1]) == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+_RELEASE_SLOT = """
+local in_flight = redis.call('DECR', KEYS[1])
+if in_flight <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+return in_flight
+"""
+
+_RELEASE_CLAIM = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisBackend(CoordinationBackend):
+    """
+    Coordination state in Redis (or any server speaking its protocol).
+
+    Multi-step operations run as Lua scripts so they are atomic across
+    workers; pub/sub uses one listener connection per process.
+    """
+
+    def __init__(self, redis_client, prefix: str = ""):
+        super().__init__()
+        self.redis = redis_client
+        self.prefix = prefix
+        self._take_tokens = redis_client.register_script(_TAKE_TOKENS)
+        self._acquire_slot = redis_client.register_script(_ACQUIRE_SLOT)
+        self._release_slot = redis_client.register_script(_RELEASE_SLOT)
+        self._release_claim = redis_client.register_script(_RELEASE_CLAIM)
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def start(self) -> None:
+        await super().start()
+        await self.redis.ping()
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        if self._handlers:
+            await self._pubsub.subscribe(*(self._key(channel) for channel in self._handlers))
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self.redis.aclose()
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                if not self._handlers:
+                    await asyncio.sleep(0.5)  # Nothing subscribed yet
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                self._dispatch(channel[len(self.prefix):], json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Pub/sub listener error: {e}")
+                await asyncio.sleep(1)
+
+    async def take_tokens(self, buckets: List[Bucket]) -> Tuple[Optional[str], float]:
+        args = [value for _, capacity, refill_per_second in buckets for value in (capacity, refill_per_second)]
+        empty, wait = await self._take_tokens(keys=[self._key(key) for key, _, _ in buckets], args=args)
+        if not empty:
+            return None, 0.0
+        return buckets[int(empty) - 1][0], float(wait)
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        ttl = int(settings.GENERATION_TIMEOUT_SECONDS * 2)
+        return bool(await self._acquire_slot(keys=[self._key(key)], args=[limit, ttl]))
+
+    async def release_slot(self, key: str) -> None:
+        await self._release_slot(keys=[self._key(key)])
+
+    async def claim(self, key: str, ttl_seconds: float) -> bool:
+        return bool(await self.redis.set(
+            self._key(key), self.instance_id, nx=True, px=int(ttl_seconds * 1000)
+        ))
+
+    async def release_claim(self, key: str) -> None:
+        await self._release_claim(keys=[self._key(key)], args=[self.instance_id])
+
+    async def cache_get(self, key: str) -> Optional[str]:
+        value = await self.redis.get(self._key(key))
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def cache_set(self, key: str, value: str, ttl_seconds: float) -> None:
+        await self.redis.set(self._key(key), value, px=int(ttl_seconds * 1000))
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        await self.redis.publish(self._key(channel), json.dumps(message, default=str))
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        if channel not in self._handlers and self._pubsub is not None:
+            await self._pubsub.subscribe(self._key(channel))
+        await super().subscribe(channel, handler)
+
+
+def create_coordination_backend() -> CoordinationBackend:
+    """Create the backend selected by COORDINATION_BACKEND"""
+    if settings.COORDINATION_BACKEND == "memory":
+        return InMemoryBackend()
+    if settings.COORDINATION_BACKEND == "redis":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise ValueError("COORDINATION_BACKEND=redis requires the 'redis' package")
+        return RedisBackend(redis_asyncio.Redis.from_url(settings.REDIS_URL), settings.COORDINATION_PREFIX)
+    raise ValueError(f"Unknown coordination backend: {settings.COORDINATION_BACKEND}")
+
+
+# Shared by every service that needs cross-worker state
+coordination = create_coordination_backend()
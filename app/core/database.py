@@ -1,8 +1,16 @@
+import base64
+from contextlib import asynccontextmanager
+from typing import Any, Optional, Tuple
+
+import bson
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+from pymongo.read_preferences import SecondaryPreferred
 
 from app.core.config import settings
-from app.models import User, Generation, Session
+from app.core.coordination import coordination
+from app.models import User, Generation, Session, UserStats, GenerationArchive, SourceImage, UsageBucket, WebhookEndpoint, WebhookDelivery, WebhookDeadLetter
 
 client = None
 
@@ -18,9 +26,14 @@ async def init_db():
         # Test connection
         await client.admin.command('ping')
 
+        database = client[settings.DATABASE_NAME]
+        await _drop_changed_indexes(database)
         await init_beanie(
-            database=client[settings.DATABASE_NAME],
-            document_models=[User, Generation, Session],
+            database=database,
+            document_models=[
+                User, Generation, Session, UserStats, GenerationArchive, SourceImage, UsageBucket,
+                WebhookEndpoint, WebhookDelivery, WebhookDeadLetter,
+            ],
         )
         print("✅ Connected to MongoDB")
     except Exception as e:
@@ -28,9 +41,149 @@ async def init_db():
         print("⚠️  Running without database (some features won't work)")
 
 
+async def _drop_changed_indexes(database) -> None:
+    """
+    Drop indexes created by older versions with different options, so
+    init_beanie can recreate them (MongoDB refuses an index on the same
+    keys with other options), or replaced by a wider index
+    """
+    sessions = database[Session.Settings.name]
+    expires_at = (await sessions.index_information()).get("expires_at_1")
+    if expires_at is not None and "expireAfterSeconds" not in expires_at:
+        # Plain index from before sessions expired through a TTL index
+        await sessions.drop_index("expires_at_1")
+
+    generations = database[Generation.Settings.name]
+    if "user_id_1_created_at_-1" in await generations.index_information():
+        # Replaced by the same keys plus _id (keyset pagination tiebreak)
+        await generations.drop_index("user_id_1_created_at_-1")
+
+
 async def close_db():
     """Close database connection"""
     global client
     if client:
         client.close()
         print("MongoDB connection closed")
+
+
+def history_read_preference():
+    """
+    Read preference for list/history queries.
+
+    Returns secondaryPreferred with a max-staleness bound when secondary
+    reads are enabled, otherwise primary.
+    """
+    if not settings.MONGODB_SECONDARY_READS:
+        return ReadPreference.PRIMARY
+    return SecondaryPreferred(max_staleness=settings.MONGODB_MAX_STALENESS_SECONDS)
+
+
+def get_collection(model, read_preference=None):
+    """
+    Get the raw collection for a Beanie document model.
+
+    Args:
+        model: Beanie Document class
+        read_preference: Optional pymongo read preference for this query
+
+    Returns:
+        Collection configured with the requested read preference
+    """
+    collection = model.get_pymongo_collection()
+    if read_preference is None or read_preference == ReadPreference.PRIMARY:
+        return collection
+    return collection.with_options(read_preference=read_preference)
+
+
+# The causal position of a user's last write is kept in the coordination
+# backend, so a read served by any worker observes a write made on another.
+# It expires after READ_YOUR_WRITES_WINDOW_SECONDS: by then secondaries have
+# caught up (max staleness is bounded). None of this is needed while
+# MONGODB_SECONDARY_READS is off: every read goes to the primary.
+
+def _last_write_key(user_id: str) -> str:
+    return f"last-write:{user_id}"
+
+
+async def _remember_write(user_id: str, session) -> None:
+    """Record the causal position of a user's latest write"""
+    if session.operation_time is None:
+        return
+    # BSON keeps the exact types of the signed cluster time
+    token = base64.b64encode(bson.encode(
+        {"operation_time": session.operation_time, "cluster_time": session.cluster_time}
+    )).decode()
+    try:
+        await coordination.cache_set(_last_write_key(user_id), token, settings.READ_YOUR_WRITES_WINDOW_SECONDS)
+    except Exception as e:
+        print(f"⚠️  Failed to record last write of user {user_id}: {e}")
+
+
+async def _last_write(user_id: str) -> Optional[Tuple[Any, Any]]:
+    """Get the causal position of a user's recent write, if still tracked"""
+    try:
+        token = await coordination.cache_get(_last_write_key(user_id))
+    except Exception as e:
+        print(f"⚠️  Failed to look up last write of user {user_id}: {e}")
+        return None
+    if token is None:
+        return None
+
+    entry = bson.decode(base64.b64decode(token))
+    return entry["operation_time"], entry["cluster_time"]
+
+
+async def _start_session():
+    """
+    Start a causally consistent session, or return None when reads all go
+    to the primary or the deployment has no session support (e.g. an
+    in-memory stand-in)
+    """
+    if not settings.MONGODB_SECONDARY_READS:
+        return None
+    try:
+        return await client.start_session(causal_consistency=True)
+    except NotImplementedError:
+        return None
+
+
+@asynccontextmanager
+async def write_session(user_id: str):
+    """
+    Causally consistent session for a user's writes.
+
+    The operation time of the last write is remembered so that later
+    reads by the same user observe it, even when served by a secondary.
+    """
+    session = await _start_session()
+    if session is None:
+        yield None
+        return
+
+    async with session:
+        yield session
+        await _remember_write(user_id, session)
+
+
+@asynccontextmanager
+async def read_session(user_id: str):
+    """
+    Causally consistent session for a user's reads.
+
+    If the user wrote recently, the session is advanced to that write so
+    secondaries wait until they have replicated it (read-your-writes).
+    """
+    session = await _start_session()
+    if session is None:
+        yield None
+        return
+
+    async with session:
+        last_write = await _last_write(user_id)
+        if last_write:
+            operation_time, cluster_time = last_write
+            if cluster_time is not None:
+                session.advance_cluster_time(cluster_time)
+            session.advance_operation_time(operation_time)
+        yield session
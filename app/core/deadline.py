@@ -0,0 +1,84 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before its work is done"""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client goes away before its work is done"""
+
+
+class Deadline:
+    """Absolute deadline for a request, propagated down to service calls"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    @classmethod
+    def from_request(cls, request: Optional[Request]) -> "Deadline":
+        """
+        Build a deadline from the X-Request-Timeout header (seconds),
+        falling back to and capped at GENERATION_TIMEOUT_SECONDS
+        """
+        timeout = settings.GENERATION_TIMEOUT_SECONDS
+        if request is not None:
+            header = request.headers.get("x-request-timeout")
+            try:
+                if header is not None and float(header) > 0:
+                    timeout = min(float(header), timeout)
+            except ValueError:
+                pass
+        return cls(timeout)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """
+        Raises:
+            DeadlineExceeded: If the deadline has passed before `stage` starts
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline of {self.timeout:g}s exceeded before {stage}")
+
+
+async def run_until_abandoned(awaitable: Awaitable[Any], deadline: Deadline, request: Optional[Request] = None) -> Any:
+    """
+    Await `awaitable` unless the deadline passes or the client disconnects
+    first, in which case the work is cancelled.
+
+    Raises:
+        DeadlineExceeded: If the deadline passed first
+        ClientDisconnected: If the client disconnected first
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {task},
+                timeout=min(settings.DISCONNECT_POLL_SECONDS, deadline.remaining())
+            )
+            if task in done:
+                return task.result()
+            if deadline.expired:
+                raise DeadlineExceeded(f"Deadline of {deadline.timeout:g}s exceeded")
+            if request is not None and await request.is_disconnected():
+                raise ClientDisconnected("Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+            # Let the work unwind (scheduler slot released, queue entry removed)
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,227 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+
+# Per-request stage timings (stage name -> seconds), set by the timing middleware
+_stage_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+# Stage timings of an enclosing collect_stages() block (e.g. one generation)
+_collected_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("collected_timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a stage of the current request (no-op outside a request or collect_stages())"""
+    sinks = [timings for timings in (_stage_timings.get(), _collected_timings.get()) if timings is not None]
+    if not sinks:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        for timings in sinks:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def collect_stages():
+    """
+    Collect the timings of the stages run inside the block
+
+    Yields a dict (stage name -> seconds) that is filled in as stages finish,
+    inside or outside a request; the request's own timings are unaffected.
+    """
+    timings: Dict[str, float] = {}
+    token = _collected_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _collected_timings.reset(token)
+
+
+def _format_stack(frame) -> str:
+    return "".join(traceback.format_stack(frame, limit=25))
+
+
+class SlowRequestLog:
+    """Ring buffer of requests slower than SLOW_REQUEST_THRESHOLD_MS"""
+
+    def __init__(self, size: int, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=size)
+
+    def start(self) -> Dict[str, float]:
+        """Begin collecting stage timings for the current request"""
+        timings: Dict[str, float] = {}
+        _stage_timings.set(timings)
+        return timings
+
+    def record(self, method: str, route: str, path: str, status_code: int, duration: float, timings: Dict[str, float]) -> None:
+        duration_ms = duration * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        self.entries.append({
+            "at": datetime.now(),
+            "method": method,
+            "route": route,
+            "path": path,
+            "status_code": status_code,
+            "duration_ms": round(duration_ms, 1),
+            "stages_ms": {name: round(seconds * 1000, 1) for name, seconds in timings.items()},
+        })
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """Captured requests, newest first"""
+        return list(reversed(self.entries))
+
+
+class LoopLagMonitor:
+    """
+    Detects event-loop blocking.
+
+    A coroutine on the loop refreshes a heartbeat; a watchdog thread checks
+    it and, when the loop has not run for longer than the threshold, logs
+    the loop thread's current stack - i.e. the code that is blocking it.
+    """
+
+    def __init__(self, threshold_ms: float, interval_ms: float):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.max_lag = 0.0
+        self.blocked_count = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - expected
+            self.max_lag = max(self.max_lag, lag)
+            self._heartbeat = time.monotonic()
+
+    def _watch(self) -> None:
+        reported = False
+        while not self._stop.wait(self.interval):
+            stalled = time.monotonic() - self._heartbeat
+            if stalled < self.threshold:
+                reported = False
+                continue
+            if reported:
+                continue
+
+            # Report each blocking episode once, with the blocking stack
+            reported = True
+            self.blocked_count += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = _format_stack(frame) if frame else "<unavailable>"
+            print(f"⚠️  Event loop blocked for {stalled * 1000:.0f}ms (threshold {self.threshold * 1000:.0f}ms):\n{stack}")
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "blocked_count": self.blocked_count,
+        }
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for the running process.
+
+    A background thread samples the stacks of all threads at a fixed
+    interval and aggregates them in folded format ("a;b;c count"), which
+    flamegraph.pl, speedscope and similar tools render directly. Only one
+    profile can run at a time.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    @staticmethod
+    def _sample(stop: threading.Event, interval: float, counts: Counter) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not stop.wait(interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                counts[";".join(reversed(stack))] += 1
+
+    async def profile(self, seconds: float, interval_ms: float) -> str:
+        """
+        Sample for `seconds` and return folded stacks
+
+        Raises:
+            RuntimeError: If a profile is already running
+        """
+        if self.running:
+            raise RuntimeError("A profile is already running")
+
+        async with self._lock:
+            counts: Counter = Counter()
+            stop = threading.Event()
+            sampler = threading.Thread(
+                target=self._sample,
+                args=(stop, interval_ms / 1000, counts),
+                name="sampling-profiler",
+                daemon=True
+            )
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                await asyncio.to_thread(sampler.join)
+
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+# Singletons shared by the app
+slow_request_log = SlowRequestLog(settings.SLOW_REQUEST_BUFFER_SIZE, settings.SLOW_REQUEST_THRESHOLD_MS)
+loop_lag_monitor = LoopLagMonitor(settings.LOOP_LAG_THRESHOLD_MS, settings.LOOP_LAG_CHECK_INTERVAL_MS)
+sampling_profiler = SamplingProfiler()
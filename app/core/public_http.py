@@ -0,0 +1,66 @@
+import asyncio
+import ipaddress
+import socket
+
+import httpx
+
+
+class NonPublicAddress(Exception):
+    """The host does not resolve (only) to public internet addresses"""
+
+
+def is_public_address(address: str) -> bool:
+    """False for private, loopback, link-local, multicast, reserved and other special-use addresses"""
+    ip = ipaddress.ip_address(address)
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def resolve_public(host: str, port: int) -> str:
+    """
+    Resolve `host` and return an address to connect to
+
+    Raises:
+        NonPublicAddress: If it does not resolve, or any of its addresses is
+            not public (so one bad record can't be picked later)
+    """
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise NonPublicAddress(f"Cannot resolve {host}: {e}")
+
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        if not is_public_address(address):
+            raise NonPublicAddress(f"{host} resolves to a non-public address ({address})")
+    if not addresses:
+        raise NonPublicAddress(f"Cannot resolve {host}")
+    return addresses[0]
+
+
+class PublicOnlyTransport(httpx.AsyncBaseTransport):
+    """
+    HTTP transport for user-supplied URLs (server-side request forgery guard).
+
+    Every request's host is resolved and checked right before sending, and
+    the connection is made to the checked address - so DNS rebinding between
+    the check and the connect can't reach internal hosts. The Host header and
+    TLS server name (SNI and certificate check) stay those of the URL.
+    """
+
+    def __init__(self, allow_private: bool = False, **kwargs):
+        self.allow_private = allow_private
+        self._transport = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.allow_private:
+            host = request.url.host
+            port = request.url.port or (443 if request.url.scheme == "https" else 80)
+            address = await resolve_public(host, port)
+            request.url = request.url.copy_with(host=address)
+            request.extensions = {**request.extensions, "sni_hostname": host}
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,18 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by pydantic-core's Rust serializer.
+
+    Content may contain Pydantic models, datetimes and enums directly, so
+    handlers can skip jsonable_encoder and the intermediate dict copies it
+    makes. Returning an instance from a route bypasses FastAPI's response
+    validation entirely.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
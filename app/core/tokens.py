@@ -0,0 +1,170 @@
+import base64
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from jose import jwk, jwt, JWTError
+
+from app.core.config import settings
+
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+
+def _thumbprint(public_jwk: Dict[str, Any]) -> str:
+    """RFC 7638 JWK thumbprint, used as the default key ID"""
+    members = {name: public_jwk[name] for name in ("crv", "e", "kty", "n", "x", "y") if name in public_jwk}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":"), sort_keys=True).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class KeyRing:
+    """
+    Signing and verification keys, parsed once per process.
+
+    HS* algorithms sign and verify with JWT_SECRET. Asymmetric algorithms
+    (ES256, RS256, ...) sign with JWT_PRIVATE_KEY and stamp tokens with a
+    `kid` header; verification looks the kid up in a cache of parsed public
+    keys, which also holds JWT_PREVIOUS_PUBLIC_KEYS so tokens signed before
+    a key rotation stay valid until they expire. The public keys are
+    published at /.well-known/jwks.json for other services.
+    """
+
+    def __init__(self):
+        self.algorithm = settings.JWT_ALGORITHM
+        self.kid: Optional[str] = None
+        self._verifiers: Dict[str, Any] = {}
+
+        if self.algorithm.startswith("HS"):
+            self.signing_key = jwk.construct(settings.JWT_SECRET, self.algorithm)
+            self._default_verifier = self.signing_key
+            return
+
+        private_key = settings.JWT_PRIVATE_KEY
+        if not private_key and settings.JWT_PRIVATE_KEY_FILE:
+            with open(settings.JWT_PRIVATE_KEY_FILE) as key_file:
+                private_key = key_file.read()
+        if not private_key:
+            raise ValueError(f"JWT_PRIVATE_KEY or JWT_PRIVATE_KEY_FILE is required for {self.algorithm}")
+
+        self.signing_key = jwk.construct(private_key, self.algorithm)
+        public_key = self.signing_key.public_key()
+        self.kid = settings.JWT_KEY_ID or _thumbprint(public_key.to_dict())
+        self._verifiers[self.kid] = public_key
+        for kid, public_pem in settings.JWT_PREVIOUS_PUBLIC_KEYS.items():
+            self._verifiers[kid] = jwk.construct(public_pem, self.algorithm)
+        # Tokens issued before kid headers existed
+        self._default_verifier = public_key
+
+    def sign(self, payload: Dict[str, Any]) -> str:
+        headers = {"kid": self.kid} if self.kid else None
+        return jwt.encode(payload, self.signing_key, algorithm=self.algorithm, headers=headers)
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._verifiers.get(kid) if kid else self._default_verifier
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+    def jwks(self) -> Dict[str, Any]:
+        """Public keys as a JWK Set (empty for shared-secret algorithms)"""
+        return {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig", "alg": self.algorithm}
+                for kid, key in self._verifiers.items()
+            ]
+        }
+
+
+key_ring = KeyRing()
+
+
+def encode_token(payload: Dict[str, Any]) -> str:
+    """Sign a JWT with the configured key and algorithm"""
+    return key_ring.sign(payload)
+
+
+def decode_token(token: str, token_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Verify and decode a JWT (signature and expiry are checked in memory)
+
+    Args:
+        token: Encoded JWT
+        token_type: If given, the token's "type" claim must match it.
+            Tokens issued before typed tokens existed count as access tokens.
+
+    Raises:
+        JWTError: If the token is invalid, expired or of the wrong type
+    """
+    payload = key_ring.verify(token)
+    if token_type is not None and payload.get("type", ACCESS_TOKEN) != token_type:
+        raise JWTError(f"Expected a {token_type} token")
+    return payload
+
+
+def session_filter(token: str) -> Dict[str, Any]:
+    """
+    Query for the session an access token belongs to: by its "sid" claim,
+    or by the stored token for tokens issued without one
+    """
+    session_id = decode_token(token, ACCESS_TOKEN).get("sid")
+    if session_id and ObjectId.is_valid(session_id):
+        return {"_id": ObjectId(session_id)}
+    return {"token": token}
+
+
+def access_token_lifetime() -> timedelta:
+    """Access token lifetime for the configured auth mode"""
+    if settings.AUTH_MODE == "stateless":
+        return timedelta(minutes=settings.STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES)
+    return timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def create_access_token(user, session_id: Optional[str] = None) -> str:
+    """
+    Create an access token for a user
+
+    In stateless mode the token carries the profile claims routes need,
+    so it can be verified without a database lookup.
+    """
+    now = datetime.utcnow()
+    payload = {
+        "type": ACCESS_TOKEN,
+        "user_id": str(user.id),
+        "email": user.email,
+        "exp": now + access_token_lifetime(),
+        "iat": now,
+    }
+    if settings.AUTH_MODE == "stateless":
+        payload["name"] = user.name
+        payload["plan"] = user.plan
+        payload["admin"] = user.is_admin
+    if session_id is not None:
+        payload["sid"] = session_id
+    return encode_token(payload)
+
+
+def create_refresh_token(user_id: str, session_id: str) -> Dict[str, Any]:
+    """
+    Create a refresh token bound to a session
+
+    Returns:
+        dict: token, jti (stored on the session for reuse detection) and expires_at
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    jti = uuid.uuid4().hex
+    token = encode_token({
+        "type": REFRESH_TOKEN,
+        "user_id": user_id,
+        "sid": session_id,
+        "jti": jti,
+        "exp": expires_at,
+        "iat": now,
+    })
+    return {"token": token, "jti": jti, "expires_at": expires_at}
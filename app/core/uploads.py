@@ -0,0 +1,173 @@
+import hashlib
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+
+
+class UploadError(Exception):
+    """Malformed or oversized upload; carries the HTTP status to answer with"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadedFile:
+    """
+    A file part spooled to a temporary file (in memory up to
+    UPLOAD_SPOOL_BYTES, then on disk), hashed while it is written.
+    """
+
+    def __init__(self, field: str, filename: str, content_type: str):
+        self.field = field
+        self.filename = filename
+        self.content_type = content_type
+        self.file = tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_BYTES)
+        self.size = 0
+        self._hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 of the uploaded bytes"""
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class MultipartUpload:
+    """Text fields and (at most one) file of a multipart/form-data request"""
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.file: Optional[UploadedFile] = None
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+async def read_multipart(
+    request: Request,
+    file_field: str,
+    max_file_bytes: Optional[int] = None,
+    max_field_bytes: int = 64 * 1024,
+    max_fields: int = 16
+) -> MultipartUpload:
+    """
+    Parse a multipart/form-data body as it streams in
+
+    Unlike request.form(), the file part is size-limited while it is read:
+    the request is rejected (413) as soon as it grows past the limit instead
+    of after the whole body has been buffered.
+
+    Args:
+        request: Incoming request
+        file_field: Name of the only file part accepted
+        max_file_bytes: Size limit for the file (default UPLOAD_MAX_BYTES)
+        max_field_bytes: Size limit for each text field
+        max_fields: Maximum number of text fields
+
+    Raises:
+        UploadError: Wrong content type, malformed body or limits exceeded
+    """
+    max_file_bytes = max_file_bytes or settings.UPLOAD_MAX_BYTES
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise UploadError("Expected a multipart/form-data body", status_code=415)
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_file_bytes + max_field_bytes * max_fields:
+            raise UploadError(f"Upload exceeds {max_file_bytes} bytes", status_code=413)
+
+    upload = MultipartUpload()
+    headers: List[Tuple[bytes, bytes]] = []
+    header_field = bytearray()
+    header_value = bytearray()
+    part: Dict[str, object] = {}
+
+    def on_part_begin() -> None:
+        headers.clear()
+        part.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers.append((bytes(header_field).lower(), bytes(header_value)))
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        part_headers = dict(headers)
+        _, options = parse_options_header(part_headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" in options:
+            if name != file_field or upload.file is not None:
+                raise UploadError(f"Only one file is accepted, in the '{file_field}' field")
+            upload.file = UploadedFile(
+                name,
+                options[b"filename"].decode("utf-8", "replace"),
+                part_headers.get(b"content-type", b"").decode("latin-1")
+            )
+            part["file"] = upload.file
+        else:
+            if len(upload.fields) >= max_fields:
+                raise UploadError("Too many form fields")
+            part["name"] = name
+            part["value"] = bytearray()
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if "file" in part:
+            if upload.file.size + (end - start) > max_file_bytes:
+                raise UploadError(f"Upload exceeds {max_file_bytes} bytes", status_code=413)
+            upload.file.write(data[start:end])
+        else:
+            value = part["value"]
+            if len(value) + (end - start) > max_field_bytes:
+                raise UploadError(f"Form field '{part['name']}' is too large", status_code=413)
+            value.extend(data[start:end])
+
+    def on_part_end() -> None:
+        if "name" in part:
+            upload.fields[part["name"]] = part["value"].decode("utf-8", "replace")
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+    except UploadError:
+        upload.close()
+        raise
+    except Exception as e:
+        upload.close()
+        raise UploadError(f"Malformed multipart body: {e}")
+
+    if upload.file is None or upload.file.size == 0:
+        upload.close()
+        raise UploadError(f"Missing file in the '{file_field}' field")
+    upload.file.file.seek(0)
+    return upload
@@ -1,3 +1,3 @@
-from app.handlers import auth, generation, user
+from app.handlers import admin, auth, generation, user, webhook
 
-__all__ = ["auth", "generation", "user"]
+__all__ = ["admin", "auth", "generation", "user", "webhook"]
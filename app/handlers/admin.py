@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from beanie import PydanticObjectId
+
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiling import loop_lag_monitor, sampling_profiler, slow_request_log
+from app.schemas.generation import HedgingStatsResponse
+from app.schemas.response import success_response
+from app.schemas.usage import ProviderUsageReport, TopUsersReport, UsageReport
+from app.schemas.webhook import WebhookMetricsResponse
+from app.services.hedging import hedged_calls
+from app.services.usage_service import GRANULARITIES, usage_service
+from app.services.webhook_service import webhook_service
+
+
+async def run_profile(seconds: float, interval_ms: float) -> PlainTextResponse:
+    """
+    Sample the process for `seconds` and return folded stacks as a download
+
+    Raises:
+        HTTPException: 400 for out-of-range arguments, 409 if a profile is already running
+    """
+    if not 0 < seconds <= settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {settings.PROFILE_MAX_SECONDS:g}]")
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="interval_ms must be between 1 and 1000")
+
+    try:
+        folded = await sampling_profiler.profile(seconds, interval_ms)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    filename = f"profile-{datetime.now():%Y%m%d-%H%M%S}.folded"
+    return PlainTextResponse(
+        folded,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def get_slow_requests() -> Dict[str, Any]:
+    """Get captured slow requests, newest first"""
+    return success_response("Slow requests fetched successfully", {
+        "threshold_ms": slow_request_log.threshold_ms,
+        "requests": slow_request_log.recent(),
+    })
+
+
+async def get_loop_lag() -> Dict[str, Any]:
+    """Get event-loop lag statistics"""
+    return success_response("Loop lag fetched successfully", loop_lag_monitor.stats())
+
+
+async def get_webhook_metrics() -> Dict[str, Any]:
+    """Get webhook delivery counters and latency for this worker"""
+    return success_response(
+        "Webhook metrics fetched successfully",
+        WebhookMetricsResponse(**await webhook_service.metrics())
+    )
+
+
+async def get_hedging_stats() -> Dict[str, Any]:
+    """Get hedged provider call counts and win rates for this worker"""
+    return success_response(
+        "Hedging stats fetched successfully",
+        HedgingStatsResponse(**hedged_calls.stats())
+    )
+
+
+def _usage_range(since: Optional[datetime], until: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """Report period, defaulting to the last 24 hours"""
+    until = until or datetime.now()
+    since = since or until - timedelta(hours=24)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if until - since > timedelta(days=settings.USAGE_MAX_RANGE_DAYS):
+        raise HTTPException(status_code=400, detail=f"Period longer than {settings.USAGE_MAX_RANGE_DAYS} days")
+    return since, until
+
+
+def _check_granularity(granularity: str) -> None:
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of: {', '.join(GRANULARITIES)}")
+
+
+async def get_provider_usage(since: Optional[datetime], until: Optional[datetime], granularity: str) -> Dict[str, Any]:
+    """Get usage, latency and estimated cost per provider and model"""
+    _check_granularity(granularity)
+    since, until = _usage_range(since, until)
+    return success_response(
+        "Provider usage fetched successfully",
+        ProviderUsageReport(**await usage_service.provider_usage(since, until, granularity))
+    )
+
+
+async def get_top_users(since: Optional[datetime], until: Optional[datetime], limit: int) -> Dict[str, Any]:
+    """Get the users with the highest estimated cost"""
+    since, until = _usage_range(since, until)
+    return success_response(
+        "User usage fetched successfully",
+        TopUsersReport(**await usage_service.top_users(since, until, limit))
+    )
+
+
+async def get_user_usage(
+    user_id: str,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    granularity: str
+) -> Dict[str, Any]:
+    """Get one user's usage, latency and estimated cost"""
+    _check_granularity(granularity)
+    since, until = _usage_range(since, until)
+    try:
+        owner_id = PydanticObjectId(user_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+    return success_response(
+        "User usage fetched successfully",
+        UsageReport(**await usage_service.user_usage(owner_id, since, until, granularity))
+    )
@@ -1,8 +1,7 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 from fastapi import HTTPException, Request
 import bcrypt
-from jose import jwt
 from beanie import PydanticObjectId
 
 from app.schemas.user import UserLogin, UserCreate, UserResponse
@@ -10,6 +9,15 @@ from app.schemas.auth import TokenResponse
 from app.models.user import User
 from app.models.session import Session
 from app.core.config import settings
+from app.core.database import get_collection
+from app.core.tokens import (
+    REFRESH_TOKEN,
+    access_token_lifetime,
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+    session_filter,
+)
 
 
 async def login(data: UserLogin, request: Optional[Request] = None) -> TokenResponse:
@@ -44,20 +52,6 @@ async def login(data: UserLogin, request: Optional[Request] = None) -> TokenResp
         )
         await user.insert()
 
-    # Generate JWT token
-    token_payload = {
-        "user_id": str(user.id),
-        "email": user.email,
-        "exp": datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-        "iat": datetime.utcnow()
-    }
-
-    access_token = jwt.encode(
-        token_payload,
-        settings.JWT_SECRET,
-        algorithm=settings.JWT_ALGORITHM
-    )
-
     # Extract client info from request
     ip_address = None
     user_agent = None
@@ -65,11 +59,25 @@ async def login(data: UserLogin, request: Optional[Request] = None) -> TokenResp
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
 
-    # Create session in database
+    # Generate JWT token(s). In stateless mode the session document only
+    # backs the refresh token; access tokens are verified in memory.
+    session_id = PydanticObjectId()
+    access_token = create_access_token(user, str(session_id))
+    refresh = None
+    expires_at = datetime.utcnow() + access_token_lifetime()
+    if settings.AUTH_MODE == "stateless":
+        refresh = create_refresh_token(str(user.id), str(session_id))
+        expires_at = refresh["expires_at"]
+
+    # Create session in database. The session expires (and MongoDB's TTL
+    # index removes it) with the access token, or the refresh token in
+    # stateless mode, where the rotating access token isn't stored.
     session = Session(
+        id=session_id,
         user_id=user.id,
-        token=access_token,
-        expires_at=datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        token=access_token if refresh is None else None,
+        refresh_jti=refresh["jti"] if refresh else None,
+        expires_at=expires_at,
         ip_address=ip_address,
         user_agent=user_agent,
         is_active=True,
@@ -90,6 +98,66 @@ async def login(data: UserLogin, request: Optional[Request] = None) -> TokenResp
     return TokenResponse(
         access_token=access_token,
         token_type="bearer",
+        expires_in=int(access_token_lifetime().total_seconds()),
+        refresh_token=refresh["token"] if refresh else None,
+        user=user_response
+    )
+
+
+async def refresh(refresh_token: str) -> TokenResponse:
+    """
+    Exchange a refresh token for a new access token and refresh token.
+
+    Refresh tokens rotate on every use. Presenting one that was already
+    exchanged means it was copied, so the whole session is revoked.
+
+    Raises:
+        HTTPException: 401 if the token is invalid, revoked or reused
+    """
+    try:
+        payload = decode_token(refresh_token, REFRESH_TOKEN)
+        session_id = PydanticObjectId(payload["sid"])
+        user_id = PydanticObjectId(payload["user_id"])
+        jti = payload["jti"]
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    user = await User.get(user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    access_token = create_access_token(user, str(session_id))
+    new_refresh = create_refresh_token(str(user_id), str(session_id))
+
+    # Rotate atomically: only the holder of the current refresh token wins
+    sessions = get_collection(Session)
+    result = await sessions.update_one(
+        {"_id": session_id, "user_id": user_id, "refresh_jti": jti, "is_active": True},
+        {"$set": {
+            "refresh_jti": new_refresh["jti"],
+            "expires_at": new_refresh["expires_at"],
+            "last_activity": datetime.now(),
+        }}
+    )
+
+    if result.modified_count == 0:
+        # Revoked session or a replayed (already rotated) refresh token
+        await sessions.update_one({"_id": session_id}, {"$set": {"is_active": False}})
+        raise HTTPException(status_code=401, detail="Refresh token is no longer valid")
+
+    user_response = UserResponse(
+        id=str(user.id),
+        email=user.email,
+        name=user.name,
+        avatar=user.avatar,
+        created_at=user.created_at
+    )
+
+    return TokenResponse(
+        access_token=access_token,
+        token_type="bearer",
+        expires_in=int(access_token_lifetime().total_seconds()),
+        refresh_token=new_refresh["token"],
         user=user_response
     )
 
@@ -111,22 +179,18 @@ async def logout(user_id: str, token: Optional[str] = None) -> dict:
     if token:
         # Find and deactivate the specific session
         session = await Session.find_one(
-            Session.token == token,
+            session_filter(token),
             Session.user_id == PydanticObjectId(user_id)
         )
         if session:
             session.is_active = False
-            await session.save()
+            await session.save_changes()
     else:
-        # Deactivate all sessions for this user
-        sessions = await Session.find(
+        # Deactivate all sessions for this user in a single update
+        await Session.find(
             Session.user_id == PydanticObjectId(user_id),
             Session.is_active == True
-        ).to_list()
-
-        for session in sessions:
-            session.is_active = False
-            await session.save()
+        ).update({"$set": {Session.is_active: False}})
 
     return {
         "message": "Successfully logged out",
@@ -1,84 +1,538 @@
-from typing import List, Dict, Any
+from datetime import datetime
+from functools import partial
+from typing import Awaitable, Callable, List, Dict, Any, Optional
 from beanie import PydanticObjectId
-from fastapi import HTTPException
-
-from app.schemas.generation import GenerationCreate, GenerationResponse
+from pydantic import ValidationError
+from pymongo.errors import ExecutionTimeout
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+
+from app.schemas.generation import (
+    GenerationCreate,
+    GenerationResponse,
+    QueueStatsResponse,
+    GeneratedImage,
+    ImageToImageForm,
+    VariationForm,
+)
 from app.schemas.response import success_response, error_response
-from app.models.generation import Generation, GenerationStatus, GenerationSettings
+from app.models.generation import (
+    Generation,
+    GenerationStatus,
+    GenerationSettings,
+    GenerationPriority,
+    GenerationMode,
+    QualityTier,
+)
+from app.core.config import settings
+from app.core.deadline import Deadline, DeadlineExceeded, ClientDisconnected, run_until_abandoned
+from app.core.profiling import collect_stages, stage
+from app.core.database import get_collection, history_read_preference, read_session, write_session
+from app.core.uploads import UploadError, read_multipart
 from app.services.huggingface_service import huggingface_service
-
-
-async def create_generation(user_id: str, data: GenerationCreate) -> Dict[str, Any]:
+from app.services.openai_service import openai_service
+from app.services.image_service import InvalidImage
+from app.services.source_image_service import source_image_service
+from app.services.stats_service import stats_service
+from app.services.usage_service import usage_service
+from app.services.quota_service import quota_service, QuotaExceeded
+from app.services.moderation_service import moderation_service, PromptRejected
+from app.services.similarity_service import similarity_service
+from app.services.webhook_service import webhook_service
+from app.services.archive_service import archive_service
+from app.services.export_service import export_service
+from app.models.webhook import WebhookEvent
+from app.services.scheduler import generation_scheduler
+from app.services.load_policy import load_policy
+
+
+def resolve_priority(data: GenerationCreate, generation_settings: GenerationSettings, plan: str) -> GenerationPriority:
+    """
+    Decide which scheduler lane a request goes to.
+
+    Small images and pro users qualify for the interactive lane; anyone may
+    opt down to batch. Requests for interactive that don't qualify are
+    served as standard.
+    """
+    pixels = generation_settings.width * generation_settings.height
+    interactive_eligible = pixels <= settings.INTERACTIVE_MAX_PIXELS or plan == "pro"
+
+    if data.priority is None:
+        return GenerationPriority.INTERACTIVE if interactive_eligible else GenerationPriority.STANDARD
+    if data.priority == GenerationPriority.INTERACTIVE and not interactive_eligible:
+        return GenerationPriority.STANDARD
+    return data.priority
+
+
+async def transition_status(generation: Generation, status: GenerationStatus, session=None, **fields) -> bool:
+    """
+    Atomically move a PROCESSING generation to `status`.
+
+    Only the status and the given fields are written ($set), and only if the
+    stored document is still PROCESSING, so concurrent workers or a delete in
+    the meantime cannot be overwritten.
+
+    Returns:
+        bool: True if this call performed the transition
+    """
+    for name, value in fields.items():
+        setattr(generation, name, value)
+
+    changes = generation.model_dump(include=set(fields))
+    changes["status"] = status.value
+
+    result = await get_collection(Generation).update_one(
+        {"_id": generation.id, "status": GenerationStatus.PROCESSING.value},
+        {"$set": changes},
+        session=session
+    )
+    if result.modified_count == 0:
+        return False
+
+    generation.status = status
+    return True
+
+
+def _select_thumbnail(variants: List[tuple], image_url: str) -> str:
+    """Pick a thumbnail URL from (size, url) pairs"""
+    if not variants:
+        return image_url
+    variants = sorted(variants)
+    for size, url in variants:
+        if size >= settings.THUMBNAIL_SIZE:
+            return url
+    return variants[-1][1]
+
+
+def thumbnail_url(generation: Generation) -> str:
+    """
+    URL of the smallest variant that covers THUMBNAIL_SIZE, falling back to
+    the largest variant and then the original image
+    """
+    return _select_thumbnail(
+        [(variant.size, variant.url) for variant in generation.variants],
+        generation.image_url
+    )
+
+
+def generation_response(generation: Generation) -> GenerationResponse:
+    """Build the API response for a generation document"""
+    return GenerationResponse(
+        id=str(generation.id),
+        user_id=str(generation.user_id),
+        prompt=generation.prompt,
+        image_url=generation.image_url,
+        thumbnail_url=thumbnail_url(generation),
+        variants=generation.variants,
+        status=generation.status,
+        settings=generation.settings,
+        priority=generation.priority,
+        mode=generation.mode,
+        quality_tier=generation.quality_tier,
+        source_image_url=generation.source_image_url,
+        reused_from=str(generation.reused_from) if generation.reused_from else None,
+        created_at=generation.created_at
+    )
+
+
+async def notify_webhooks(generation: Generation, event: WebhookEvent, error: Optional[str] = None) -> None:
+    """Queue webhook deliveries for a finished generation (never fails the request)"""
+    try:
+        data = generation_response(generation).model_dump(mode="json")
+        if error is not None:
+            data["error"] = error
+        await webhook_service.enqueue(generation.user_id, event, data)
+    except Exception as e:
+        print(f"⚠️  Failed to queue webhooks for generation {generation.id}: {e}")
+
+
+# Generations deleted per command when clearing a history
+CLEAR_BATCH_SIZE = 1000
+
+# Only the fields a history item needs
+HISTORY_PROJECTION = {
+    "user_id": 1,
+    "prompt": 1,
+    "image_url": 1,
+    "variants.size": 1,
+    "variants.url": 1,
+    "status": 1,
+    "settings": 1,
+    "priority": 1,
+    "mode": 1,
+    "quality_tier": 1,
+    "source_image_url": 1,
+    "reused_from": 1,
+    "created_at": 1,
+}
+
+
+def history_item(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a GenerationResponse-shaped dict straight from a projected raw
+    document, skipping Beanie/Pydantic model construction
+    """
+    return {
+        "id": str(doc["_id"]),
+        "user_id": str(doc["user_id"]),
+        "prompt": doc["prompt"],
+        "image_url": doc["image_url"],
+        "thumbnail_url": _select_thumbnail(
+            [(variant["size"], variant["url"]) for variant in doc.get("variants") or []],
+            doc["image_url"]
+        ),
+        "variants": None,
+        "status": doc.get("status", GenerationStatus.COMPLETED.value),
+        "settings": doc.get("settings") or GenerationSettings().model_dump(),
+        "priority": doc.get("priority", GenerationPriority.STANDARD.value),
+        "mode": doc.get("mode", GenerationMode.TEXT_TO_IMAGE.value),
+        "quality_tier": doc.get("quality_tier", QualityTier.FULL.value),
+        "source_image_url": doc.get("source_image_url"),
+        "reused_from": str(doc["reused_from"]) if doc.get("reused_from") else None,
+        "created_at": doc["created_at"],
+    }
+
+
+async def create_generation(
+    user_id: str,
+    data: GenerationCreate,
+    plan: str = "free",
+    request: Optional[Request] = None
+) -> Dict[str, Any]:
     """Create new image generation"""
     try:
-        # Create initial generation record with PROCESSING status
-        generation = Generation(
-            user_id=PydanticObjectId(user_id),
-            prompt=data.prompt,
-            image_url="",  # Will be updated after generation
-            status=GenerationStatus.PROCESSING,
-            settings=data.settings or GenerationSettings()
-        )
-        await generation.insert()
-
-        try:
-            # Generate image using Hugging Face Stable Diffusion
-            # Returns base64 encoded image data
-            image_data = await huggingface_service.generate_image(data)
-
-            # Update generation with image data and COMPLETED status
-            generation.image_url = image_data  # Store cloudnary imge url
-            generation.status = GenerationStatus.COMPLETED
-            await generation.save()
-
-        except Exception as e:
-            # Update generation with FAILED status
-            generation.status = GenerationStatus.FAILED
-            await generation.save()
-            raise HTTPException(status_code=500, detail=f"Image generation failed: {str(e)}")
-
-        # Return response
-        response_data = GenerationResponse(
-            id=str(generation.id),
-            user_id=str(generation.user_id),
-            prompt=generation.prompt,
-            image_url=generation.image_url,
-            status=generation.status,
-            settings=generation.settings,
-            created_at=generation.created_at
-        )
-
-        return success_response("Generation created successfully", response_data)
+        deadline = Deadline.from_request(request)
+        # Reject bad prompts before they use quota, the database or the provider
+        with stage("moderation"):
+            await moderation_service.validate(data.prompt)
+
+        generation_settings = data.settings or GenerationSettings()
+        data = data.model_copy(update={"settings": generation_settings})
+
+        # Reusing an existing image costs no provider time, so it skips quotas
+        signature = None
+        if generation_settings.reuse_similar and settings.PROMPT_REUSE_ENABLED:
+            signature = await similarity_service.signature(data.prompt)
+            reused = await _reuse_similar(user_id, data, plan, signature)
+            if reused is not None:
+                return reused
+
+        async with quota_service.generation_slot(user_id):
+            return await _run_generation(
+                user_id, data, plan, signature, deadline, request,
+                index_prompt=settings.PROMPT_REUSE_ENABLED
+            )
 
+    except PromptRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QuotaExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create generation: {str(e)}")
 
 
+async def _reuse_similar(
+    user_id: str,
+    data: GenerationCreate,
+    plan: str,
+    signature: List[int]
+) -> Optional[Dict[str, Any]]:
+    """
+    Serve a request from a completed generation with a near-identical prompt
+
+    Returns:
+        The response for a new COMPLETED generation pointing at the existing
+        image, or None if nothing similar enough exists
+    """
+    owner_id = PydanticObjectId(user_id)
+    with stage("reuse_lookup"):
+        match = await similarity_service.find_similar(owner_id, data.settings, signature)
+    if match is None:
+        return None
+    source, similarity = match
+
+    generation = Generation(
+        user_id=owner_id,
+        prompt=data.prompt,
+        image_url=source.image_url,
+        variants=source.variants,
+        status=GenerationStatus.COMPLETED,
+        settings=data.settings,
+        priority=resolve_priority(data, data.settings, plan),
+        image_bytes=0,  # Shares the source's stored image
+        prompt_signature=signature,
+        reused_from=source.id,
+        usage=usage_service.build(
+            source.usage.provider if source.usage else "",
+            source.usage.model if source.usage else "",
+            {},
+            data.settings.width,
+            data.settings.height,
+            cache_hit=True
+        )
+    )
+    async with write_session(user_id) as session:
+        await generation.insert(session=session)
+        await stats_service.record_created(generation.user_id, session=session)
+        await stats_service.record_completed(generation, session=session)
+        await usage_service.record(generation, session=session)
+    await notify_webhooks(generation, WebhookEvent.GENERATION_COMPLETED)
+
+    return success_response(
+        f"Generation reused from a similar prompt (similarity {similarity:.2f})",
+        generation_response(generation)
+    )
+
+
+async def _run_generation(
+    user_id: str,
+    data: GenerationCreate,
+    plan: str,
+    signature: Optional[List[int]],
+    deadline: Deadline,
+    request: Optional[Request],
+    generate: Optional[Callable[[Deadline], Awaitable[GeneratedImage]]] = None,
+    provider: str = "",
+    model: str = "",
+    index_prompt: bool = False,
+    **fields
+) -> Dict[str, Any]:
+    """
+    Generate an image within an already reserved quota slot
+
+    `generate` produces and stores the image (text-to-image with Hugging
+    Face by default) using `provider`/`model`; extra `fields` are set on the
+    generation record. With `index_prompt`, a full-quality result is added
+    to the similarity index (its prompt signature is computed if `signature`
+    wasn't passed).
+    """
+    generation_settings = data.settings
+    if generate is None:
+        generate = partial(huggingface_service.generate, data)
+        provider, model = "huggingface", huggingface_service.model
+
+    def usage(timings: Dict[str, float], image: Optional[GeneratedImage] = None):
+        """Ledger entry, written with the final status transition"""
+        return usage_service.build(
+            provider, model, timings, generation_settings.width, generation_settings.height, image=image
+        )
+
+    # Create initial generation record with PROCESSING status
+    generation = Generation(
+        user_id=PydanticObjectId(user_id),
+        prompt=data.prompt,
+        image_url="",  # Will be updated after generation
+        status=GenerationStatus.PROCESSING,
+        settings=generation_settings,
+        priority=resolve_priority(data, generation_settings, plan),
+        **fields
+    )
+    # Causal session so the user's next history read sees this generation
+    with stage("db_insert"):
+        async with write_session(user_id) as session:
+            await generation.insert(session=session)
+            await stats_service.record_created(generation.user_id, session=session)
+
+    try:
+        # Generate image using Hugging Face Stable Diffusion
+        # The scheduler decides when this request gets a provider slot.
+        # Queueing, inference and upload are abandoned if the client goes
+        # away or the deadline passes.
+        # The "generate" stage includes queueing; the scheduler and the
+        # provider record queue/inference/upload/variants stages inside it,
+        # which are also collected for the usage ledger.
+        with stage("generate"), collect_stages() as timings:
+            image = await run_until_abandoned(
+                generation_scheduler.run(
+                    user_id,
+                    generate,
+                    deadline,
+                    priority=generation.priority
+                ),
+                deadline,
+                request
+            )
+
+    except (DeadlineExceeded, ClientDisconnected) as e:
+        # Nobody wants the result anymore - record it as cancelled
+        async with write_session(user_id) as session:
+            if await transition_status(generation, GenerationStatus.CANCELLED, session=session, usage=usage(timings)):
+                await stats_service.record_cancelled(generation.user_id, session=session)
+                await usage_service.record(generation, session=session)
+        status_code = 504 if isinstance(e, DeadlineExceeded) else 499
+        raise HTTPException(status_code=status_code, detail=f"Image generation cancelled: {str(e)}")
 
-async def get_generations(user_id: str) -> Dict[str, Any]:
-    """Get all generations for a user"""
+    except Exception as e:
+        # Update generation with FAILED status
+        async with write_session(user_id) as session:
+            failed = await transition_status(generation, GenerationStatus.FAILED, session=session, usage=usage(timings))
+            if failed:
+                await stats_service.record_failed(generation.user_id, session=session)
+                await usage_service.record(generation, session=session)
+        if failed:
+            await notify_webhooks(generation, WebhookEvent.GENERATION_FAILED, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Image generation failed: {str(e)}")
+
+    if index_prompt and signature is None and image.quality_tier == QualityTier.FULL:
+        signature = await similarity_service.signature(data.prompt)
+
+    # Update generation with image data and COMPLETED status
+    with stage("db_update"):
+        async with write_session(user_id) as session:
+            completed = await transition_status(
+                generation,
+                GenerationStatus.COMPLETED,
+                session=session,
+                image_url=image.url,  # Store cloudnary imge url
+                image_bytes=image.bytes,
+                variants=image.variants,
+                prompt_signature=signature,
+                quality_tier=image.quality_tier,
+                usage=usage(timings, image)
+            )
+            if completed:
+                await stats_service.record_completed(generation, session=session)
+                await usage_service.record(generation, session=session)
+
+    if not completed:
+        # Deleted or cleared while the image was being generated
+        raise HTTPException(status_code=409, detail="Generation was removed before it completed")
+
+    await similarity_service.add(generation)
+    await notify_webhooks(generation, WebhookEvent.GENERATION_COMPLETED)
+
+    # Return response
+    return success_response("Generation created successfully", generation_response(generation))
+
+
+async def create_from_image(
+    user_id: str,
+    mode: GenerationMode,
+    request: Request,
+    plan: str = "free"
+) -> Dict[str, Any]:
+    """
+    Create an image-to-image generation or a variation from an uploaded image
+
+    The multipart body is streamed into a size-limited spooled file. The
+    source is validated and downscaled in the image worker pool, and stored
+    only once per distinct upload.
+    """
+    upload = None
     try:
-        all_generations = await (
-            Generation.find(Generation.user_id == PydanticObjectId(user_id))
-            .sort(-Generation.created_at)  # newest first
-            .to_list()
-        )
+        deadline = Deadline.from_request(request)
+        with stage("upload_read"):
+            upload = await read_multipart(request, file_field="image")
+
+        if mode == GenerationMode.VARIATION:
+            form = VariationForm.model_validate(upload.fields)
+        else:
+            form = ImageToImageForm.model_validate(upload.fields)
+            with stage("moderation"):
+                await moderation_service.validate(form.prompt)
+
+        async with quota_service.generation_slot(user_id):
+            with stage("source_image"):
+                source, content = await source_image_service.resolve(
+                    upload.file, square=mode == GenerationMode.VARIATION
+                )
+
+            if mode == GenerationMode.VARIATION:
+                # Variations have no prompt
+                data = GenerationCreate(
+                    prompt="",
+                    settings=GenerationSettings(width=form.size, height=form.size),
+                    priority=form.priority
+                )
+                generate = partial(openai_service.generate_image_variation, content, form.size)
+                provider, model = "openai", settings.VARIATION_MODEL
+            else:
+                # The result has the size of the (downscaled) source
+                data = GenerationCreate(
+                    prompt=form.prompt,
+                    settings=GenerationSettings(width=source.width, height=source.height, strength=form.strength),
+                    priority=form.priority
+                )
+                generate = partial(huggingface_service.image_to_image, data, content)
+                provider, model = "huggingface", settings.IMAGE_TO_IMAGE_MODEL
+
+            return await _run_generation(
+                user_id, data, plan, None, deadline, request,
+                generate=generate,
+                provider=provider,
+                model=model,
+                mode=mode,
+                source_image_url=source.url
+            )
 
-        # Convert Beanie documents to Pydantic response objects
-        generations_data = [
-            GenerationResponse(
-                id=str(gen.id),
-                user_id=str(gen.user_id),
-                prompt=gen.prompt,
-                image_url=gen.image_url,
-                status=gen.status,
-                settings=gen.settings,
-                created_at=gen.created_at
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except (InvalidImage, PromptRejected) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QuotaExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create generation: {str(e)}")
+    finally:
+        if upload is not None:
+            upload.close()
+
+
+async def get_generations(
+    user_id: str,
+    limit: Optional[int] = None,
+    before: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Get a user's generations, newest first
+
+    Without `limit` the whole history is returned. With it, pages are
+    fetched by passing the created_at of the last item as `before`. Pages
+    past the hot collection are read from the archive transparently.
+    """
+    try:
+        owner_id = PydanticObjectId(user_id)
+        query: Dict[str, Any] = {"user_id": owner_id, "archived": {"$ne": True}}
+        if before is not None:
+            query["created_at"] = {"$lt": before}
+
+        # History reads may be served by a secondary; the causal session
+        # still guarantees the user's own recent writes are visible
+        async with read_session(user_id) as session:
+            cursor = (
+                get_collection(Generation, history_read_preference())
+                .find(query, HISTORY_PROJECTION, session=session)
+                .sort("created_at", -1)  # newest first
             )
-            for gen in all_generations
-        ]
+            if limit is not None:
+                cursor = cursor.limit(limit)
+            documents = await cursor.to_list(length=None)
+
+        if limit is None or len(documents) < limit:
+            documents += await archive_service.archived_history(
+                owner_id,
+                before=documents[-1]["created_at"] if documents else before,
+                limit=None if limit is None else limit - len(documents)
+            )
+
+        # Raw documents go straight into response dicts; the router
+        # serializes them without re-validation
+        generations_data = [history_item(doc) for doc in documents]
 
         return success_response("Generations fetched successfully", generations_data)
 
@@ -86,10 +540,117 @@ async def get_generations(user_id: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Failed to fetch generations: {str(e)}")
 
 
+async def search_generations(
+    user_id: str,
+    q: Optional[str] = None,
+    status: Optional[GenerationStatus] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    page: int = 1,
+    limit: int = 20,
+    before: Optional[datetime] = None,
+    before_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Search a user's generations
+
+    Text queries use the per-user text index on prompt and are ranked by
+    relevance (newest first on ties), paginated with `page`. Without a query
+    results are newest first and paginated like the history: pass the
+    created_at and id of the last item as `before`/`before_id` (returned as
+    next_before/next_before_id), so deep pages cost no more than the first.
+    Pages are fetched with limit + 1 to report has_more without a count,
+    and every query runs under SEARCH_MAX_TIME_MS.
+    """
+    if q and (before is not None or before_id is not None):
+        raise HTTPException(status_code=400, detail="before can't be combined with q; use page")
+    if not q and page > 1:
+        raise HTTPException(status_code=400, detail="page needs q; without it pass before/before_id of the last item")
+    if before_id is not None and (before is None or not PydanticObjectId.is_valid(before_id)):
+        raise HTTPException(status_code=400, detail="before_id needs before and must be a generation id")
+
+    try:
+        # Archived generations are not searchable; their stubs are skipped
+        query: Dict[str, Any] = {"user_id": PydanticObjectId(user_id), "archived": {"$ne": True}}
+        if status is not None:
+            query["status"] = status.value
+        if created_after is not None or created_before is not None:
+            query["created_at"] = {}
+            if created_after is not None:
+                query["created_at"]["$gte"] = created_after
+            if created_before is not None:
+                query["created_at"]["$lt"] = created_before
+        if width is not None:
+            query["settings.width"] = width
+        if height is not None:
+            query["settings.height"] = height
+
+        projection = dict(HISTORY_PROJECTION)
+        if q:
+            query["$text"] = {"$search": q}
+            projection["score"] = {"$meta": "textScore"}
+            sort = [("score", {"$meta": "textScore"}), ("created_at", -1)]
+            skip = (page - 1) * limit
+        else:
+            if before is not None:
+                # Strictly after the last item in (created_at, _id) order
+                keyset: List[Dict[str, Any]] = [{"created_at": {"$lt": before}}]
+                if before_id is not None:
+                    keyset.append({"created_at": before, "_id": {"$lt": PydanticObjectId(before_id)}})
+                query["$or"] = keyset
+            sort = [("created_at", -1), ("_id", -1)]
+            skip = 0
+
+        async with read_session(user_id) as session:
+            cursor = (
+                get_collection(Generation, history_read_preference())
+                .find(query, projection, session=session)
+                .sort(sort)
+                .skip(skip)
+                .limit(limit + 1)
+                .max_time_ms(settings.SEARCH_MAX_TIME_MS)
+            )
+            documents = await cursor.to_list(length=None)
+
+        items = []
+        for doc in documents[:limit]:
+            item = history_item(doc)
+            if q:
+                item["score"] = round(doc.get("score", 0.0), 4)
+            items.append(item)
+
+        has_more = len(documents) > limit
+        data: Dict[str, Any] = {"items": items, "limit": limit, "has_more": has_more}
+        if q:
+            data["page"] = page
+        else:
+            data["next_before"] = items[-1]["created_at"] if has_more else None
+            data["next_before_id"] = items[-1]["id"] if has_more else None
+        return success_response("Generations searched successfully", data)
+
+    except ExecutionTimeout:
+        raise HTTPException(status_code=504, detail="Search took too long; narrow the query or filters")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search generations: {str(e)}")
+
+
 async def get_generation(user_id: str, generation_id: str) -> Dict[str, Any]:
     """Get single generation by ID"""
     try:
-        generation = await Generation.get(PydanticObjectId(generation_id))
+        async with read_session(user_id) as session:
+            document = await get_collection(Generation, history_read_preference()).find_one(
+                {"_id": PydanticObjectId(generation_id)},
+                session=session
+            )
+        if document and document.get("archived"):
+            if str(document["user_id"]) != user_id:
+                raise HTTPException(status_code=403, detail="Access denied")
+            document = await archive_service.get_archived(document)
+        generation = Generation.model_validate(document) if document else None
 
         if not generation:
             raise HTTPException(status_code=404, detail="Generation not found")
@@ -98,15 +659,7 @@ async def get_generation(user_id: str, generation_id: str) -> Dict[str, Any]:
         if str(generation.user_id) != user_id:
             raise HTTPException(status_code=403, detail="Access denied")
 
-        response_data = GenerationResponse(
-            id=str(generation.id),
-            user_id=str(generation.user_id),
-            prompt=generation.prompt,
-            image_url=generation.image_url,
-            status=generation.status,
-            settings=generation.settings,
-            created_at=generation.created_at
-        )
+        response_data = generation_response(generation)
 
         return success_response("Generation fetched successfully", response_data)
 
@@ -119,16 +672,26 @@ async def get_generation(user_id: str, generation_id: str) -> Dict[str, Any]:
 async def delete_generation(user_id: str, generation_id: str) -> Dict[str, Any]:
     """Delete a generation"""
     try:
-        generation = await Generation.get(PydanticObjectId(generation_id))
+        collection = get_collection(Generation)
+        # Raw document: archived generations are slim stubs
+        document = await collection.find_one({"_id": PydanticObjectId(generation_id)})
 
-        if not generation:
+        if not document:
             raise HTTPException(status_code=404, detail="Generation not found")
 
         # Verify ownership
-        if str(generation.user_id) != user_id:
+        if str(document["user_id"]) != user_id:
             raise HTTPException(status_code=403, detail="Access denied")
 
-        await generation.delete()
+        async with write_session(user_id) as session:
+            result = await collection.delete_one({"_id": document["_id"]}, session=session)
+            # Only the request that actually deleted it updates the counters
+            if result.deleted_count == 1:
+                await stats_service.record_deleted(document["user_id"], [document], session=session)
+        if result.deleted_count == 1:
+            if document.get("archived"):
+                await archive_service.remove(document)
+            await similarity_service.remove([document["_id"]])
 
         return success_response("Generation deleted successfully", None)
 
@@ -138,17 +701,62 @@ async def delete_generation(user_id: str, generation_id: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Failed to delete generation: {str(e)}")
 
 
+async def _delete_batch(user_id: str, owner_id: PydanticObjectId, ids: List[Any]) -> int:
+    async with write_session(user_id) as session:
+        result = await get_collection(Generation).delete_many(
+            {"_id": {"$in": ids}, "user_id": owner_id},
+            session=session
+        )
+    await similarity_service.remove(ids)
+    return result.deleted_count
+
+
 async def clear_history(user_id: str) -> Dict[str, Any]:
     """Clear all generations for user"""
     try:
-        result = await Generation.find(
-            Generation.user_id == PydanticObjectId(user_id)
-        ).delete()
+        collection = get_collection(Generation)
+        owner_id = PydanticObjectId(user_id)
+
+        # Delete in batches of ids, so neither the id list nor the delete
+        # command grows with the size of the history
+        deleted = 0
+        cursor = collection.find({"user_id": owner_id}, {"_id": 1}).batch_size(CLEAR_BATCH_SIZE)
+        batch: List[Any] = []
+        async for doc in cursor:
+            batch.append(doc["_id"])
+            if len(batch) >= CLEAR_BATCH_SIZE:
+                deleted += await _delete_batch(user_id, owner_id, batch)
+                batch = []
+        if batch:
+            deleted += await _delete_batch(user_id, owner_id, batch)
+        await archive_service.clear(owner_id)
+
+        # Recount from what is left rather than decrementing from a snapshot,
+        # which concurrent deletes would make inexact
+        await stats_service.repair(owner_id)
 
         return success_response(
             "Generation history cleared successfully",
-            {"deleted_count": result.deleted_count}
+            {"deleted_count": deleted}
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clear history: {str(e)}")
+
+
+def export_generations(user_id: str) -> StreamingResponse:
+    """Stream all of the user's generations (images and manifest.json) as a ZIP"""
+    filename = f"generations-{datetime.now():%Y%m%d-%H%M%S}.zip"
+    return StreamingResponse(
+        export_service.stream(user_id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def get_queue_stats() -> Dict[str, Any]:
+    """Get scheduler queue depth and wait times per priority lane"""
+    return success_response(
+        "Queue stats fetched successfully",
+        QueueStatsResponse(**generation_scheduler.stats(), **load_policy.stats())
+    )
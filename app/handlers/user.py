@@ -1,10 +1,13 @@
+from datetime import datetime
 from fastapi import Request, Response, status, HTTPException
 from beanie import PydanticObjectId
-from app.schemas.user import UserResponse, ProfileResponse
+from app.schemas.user import UserResponse, ProfileResponse, UserStatsResponse
 from app.schemas.session import SessionResponse
 from app.schemas.response import ApiResponse
 from app.models.user import User
 from app.models.session import Session
+from app.services.stats_service import stats_service
+from app.core.database import get_collection, history_read_preference, read_session, write_session
 
 async def get_profile(
     user_id: str,
@@ -12,11 +15,20 @@ async def get_profile(
     response: Response
 ) -> ApiResponse[ProfileResponse]:
 
-    # Fetch user from database
-    user = await User.get(PydanticObjectId(user_id))
-    session = await Session.find_one(
-    Session.user_id == PydanticObjectId(user_id)
-)
+    # Fetch user from database (profile reads tolerate bounded staleness)
+    async with read_session(user_id) as db_session:
+        read_preference = history_read_preference()
+        user_doc = await get_collection(User, read_preference).find_one(
+            {"_id": PydanticObjectId(user_id)},
+            session=db_session
+        )
+        session_doc = await get_collection(Session, read_preference).find_one(
+            {"user_id": PydanticObjectId(user_id)},
+            session=db_session
+        )
+
+    user = User.model_validate(user_doc) if user_doc else None
+    session = Session.model_validate(session_doc) if session_doc else None
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -72,8 +84,11 @@ async def update_profile(
     if "avatar" in data:
         user.avatar = data["avatar"]
 
-    # Save updated user
-    await user.save()
+    # Save only the changed fields ($set) instead of replacing the document
+    if user.is_changed:
+        user.updated_at = datetime.now()
+        async with write_session(user_id) as db_session:
+            await user.save_changes(session=db_session)
 
     response.status_code = status.HTTP_200_OK
 
@@ -90,3 +105,24 @@ async def update_profile(
         "message": "Profile updated successfully",
         "data": user_response
     }
+
+
+async def get_stats(user_id: str) -> ApiResponse[UserStatsResponse]:
+    """Get precomputed generation counters for a user"""
+    stats = await stats_service.get_stats(PydanticObjectId(user_id))
+
+    stats_response = UserStatsResponse(
+        total=stats.total,
+        completed=stats.completed,
+        failed=stats.failed,
+        cancelled=stats.cancelled,
+        processing=max(stats.total - stats.completed - stats.failed - stats.cancelled, 0),
+        bytes_stored=stats.bytes_stored,
+        last_generated_at=stats.last_generated_at
+    )
+
+    return {
+        "success": True,
+        "message": "Successfully fetched stats",
+        "data": stats_response
+    }
@@ -0,0 +1,110 @@
+import secrets
+from typing import Any, Dict
+
+from beanie import PydanticObjectId
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.public_http import NonPublicAddress, resolve_public
+from app.models.webhook import WebhookEndpoint, WebhookDeadLetter
+from app.schemas.response import success_response
+from app.schemas.webhook import WebhookCreate, WebhookResponse, DeadLetterResponse
+from app.services.webhook_service import webhook_service
+
+
+def _endpoint_response(endpoint: WebhookEndpoint, include_secret: bool = False) -> WebhookResponse:
+    return WebhookResponse(
+        id=str(endpoint.id),
+        url=endpoint.url,
+        events=endpoint.events,
+        is_active=endpoint.is_active,
+        secret=endpoint.secret if include_secret else None,
+        created_at=endpoint.created_at
+    )
+
+
+async def create_webhook(user_id: str, data: WebhookCreate) -> Dict[str, Any]:
+    """Register a webhook endpoint; the signing secret is only returned here"""
+    if data.url.scheme != "https" and not settings.WEBHOOK_ALLOW_HTTP:
+        raise HTTPException(status_code=400, detail="Webhook URLs must use https")
+    if not data.events:
+        raise HTTPException(status_code=400, detail="Subscribe to at least one event")
+    if not settings.WEBHOOK_ALLOW_PRIVATE:
+        # Checked again on every delivery, as DNS can change
+        try:
+            host = data.url.host.strip("[]")  # IPv6 literals come bracketed
+            await resolve_public(host, data.url.port or (443 if data.url.scheme == "https" else 80))
+        except NonPublicAddress as e:
+            raise HTTPException(status_code=400, detail=f"Webhook URL not allowed: {e}")
+
+    owner_id = PydanticObjectId(user_id)
+    count = await WebhookEndpoint.find(WebhookEndpoint.user_id == owner_id).count()
+    if count >= settings.WEBHOOK_MAX_ENDPOINTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.WEBHOOK_MAX_ENDPOINTS} webhooks per user")
+
+    endpoint = WebhookEndpoint(
+        user_id=owner_id,
+        url=str(data.url),
+        secret=f"whsec_{secrets.token_hex(24)}",
+        events=list(dict.fromkeys(data.events))
+    )
+    await endpoint.insert()
+
+    return success_response("Webhook created successfully", _endpoint_response(endpoint, include_secret=True))
+
+
+async def list_webhooks(user_id: str) -> Dict[str, Any]:
+    """List the user's webhook endpoints (without secrets)"""
+    endpoints = await WebhookEndpoint.find(WebhookEndpoint.user_id == PydanticObjectId(user_id)).to_list()
+    return success_response("Webhooks fetched successfully", [_endpoint_response(endpoint) for endpoint in endpoints])
+
+
+async def delete_webhook(user_id: str, webhook_id: str) -> Dict[str, Any]:
+    """Delete a webhook endpoint; its queued deliveries are dropped"""
+    endpoint = await WebhookEndpoint.find_one(
+        WebhookEndpoint.id == PydanticObjectId(webhook_id),
+        WebhookEndpoint.user_id == PydanticObjectId(user_id)
+    )
+    if not endpoint:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+
+    await endpoint.delete()
+    return success_response("Webhook deleted successfully", None)
+
+
+async def list_dead_letters(user_id: str, limit: int = 50) -> Dict[str, Any]:
+    """Most recent deliveries that failed every attempt"""
+    dead_letters = await WebhookDeadLetter.find(
+        WebhookDeadLetter.user_id == PydanticObjectId(user_id)
+    ).sort(-WebhookDeadLetter.failed_at).limit(limit).to_list()
+
+    return success_response("Dead letters fetched successfully", [
+        DeadLetterResponse(
+            id=str(dead_letter.id),
+            endpoint_id=str(dead_letter.endpoint_id),
+            url=dead_letter.url,
+            event=dead_letter.event,
+            payload=dead_letter.payload,
+            attempts=dead_letter.attempts,
+            last_error=dead_letter.last_error,
+            created_at=dead_letter.created_at,
+            failed_at=dead_letter.failed_at
+        )
+        for dead_letter in dead_letters
+    ])
+
+
+async def retry_dead_letter(user_id: str, dead_letter_id: str) -> Dict[str, Any]:
+    """Queue a dead letter for delivery again"""
+    dead_letter = await WebhookDeadLetter.find_one(
+        WebhookDeadLetter.id == PydanticObjectId(dead_letter_id),
+        WebhookDeadLetter.user_id == PydanticObjectId(user_id)
+    )
+    if not dead_letter:
+        raise HTTPException(status_code=404, detail="Dead letter not found")
+
+    if not await WebhookEndpoint.get(dead_letter.endpoint_id):
+        raise HTTPException(status_code=409, detail="The webhook endpoint no longer exists")
+
+    await webhook_service.redeliver(dead_letter)
+    return success_response("Delivery queued", None)
@@ -1,11 +1,20 @@
+import time
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 # from dotenv import load_dotenv
 from app.core.config import settings
 from app.core.database import init_db, close_db
+from app.core.coordination import coordination
+from app.core.responses import FastJSONResponse
+from app.core.tokens import key_ring
+from app.core.profiling import loop_lag_monitor, slow_request_log
 from app.routers import router
 from app.schemas.response import error_response
+from app.services.activity_tracker import activity_tracker
+from app.services.similarity_service import similarity_service
+from app.services.warmup_service import warmup_service
+from app.services.webhook_service import webhook_service
 
 # load_dotenv()
 
@@ -13,6 +22,7 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
     description="AI Image Generator API",
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -26,19 +36,46 @@ app.add_middleware(
 app.include_router(router, prefix="/api")
 
 
+@app.middleware("http")
+async def capture_slow_requests(request: Request, call_next):
+    """Time every request and keep slow ones (with stage timings) in a ring buffer"""
+    timings = slow_request_log.start()
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    slow_request_log.record(
+        method=request.method,
+        route=route.path if route else request.url.path,
+        path=request.url.path,
+        status_code=response.status_code,
+        duration=time.perf_counter() - start,
+        timings=timings
+    )
+    return response
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTPException and return wrapped error response"""
     return JSONResponse(
         status_code=exc.status_code,
-        content=error_response(exc.detail)
+        content=error_response(exc.detail),
+        headers=exc.headers
     )
 
 
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup"""
+    # Connections warm up in the background while the database initializes
+    warmup_service.start()
     await init_db()
+    await coordination.start()
+    if settings.PROMPT_REUSE_ENABLED:
+        similarity_service.start()  # Builds the index in the background
+    activity_tracker.start()
+    webhook_service.start()
+    loop_lag_monitor.start()
     print(f"\n🚀 Server running at http://{settings.HOST}:{settings.PORT}")
     print(f"📚 API Docs available at http://{settings.HOST}:{settings.PORT}/docs\n")
 
@@ -46,6 +83,12 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
+    await warmup_service.stop()
+    await similarity_service.stop()
+    await loop_lag_monitor.stop()
+    await webhook_service.stop()
+    await activity_tracker.stop()  # Flush pending session activity
+    await coordination.stop()
     await close_db()
 
 
@@ -56,3 +99,28 @@ async def health_check():
         "message": "Service is healthy",
         "data": {"status": "healthy"}
     }
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Ready once the startup warm-up finished or timed out (503 until then)"""
+    data = warmup_service.stats()
+    if not warmup_service.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "message": "Service is warming up", "data": data}
+        )
+    return {
+        "success": True,
+        "message": "Service is ready",
+        "data": data
+    }
+
+
+@app.get("/.well-known/jwks.json")
+async def jwks():
+    """Public keys for verifying tokens issued by this API"""
+    return JSONResponse(
+        content=key_ring.jwks(),
+        headers={"Cache-Control": "public, max-age=300"}
+    )
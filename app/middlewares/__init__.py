@@ -1,3 +1,3 @@
-from app.middlewares.auth import get_current_user, AuthRequired
+from app.middlewares.auth import get_current_user, require_admin, AuthRequired
 
-__all__ = ["get_current_user", "AuthRequired"]
+__all__ = ["get_current_user", "require_admin", "AuthRequired"]
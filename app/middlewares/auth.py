@@ -1,11 +1,13 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from jose import JWTError
 from beanie import PydanticObjectId
 
 from app.models.user import User
 from app.core.config import settings
+from app.core.tokens import ACCESS_TOKEN, decode_token
+from app.services.activity_tracker import activity_tracker
 
 security = HTTPBearer(auto_error=False)  # Don't auto-error, we'll check cookies too
 
@@ -43,11 +45,7 @@ async def get_current_user(
 
     try:
         # Decode JWT token
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = decode_token(token, ACCESS_TOKEN)
 
         # Extract user_id from token payload
         user_id: str = payload.get("user_id")
@@ -65,6 +63,27 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Recorded in memory; flushed to the session in periodic batches
+    activity_tracker.touch(session_id=payload.get("sid"), token=token)
+
+    # Stateless mode: the signed claims are trusted until the (short)
+    # expiry, so no database round trip is needed
+    if settings.AUTH_MODE == "stateless" and "plan" in payload:
+        try:
+            return User.model_construct(
+                id=PydanticObjectId(user_id),
+                email=payload.get("email"),
+                name=payload.get("name"),
+                plan=payload["plan"],
+                is_admin=payload.get("admin", False),
+            )
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
     # Fetch user from database
     try:
         user = await User.get(PydanticObjectId(user_id))
@@ -85,6 +104,16 @@ async def get_current_user(
     return user
 
 
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Dependency for admin-only routes"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
+
+
 class AuthRequired:
     """
     Dependency class for routes requiring authentication.
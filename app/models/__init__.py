@@ -1,5 +1,10 @@
 from app.models.user import User
 from app.models.generation import Generation
 from app.models.session import Session
+from app.models.user_stats import UserStats
+from app.models.generation_archive import GenerationArchive
+from app.models.source_image import SourceImage
+from app.models.usage_bucket import UsageBucket
+from app.models.webhook import WebhookEndpoint, WebhookDelivery, WebhookDeadLetter
 
-__all__ = ["User", "Generation", "Session"]
+__all__ = ["User", "Generation", "Session", "UserStats", "GenerationArchive", "SourceImage", "UsageBucket", "WebhookEndpoint", "WebhookDelivery", "WebhookDeadLetter"]
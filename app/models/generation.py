@@ -1,8 +1,9 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from beanie import Document, PydanticObjectId
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
 
 
 class GenerationStatus(str, Enum):
@@ -10,24 +11,83 @@ class GenerationStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class GenerationMode(str, Enum):
+    TEXT_TO_IMAGE = "text_to_image"
+    IMAGE_TO_IMAGE = "image_to_image"
+    VARIATION = "variation"
+
+
+class QualityTier(str, Enum):
+    FULL = "full"
+    REDUCED = "reduced"  # Fewer steps, smaller size
+    FAST = "fast"  # Faster model variant, smallest size
+
+
+class GenerationPriority(str, Enum):
+    INTERACTIVE = "interactive"
+    STANDARD = "standard"
+    BATCH = "batch"
 
 
 class GenerationSettings(BaseModel):
     width: int = 512
     height: int = 512
+    reuse_similar: bool = False  # Serve an existing image for a near-identical prompt
+    strength: Optional[float] = None  # Image-to-image: how far the result may move from the source
+    allow_degraded: bool = True  # Accept fewer steps / a smaller size / a faster model under load
     # style: Optional[str] = None
 
 
+class ImageVariant(BaseModel):
+    size: int  # Longest side bound in pixels
+    width: int
+    height: int
+    url: str
+    bytes: int = 0
+
+
+class GenerationUsage(BaseModel):
+    """Cost/latency ledger entry, written with the final status transition"""
+    provider: str = ""
+    model: str = ""
+    queue_wait_ms: float = 0.0
+    inference_ms: float = 0.0
+    upload_ms: float = 0.0  # Original plus variants
+    bytes_stored: int = 0
+    cache_hit: bool = False  # Served by reusing an existing image
+    estimated_cost_usd: float = 0.0
+
+
 class Generation(Document):
     user_id: PydanticObjectId
     prompt: str
     image_url: str
+    variants: List[ImageVariant] = []
     status: GenerationStatus = GenerationStatus.COMPLETED
     settings: GenerationSettings = GenerationSettings()
-    created_at: datetime = datetime.now()
+    priority: GenerationPriority = GenerationPriority.STANDARD
+    mode: GenerationMode = GenerationMode.TEXT_TO_IMAGE
+    quality_tier: QualityTier = QualityTier.FULL  # Parameters applied by the load policy
+    source_image_url: Optional[str] = None  # Uploaded source of image-to-image / variations
+    image_bytes: int = 0  # Size of the stored image, used for per-user stats
+    prompt_signature: Optional[List[int]] = None  # MinHash of the prompt, for near-duplicate reuse
+    reused_from: Optional[PydanticObjectId] = None  # Generation whose image was reused
+    usage: Optional[GenerationUsage] = None
+    archived: bool = False  # Stub whose full document lives in generation_archives
+    archive_id: Optional[PydanticObjectId] = None
+    created_at: datetime = Field(default_factory=datetime.now)
 
     class Settings:
+        use_state_management = True
         name = "generations"
         indexes = [
             "user_id",
+            # History and search pages, newest first (_id breaks created_at ties)
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+            # Per-user full-text search over prompts (user_id equality prefix
+            # keeps each search within one user's index entries)
+            IndexModel([("user_id", ASCENDING), ("prompt", TEXT)], name="user_prompt_text"),
         ]
@@ -0,0 +1,27 @@
+from datetime import datetime
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+
+class GenerationArchive(Document):
+    """
+    A compressed bundle of one user's archived generations.
+
+    `data` is zlib-compressed concatenated BSON of the full generation
+    documents; each archived generation keeps a slim stub in the
+    generations collection pointing here via archive_id.
+    """
+    user_id: PydanticObjectId
+    generation_count: int
+    first_created_at: datetime
+    last_created_at: datetime
+    compression: str = "zlib"
+    data: bytes
+    archived_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "generation_archives"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("last_created_at", DESCENDING)]),
+        ]
@@ -1,24 +1,27 @@
 from datetime import datetime
 from typing import Optional
 from beanie import Document, PydanticObjectId
+from pymongo import IndexModel, ASCENDING
 
 
 class Session(Document):
     user_id: PydanticObjectId
-    token: str
+    token: Optional[str] = None  # Access token (session mode only; stateless ones rotate)
     expires_at: datetime
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
     device_info: Optional[str] = None
     is_active: bool = True
+    refresh_jti: Optional[str] = None  # Current refresh token (stateless mode)
     last_activity: datetime = datetime.now()
     created_at: datetime = datetime.now()
 
     class Settings:
+        use_state_management = True
         name = "sessions"
         indexes = [
             "token",
             "user_id",
-            "expires_at",
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),  # MongoDB removes expired sessions
             "is_active",
         ]
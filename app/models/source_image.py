@@ -0,0 +1,28 @@
+from datetime import datetime
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+
+
+class SourceImage(Document):
+    """
+    A prepared (validated, downscaled) upload used as the source of
+    image-to-image generations and variations.
+
+    Stored once per uploaded content: `content_hash` is the SHA-256 of the
+    uploaded bytes, so uploading the same file again reuses this image
+    instead of processing and storing it again.
+    """
+    content_hash: str
+    square: bool = False  # Center-cropped to a square (variations)
+    url: str
+    width: int
+    height: int
+    bytes: int = 0
+    created_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "source_images"
+        indexes = [
+            IndexModel([("content_hash", ASCENDING), ("square", ASCENDING)], unique=True),
+        ]
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional
+from beanie import Document, PydanticObjectId
+from pymongo import IndexModel, ASCENDING
+
+
+class UsageBucket(Document):
+    """
+    Pre-aggregated usage of one hour, maintained with $inc.
+
+    Per-user buckets have `user_id` set (provider/model None); per-provider
+    buckets have `provider`/`model` set (user_id None). Sums are divided by
+    the counts when reported.
+    """
+    hour: datetime  # Start of the hour
+    user_id: Optional[PydanticObjectId] = None
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    generations: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    cache_hits: int = 0
+    queue_wait_ms: float = 0.0
+    inference_ms: float = 0.0
+    upload_ms: float = 0.0
+    bytes_stored: int = 0
+    estimated_cost_usd: float = 0.0
+
+    class Settings:
+        name = "usage_buckets"
+        indexes = [
+            IndexModel(
+                [("user_id", ASCENDING), ("provider", ASCENDING), ("model", ASCENDING), ("hour", ASCENDING)],
+                unique=True
+            ),
+        ]
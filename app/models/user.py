@@ -9,10 +9,13 @@ class User(Document):
     password: str
     name: str
     avatar: Optional[str] = None
+    plan: str = "free"  # free, pro
+    is_admin: bool = False
     created_at: datetime = datetime.now()
     updated_at: datetime = datetime.now()
 
     class Settings:
+        use_state_management = True
         name = "users"
         indexes = [
             "email",
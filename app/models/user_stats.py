@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional
+from beanie import Document, PydanticObjectId
+from pymongo import IndexModel, ASCENDING
+
+
+class UserStats(Document):
+    """Denormalized per-user generation counters, maintained with $inc"""
+    user_id: PydanticObjectId
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    bytes_stored: int = 0
+    last_generated_at: Optional[datetime] = None
+
+    class Settings:
+        name = "user_stats"
+        indexes = [
+            IndexModel([("user_id", ASCENDING)], unique=True),
+        ]
@@ -0,0 +1,77 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+
+
+class WebhookEvent(str, Enum):
+    GENERATION_COMPLETED = "generation.completed"
+    GENERATION_FAILED = "generation.failed"
+
+
+class DeliveryStatus(str, Enum):
+    PENDING = "pending"
+    DELIVERING = "delivering"
+
+
+class WebhookEndpoint(Document):
+    """A URL a user registered to receive generation events"""
+    user_id: PydanticObjectId
+    url: str
+    secret: str  # HMAC key for the X-Webhook-Signature header
+    events: List[WebhookEvent] = [WebhookEvent.GENERATION_COMPLETED, WebhookEvent.GENERATION_FAILED]
+    is_active: bool = True
+    created_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "webhook_endpoints"
+        indexes = [
+            "user_id",
+        ]
+
+
+class WebhookDelivery(Document):
+    """
+    Outbox entry for one event to one endpoint.
+
+    Deleted once delivered; moved to the dead letters after the last attempt.
+    """
+    endpoint_id: PydanticObjectId
+    user_id: PydanticObjectId
+    url: str
+    event: WebhookEvent
+    payload: Dict[str, Any]
+    status: DeliveryStatus = DeliveryStatus.PENDING
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=datetime.now)
+    lease_until: Optional[datetime] = None  # Claimed by a dispatcher until then
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "webhook_deliveries"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+            IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)]),
+        ]
+
+
+class WebhookDeadLetter(Document):
+    """A delivery that failed every attempt"""
+    endpoint_id: PydanticObjectId
+    user_id: PydanticObjectId
+    url: str
+    event: WebhookEvent
+    payload: Dict[str, Any]
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime  # When the event happened
+    failed_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "webhook_dead_letters"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("failed_at", ASCENDING)]),
+        ]
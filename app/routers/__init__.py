@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.routers import auth, generation, user
+from app.routers import admin, auth, generation, user, webhook
 
 router = APIRouter()
 
@@ -8,3 +8,5 @@ router = APIRouter()
 router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 router.include_router(generation.router, prefix="/generations", tags=["Generations"])
 router.include_router(user.router, prefix="/user", tags=["User"])
+router.include_router(webhook.router, prefix="/webhooks", tags=["Webhooks"])
+router.include_router(admin.router, prefix="/admin", tags=["Admin"])
@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.handlers import admin as admin_handler
+from app.middlewares.auth import require_admin
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.post("/profile")
+async def run_profile(
+    seconds: float = 10,
+    interval_ms: float = 5,
+    current_user: User = Depends(require_admin),
+):
+    """
+    Run the sampling profiler for N seconds and download the result.
+
+    The output is in folded-stack format (flamegraph.pl / speedscope).
+    """
+    return await admin_handler.run_profile(seconds, interval_ms)
+
+
+@router.get("/slow-requests")
+async def get_slow_requests(current_user: User = Depends(require_admin)):
+    """Get recent slow requests with per-stage timings"""
+    return await admin_handler.get_slow_requests()
+
+
+@router.get("/loop-lag")
+async def get_loop_lag(current_user: User = Depends(require_admin)):
+    """Get event-loop lag statistics"""
+    return await admin_handler.get_loop_lag()
+
+
+@router.get("/webhooks")
+async def get_webhook_metrics(current_user: User = Depends(require_admin)):
+    """Get webhook delivery counts, queue size and latency"""
+    return await admin_handler.get_webhook_metrics()
+
+
+@router.get("/hedging")
+async def get_hedging_stats(current_user: User = Depends(require_admin)):
+    """Get hedged provider call counts, win rates and current hedge delays"""
+    return await admin_handler.get_hedging_stats()
+
+
+@router.get("/usage/providers")
+async def get_provider_usage(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    granularity: str = "hour",
+    current_user: User = Depends(require_admin),
+):
+    """
+    Get generations, latency, cache hits and estimated cost per provider/model.
+
+    Read from hourly pre-aggregated buckets; the period defaults to the last
+    24 hours and `granularity` is "hour" or "day".
+    """
+    return await admin_handler.get_provider_usage(since, until, granularity)
+
+
+@router.get("/usage/users")
+async def get_top_users(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(require_admin),
+):
+    """Get the users with the highest estimated cost in the period"""
+    return await admin_handler.get_top_users(since, until, limit)
+
+
+@router.get("/usage/users/{user_id}")
+async def get_user_usage(
+    user_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    granularity: str = "hour",
+    current_user: User = Depends(require_admin),
+):
+    """Get one user's generations, latency, cache hits and estimated cost"""
+    return await admin_handler.get_user_usage(user_id, since, until, granularity)
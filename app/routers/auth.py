@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, Response, Request, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, Request, status
 
 from app.schemas.user import UserLogin, UserResponse
-from app.schemas.auth import TokenResponse
+from app.schemas.auth import TokenResponse, RefreshRequest
 from app.schemas.response import ApiResponse
 from app.handlers import auth as auth_handler
 from app.middlewares.auth import get_current_user, get_token
@@ -11,16 +12,8 @@ from app.core.config import settings
 router = APIRouter()
 
 
-@router.post("/login", response_model=ApiResponse[TokenResponse])
-async def login(data: UserLogin, response: Response, request: Request):
-    """
-    Login or register user (unified auth).
-
-    Sets the JWT token in an HttpOnly cookie for security.
-    Also returns the token in the response body for flexibility.
-    """
-    token_response = await auth_handler.login(data, request)
-
+def set_auth_cookies(response: Response, token_response: TokenResponse) -> None:
+    """Set the access token (and refresh token, if any) in HttpOnly cookies"""
     # Set token in HttpOnly cookie
     response.set_cookie(
         key="access_token",
@@ -28,10 +21,34 @@ async def login(data: UserLogin, response: Response, request: Request):
         httponly=True,  # Prevents JavaScript access (XSS protection)
         secure=settings.ENVIRONMENT == "production",  # Only HTTPS in production
         samesite="lax", # CSRF protection (use "strict" for more security)
-        max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,  # Cookie expiry in seconds
+        max_age=token_response.expires_in,  # Cookie expiry in seconds
         path="/",       # Cookie available for all routes
     )
 
+    if token_response.refresh_token:
+        # Only sent to the refresh endpoint
+        response.set_cookie(
+            key="refresh_token",
+            value=token_response.refresh_token,
+            httponly=True,
+            secure=settings.ENVIRONMENT == "production",
+            samesite="strict",
+            max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+            path="/api/auth/refresh",
+        )
+
+
+@router.post("/login", response_model=ApiResponse[TokenResponse])
+async def login(data: UserLogin, response: Response, request: Request):
+    """
+    Login or register user (unified auth).
+
+    Sets the JWT token in an HttpOnly cookie for security.
+    Also returns the token in the response body for flexibility.
+    """
+    token_response = await auth_handler.login(data, request)
+    set_auth_cookies(response, token_response)
+
     response.status_code = status.HTTP_200_OK
 
     return {
@@ -41,6 +58,28 @@ async def login(data: UserLogin, response: Response, request: Request):
     }
 
 
+@router.post("/refresh", response_model=ApiResponse[TokenResponse])
+async def refresh(response: Response, request: Request, data: Optional[RefreshRequest] = None):
+    """
+    Exchange a refresh token for a new access/refresh token pair (stateless auth mode).
+
+    The refresh token is read from the body or the refresh_token cookie.
+    Each refresh token can be used once; reusing one revokes the session.
+    """
+    refresh_token = (data.refresh_token if data else None) or request.cookies.get("refresh_token")
+    if not refresh_token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token required")
+
+    token_response = await auth_handler.refresh(refresh_token)
+    set_auth_cookies(response, token_response)
+
+    return {
+        "success": True,
+        "message": "Token refreshed successfully",
+        "data": token_response
+    }
+
+
 @router.post("/logout")
 async def logout(
     response: Response,
@@ -60,6 +99,13 @@ async def logout(
         secure=settings.ENVIRONMENT == "production",
         samesite="lax"
     )
+    response.delete_cookie(
+        key="refresh_token",
+        path="/api/auth/refresh",
+        httponly=True,
+        secure=settings.ENVIRONMENT == "production",
+        samesite="strict"
+    )
 
     return await auth_handler.logout(str(current_user.id), token)
 
@@ -1,10 +1,16 @@
-from typing import Dict, Any
-from fastapi import APIRouter, Depends, status
+from datetime import datetime
+from typing import Optional
 
-from app.schemas.generation import GenerationCreate
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.schemas.generation import GenerationCreate, VARIATION_SIZES
+from app.models.generation import GenerationMode, GenerationPriority, GenerationStatus
+from app.core.config import settings
 from app.handlers import generation as generation_handler
 from app.middlewares.auth import get_current_user
 from app.models.user import User
+from app.core.responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -12,37 +18,154 @@ router = APIRouter()
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_generation(
     data: GenerationCreate,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+) -> FastJSONResponse:
+    """
+    Create new image generation.
+
+    An optional X-Request-Timeout header (seconds) bounds how long the
+    server works on the request; abandoned requests are cancelled.
+    """
+    result = await generation_handler.create_generation(
+        str(current_user.id), data, current_user.plan, request
+    )
+    return FastJSONResponse(result, status_code=status.HTTP_201_CREATED)
+
+
+# Multipart bodies are parsed by the handler (streamed, size-limited), so
+# the form is only described for the API docs
+def _upload_body(fields: dict, required: list) -> dict:
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"image": {"type": "string", "format": "binary"}, **fields},
+        "required": ["image", *required],
+    }}}}}
+
+
+@router.post(
+    "/image-to-image",
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_upload_body({
+        "prompt": {"type": "string"},
+        "strength": {"type": "number", "minimum": 0, "maximum": 1, "default": 0.75},
+        "priority": {"type": "string", "enum": [lane.value for lane in GenerationPriority]},
+    }, ["prompt"]),
+)
+async def create_image_to_image(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+) -> FastJSONResponse:
+    """
+    Create a generation from an uploaded image (PNG, JPEG or WebP) and a prompt.
+
+    `strength` sets how far the result may move away from the source.
+    """
+    result = await generation_handler.create_from_image(
+        str(current_user.id), GenerationMode.IMAGE_TO_IMAGE, request, current_user.plan
+    )
+    return FastJSONResponse(result, status_code=status.HTTP_201_CREATED)
+
+
+@router.post(
+    "/variations",
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_upload_body({
+        "size": {"type": "integer", "enum": list(VARIATION_SIZES), "default": 512},
+        "priority": {"type": "string", "enum": [lane.value for lane in GenerationPriority]},
+    }, []),
+)
+async def create_variation(
+    request: Request,
     current_user: User = Depends(get_current_user),
-) -> Dict[str, Any]:
-    """Create new image generation"""
-    return await generation_handler.create_generation(str(current_user.id), data)
+) -> FastJSONResponse:
+    """Create a variation of an uploaded image (center-cropped to a square)"""
+    result = await generation_handler.create_from_image(
+        str(current_user.id), GenerationMode.VARIATION, request, current_user.plan
+    )
+    return FastJSONResponse(result, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/")
-async def get_generations(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
-    """Get all generations for current user"""
-    return await generation_handler.get_generations(str(current_user.id))
+async def get_generations(
+    limit: Optional[int] = Query(None, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE),
+    before: Optional[datetime] = Query(None, description="created_at of the last item of the previous page"),
+    current_user: User = Depends(get_current_user),
+) -> FastJSONResponse:
+    """
+    Get generations for current user, newest first.
+
+    Without `limit` the whole history is returned; with it, pass the
+    created_at of the last item as `before` to get the next page.
+    """
+    return FastJSONResponse(await generation_handler.get_generations(str(current_user.id), limit, before))
+
+
+@router.get("/search")
+async def search_generations(
+    q: Optional[str] = Query(None, max_length=200, description="Text to search for in prompts"),
+    generation_status: Optional[GenerationStatus] = Query(None, alias="status"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    width: Optional[int] = Query(None, gt=0),
+    height: Optional[int] = Query(None, gt=0),
+    page: int = Query(1, ge=1, description="Page of text search results (with q only)"),
+    limit: int = Query(20, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE),
+    before: Optional[datetime] = Query(None, description="next_before of the previous page (without q)"),
+    before_id: Optional[str] = Query(None, description="next_before_id of the previous page (without q)"),
+    current_user: User = Depends(get_current_user),
+) -> FastJSONResponse:
+    """
+    Search generation history.
+
+    Text search over prompts (ranked by relevance, paginated with `page`)
+    with optional filters on status, creation date range and image
+    dimensions. Without `q` results are newest first; pass the previous
+    page's next_before/next_before_id as `before`/`before_id`.
+    """
+    return FastJSONResponse(await generation_handler.search_generations(
+        str(current_user.id), q, generation_status, created_after, created_before, width, height, page, limit,
+        before, before_id
+    ))
+
+
+@router.get("/export")
+async def export_generations(current_user: User = Depends(get_current_user)) -> StreamingResponse:
+    """
+    Download the whole history as a ZIP.
+
+    Contains every image under images/ and a manifest.json with the prompt,
+    settings and status of each generation. The archive is streamed while
+    it is built, so the download starts immediately.
+    """
+    return generation_handler.export_generations(str(current_user.id))
+
+
+@router.get("/queue")
+async def get_queue_stats(current_user: User = Depends(get_current_user)) -> FastJSONResponse:
+    """Get generation queue depth and wait time per priority lane"""
+    return FastJSONResponse(await generation_handler.get_queue_stats())
 
 
 @router.get("/{generation_id}")
 async def get_generation(
     generation_id: str,
     current_user: User = Depends(get_current_user),
-) -> Dict[str, Any]:
+) -> FastJSONResponse:
     """Get single generation by ID"""
-    return await generation_handler.get_generation(str(current_user.id), generation_id)
+    return FastJSONResponse(await generation_handler.get_generation(str(current_user.id), generation_id))
 
 
 @router.delete("/{generation_id}")
 async def delete_generation(
     generation_id: str,
     current_user: User = Depends(get_current_user),
-) -> Dict[str, Any]:
+) -> FastJSONResponse:
     """Delete a generation"""
-    return await generation_handler.delete_generation(str(current_user.id), generation_id)
+    return FastJSONResponse(await generation_handler.delete_generation(str(current_user.id), generation_id))
 
 
 @router.delete("/")
-async def clear_history(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+async def clear_history(current_user: User = Depends(get_current_user)) -> FastJSONResponse:
     """Clear all generations for current user"""
-    return await generation_handler.clear_history(str(current_user.id))
+    return FastJSONResponse(await generation_handler.clear_history(str(current_user.id)))
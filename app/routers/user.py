@@ -2,13 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List
 from beanie import PydanticObjectId
 
-from app.schemas.user import UserResponse, ProfileResponse
+from app.schemas.user import UserResponse, ProfileResponse, UserStatsResponse
 from app.schemas.session import SessionResponse
 from app.handlers import user as user_handler
 from app.middlewares.auth import get_current_user, get_token
 from app.models.user import User
 from app.models.session import Session
 from app.schemas.response import ApiResponse
+from app.core.database import get_collection, history_read_preference, read_session
+from app.core.tokens import session_filter
 
 router = APIRouter()
 
@@ -34,13 +36,21 @@ async def update_profile(
     return await user_handler.update_profile(str(current_user.id), data, request, response)
 
 
+@router.get("/me/stats", response_model=ApiResponse[UserStatsResponse])
+async def get_stats(current_user: User = Depends(get_current_user)):
+    """Get generation counters for the current user"""
+    return await user_handler.get_stats(str(current_user.id))
+
+
 @router.get("/sessions", response_model=List[SessionResponse])
 async def get_active_sessions(current_user: User = Depends(get_current_user)):
     """Get all active sessions for the current user"""
-    sessions = await Session.find(
-        Session.user_id == current_user.id,
-        Session.is_active == True
-    ).to_list()
+    async with read_session(str(current_user.id)) as db_session:
+        cursor = get_collection(Session, history_read_preference()).find(
+            {"user_id": current_user.id, "is_active": True},
+            session=db_session
+        )
+        sessions = [Session.model_validate(doc) for doc in await cursor.to_list(length=None)]
 
     return [
         SessionResponse(
@@ -71,7 +81,7 @@ async def revoke_session(
         raise HTTPException(status_code=404, detail="Session not found")
 
     session.is_active = False
-    await session.save()
+    await session.save_changes()
 
     return {"message": "Session revoked successfully"}
 
@@ -82,14 +92,10 @@ async def revoke_all_sessions(
     token: str = Depends(get_token)
 ):
     """Revoke all sessions except the current one"""
-    sessions = await Session.find(
+    result = await Session.find(
         Session.user_id == current_user.id,
         Session.is_active == True,
-        Session.token != token
-    ).to_list()
-
-    for session in sessions:
-        session.is_active = False
-        await session.save()
+        {"$nor": [session_filter(token)]}
+    ).update({"$set": {Session.is_active: False}})
 
-    return {"message": f"Revoked {len(sessions)} sessions"}
+    return {"message": f"Revoked {result.modified_count} sessions"}
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from app.schemas.webhook import WebhookCreate
+from app.handlers import webhook as webhook_handler
+from app.middlewares.auth import get_current_user
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def create_webhook(data: WebhookCreate, current_user: User = Depends(get_current_user)):
+    """
+    Register a webhook endpoint for generation events.
+
+    Deliveries are signed: X-Webhook-Signature is "t=<unix time>,v1=<hex>",
+    where v1 is HMAC-SHA256(secret, "<t>.<raw body>"). The secret is only
+    returned in this response.
+    """
+    return await webhook_handler.create_webhook(str(current_user.id), data)
+
+
+@router.get("/")
+async def list_webhooks(current_user: User = Depends(get_current_user)):
+    """List registered webhook endpoints"""
+    return await webhook_handler.list_webhooks(str(current_user.id))
+
+
+@router.get("/dead-letters")
+async def list_dead_letters(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+):
+    """Deliveries that failed every retry"""
+    return await webhook_handler.list_dead_letters(str(current_user.id), limit)
+
+
+@router.post("/dead-letters/{dead_letter_id}/retry")
+async def retry_dead_letter(dead_letter_id: str, current_user: User = Depends(get_current_user)):
+    """Queue a failed delivery again"""
+    return await webhook_handler.retry_dead_letter(str(current_user.id), dead_letter_id)
+
+
+@router.delete("/{webhook_id}")
+async def delete_webhook(webhook_id: str, current_user: User = Depends(get_current_user)):
+    """Delete a webhook endpoint"""
+    return await webhook_handler.delete_webhook(str(current_user.id), webhook_id)
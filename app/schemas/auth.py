@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 from app.schemas.user import UserResponse
@@ -6,4 +7,10 @@ from app.schemas.user import UserResponse
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
-    user: UserResponse
\ No newline at end of file
+    expires_in: Optional[int] = None  # Access token lifetime in seconds
+    refresh_token: Optional[str] = None  # Only in stateless auth mode
+    user: UserResponse
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: Optional[str] = None  # Falls back to the refresh_token cookie
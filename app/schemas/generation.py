@@ -1,13 +1,45 @@
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, field_validator
 
-from app.models.generation import GenerationStatus, GenerationSettings
+from app.core.config import settings as app_settings
+from app.models.generation import (
+    GenerationStatus,
+    GenerationSettings,
+    GenerationPriority,
+    GenerationMode,
+    ImageVariant,
+    QualityTier,
+)
+
+# Output sizes supported for variations
+VARIATION_SIZES = (256, 512, 1024)
 
 
 class GenerationCreate(BaseModel):
-    prompt: str
+    prompt: str = Field(max_length=app_settings.PROMPT_MAX_LENGTH)
     settings: Optional[GenerationSettings] = None
+    priority: Optional[GenerationPriority] = None  # Derived from size/plan when omitted
+
+
+class ImageToImageForm(BaseModel):
+    """Form fields sent with an image-to-image upload"""
+    prompt: str = Field(max_length=app_settings.PROMPT_MAX_LENGTH)
+    strength: float = Field(0.75, ge=0.0, le=1.0)
+    priority: Optional[GenerationPriority] = None
+
+
+class VariationForm(BaseModel):
+    """Form fields sent with a variation upload"""
+    size: int = 512  # Output is size x size
+    priority: Optional[GenerationPriority] = None
+
+    @field_validator("size")
+    @classmethod
+    def supported_size(cls, value: int) -> int:
+        if value not in VARIATION_SIZES:
+            raise ValueError(f"size must be one of {', '.join(map(str, VARIATION_SIZES))}")
+        return value
 
 
 class GenerationResponse(BaseModel):
@@ -15,9 +47,60 @@ class GenerationResponse(BaseModel):
     user_id: str
     prompt: str
     image_url: str
+    thumbnail_url: Optional[str] = None
+    variants: Optional[List[ImageVariant]] = None
     status: GenerationStatus
     settings: GenerationSettings
+    priority: GenerationPriority = GenerationPriority.STANDARD
+    mode: GenerationMode = GenerationMode.TEXT_TO_IMAGE
+    quality_tier: QualityTier = QualityTier.FULL
+    source_image_url: Optional[str] = None
+    reused_from: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class LaneStats(BaseModel):
+    lane: GenerationPriority
+    weight: int
+    queue_depth: int
+    oldest_wait_seconds: float
+    avg_wait_seconds: float
+    max_wait_seconds: float
+    served: int
+
+
+class QueueStatsResponse(BaseModel):
+    active: int
+    max_concurrency: int
+    lanes: List[LaneStats]
+    quality_tier: QualityTier = QualityTier.FULL  # Tier the load policy currently applies
+    inference_latency_p90_seconds: Optional[float] = None
+
+
+class HedgingStatsResponse(BaseModel):
+    enabled: bool
+    alternate_provider: Optional[str] = None
+    calls: int
+    hedged: int
+    hedge_rate: float
+    hedge_wins: int  # Hedges where the alternate provider answered first
+    hedge_win_rate: float
+    budget_denied: int  # Slow calls not hedged because the budget was used up
+    budget_percent: float
+    excluded_models: Dict[str, str] = {}  # Models the alternate provider doesn't serve -> error
+    hedge_delay_seconds: Dict[str, float]  # Current hedge delay per model:tier
+
+
+class GeneratedImage(BaseModel):
+    """Result of a provider generation after the image has been stored"""
+    url: str
+    bytes: int = 0  # Original plus all variants
+    variants: List[ImageVariant] = []
+    provider: str = ""  # Provider and model that produced the image
+    model: str = ""
+    quality_tier: QualityTier = QualityTier.FULL
+    width: int = 0  # Size actually generated (0 if not reported)
+    height: int = 0
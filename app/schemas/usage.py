@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import List
+from pydantic import BaseModel
+
+
+class UsageSummary(BaseModel):
+    generations: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    cache_hits: int = 0
+    cache_hit_rate: float = 0.0
+    # Averages over provider calls (generations that were not cache hits)
+    avg_queue_wait_ms: float = 0.0
+    avg_inference_ms: float = 0.0
+    avg_upload_ms: float = 0.0
+    bytes_stored: int = 0
+    estimated_cost_usd: float = 0.0
+
+
+class UsagePeriod(UsageSummary):
+    period: datetime  # Start of the hour or day
+
+
+class UsageReport(BaseModel):
+    since: datetime
+    until: datetime
+    granularity: str
+    totals: UsageSummary
+    series: List[UsagePeriod]
+
+
+class ProviderUsage(BaseModel):
+    provider: str
+    model: str
+    totals: UsageSummary
+    series: List[UsagePeriod]
+
+
+class ProviderUsageReport(BaseModel):
+    since: datetime
+    until: datetime
+    granularity: str
+    providers: List[ProviderUsage]
+
+
+class UserUsage(UsageSummary):
+    user_id: str
+
+
+class TopUsersReport(BaseModel):
+    since: datetime
+    until: datetime
+    users: List[UserUsage]
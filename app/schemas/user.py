@@ -26,4 +26,13 @@ class UserResponse(BaseModel):
 
 class ProfileResponse(BaseModel):
     user:UserResponse
-    session:SessionResponse
\ No newline at end of file
+    session:SessionResponse
+
+class UserStatsResponse(BaseModel):
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    processing: int = 0
+    bytes_stored: int = 0
+    last_generated_at: Optional[datetime] = None
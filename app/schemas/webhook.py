@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, HttpUrl
+
+from app.models.webhook import WebhookEvent
+
+
+class WebhookCreate(BaseModel):
+    url: HttpUrl
+    events: List[WebhookEvent] = [WebhookEvent.GENERATION_COMPLETED, WebhookEvent.GENERATION_FAILED]
+
+
+class WebhookResponse(BaseModel):
+    id: str
+    url: str
+    events: List[WebhookEvent]
+    is_active: bool
+    secret: Optional[str] = None  # Only returned when the endpoint is created
+    created_at: datetime
+
+
+class DeadLetterResponse(BaseModel):
+    id: str
+    endpoint_id: str
+    url: str
+    event: WebhookEvent
+    payload: Dict[str, Any]
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    failed_at: datetime
+
+
+class WebhookMetricsResponse(BaseModel):
+    delivered: int
+    failed_attempts: int
+    dead_lettered: int
+    in_flight: int
+    pending: int
+    latency_p50_ms: float
+    latency_p95_ms: float
+    delivery_delay_p95_ms: float  # Event time to successful delivery, including retries
@@ -1,5 +1,6 @@
 from .openai_service import OpenAIService
 from .huggingface_service import HuggingFaceService
 from .cloudinary_service import CloudinaryService
+from .stats_service import StatsService
 
-__all__ = ["OpenAIService", "HuggingFaceService", "CloudinaryService"]
+__all__ = ["OpenAIService", "HuggingFaceService", "CloudinaryService", "StatsService"]
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from beanie import PydanticObjectId
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.database import get_collection
+from app.models.session import Session
+
+
+class ActivityTracker:
+    """
+    Records session activity in memory and flushes it to MongoDB in
+    periodic bulk writes.
+
+    Many touches of the same session within one interval collapse into a
+    single update, so accurate last_activity costs about one write per
+    active session per interval instead of one per request.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        # (field, value) identifying the session -> latest activity time
+        self._pending: Dict[Tuple[str, object], datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def touch(self, session_id: Optional[str] = None, token: Optional[str] = None) -> None:
+        """Record activity for a session, identified by id or (for older tokens) by token"""
+        if session_id and PydanticObjectId.is_valid(session_id):
+            key = ("_id", PydanticObjectId(session_id))
+        elif token:
+            key = ("token", token)
+        else:
+            return
+        self._pending[key] = datetime.now()
+
+    async def flush(self) -> int:
+        """
+        Write all pending activity in one bulk_write
+
+        Returns:
+            int: Number of sessions updated
+        """
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        operations = [
+            # $max so a delayed flush never moves last_activity backwards
+            UpdateOne({field: value}, {"$max": {"last_activity": last_activity}})
+            for (field, value), last_activity in pending.items()
+        ]
+
+        try:
+            result = await get_collection(Session).bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Keep the touches for the next attempt (newer touches win)
+            for key, last_activity in pending.items():
+                self._pending.setdefault(key, last_activity)
+            print(f"⚠️  Failed to flush session activity: {e}")
+            return 0
+
+        return result.modified_count
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+# Create a singleton instance of ActivityTracker
+activity_tracker = ActivityTracker(settings.ACTIVITY_FLUSH_INTERVAL_SECONDS)
@@ -0,0 +1,214 @@
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import bson
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.database import get_collection
+from app.models.generation import Generation, GenerationStatus
+from app.models.generation_archive import GenerationArchive
+from app.services.similarity_service import similarity_service
+
+
+# Fields a stub keeps: enough for ownership checks, ordering and per-user stats
+STUB_FIELDS = {"_id", "id", "user_id", "status", "image_bytes", "created_at", "archived", "archive_id"}
+
+# Only finished generations are archived
+ARCHIVABLE_STATUSES = [
+    GenerationStatus.COMPLETED.value,
+    GenerationStatus.FAILED.value,
+    GenerationStatus.CANCELLED.value,
+]
+
+
+def _compress(documents: List[Dict[str, Any]]) -> bytes:
+    return zlib.compress(b"".join(bson.encode(doc) for doc in documents), 9)
+
+
+def _decompress(data: bytes) -> List[Dict[str, Any]]:
+    return bson.decode_all(zlib.decompress(data))
+
+
+class ArchiveService:
+    """
+    Moves old generations out of the hot collection.
+
+    Full documents are packed, per user and in created_at order, into
+    zlib-compressed BSON bundles in generation_archives; each one leaves a
+    slim stub (ids, status, size, date) so ownership checks and stats keep
+    working. Reads through get_archived()/archived_history() make archived
+    generations look like any other.
+    """
+
+    async def archive(self, older_than_days: Optional[int] = None, limit: Optional[int] = None) -> int:
+        """
+        Archive finished generations older than `older_than_days`
+
+        Generations are streamed per user in created_at order and written
+        out one bundle at a time, so only a single bundle is held in memory.
+        Bundles are written before the originals are replaced by stubs; an
+        interrupted run leaves at worst a bundle whose stubs don't point at
+        it, which readers ignore and the next run re-archives.
+
+        Returns:
+            int: Number of generations archived
+        """
+        days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        cutoff = datetime.now() - timedelta(days=days)
+        collection = get_collection(Generation)
+
+        cursor = collection.find({
+            "created_at": {"$lt": cutoff},
+            "status": {"$in": ARCHIVABLE_STATUSES},
+            "archived": {"$ne": True},
+        }).sort([("user_id", 1), ("created_at", 1)])
+        if limit:
+            cursor = cursor.limit(limit)
+
+        archived = 0
+        bundle: List[Dict[str, Any]] = []
+        async for doc in cursor:
+            if bundle and (doc["user_id"] != bundle[0]["user_id"] or len(bundle) >= settings.ARCHIVE_BUNDLE_SIZE):
+                archived += await self._write_bundle(bundle)
+                bundle = []
+            bundle.append(doc)
+        if bundle:
+            archived += await self._write_bundle(bundle)
+
+        return archived
+
+    async def _write_bundle(self, bundle: List[Dict[str, Any]]) -> int:
+        """Store one user's generations as a bundle and replace them with stubs"""
+        archive = GenerationArchive(
+            user_id=bundle[0]["user_id"],
+            generation_count=len(bundle),
+            first_created_at=bundle[0]["created_at"],
+            last_created_at=bundle[-1]["created_at"],
+            data=_compress(bundle)
+        )
+        await archive.insert()
+
+        ids = [doc["_id"] for doc in bundle]
+        unset = {name: "" for name in Generation.model_fields if name not in STUB_FIELDS}
+        await get_collection(Generation).update_many(
+            {"_id": {"$in": ids}, "archived": {"$ne": True}},
+            {"$set": {"archived": True, "archive_id": archive.id}, "$unset": unset}
+        )
+        await similarity_service.remove(ids)
+        return len(bundle)
+
+    @staticmethod
+    async def _live(archive_id: Any, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        The bundle's documents whose stubs still point at it; skips deleted
+        generations and leftovers of interrupted archive runs
+        """
+        cursor = get_collection(Generation).find(
+            {"_id": {"$in": [doc["_id"] for doc in documents]}, "archive_id": archive_id},
+            {"_id": 1}
+        )
+        live = {stub["_id"] async for stub in cursor}
+        return [doc for doc in documents if doc["_id"] in live]
+
+    async def get_archived(self, stub: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Full document for an archived generation's stub"""
+        archive = await GenerationArchive.get(stub["archive_id"])
+        if archive is None:
+            return None
+        for doc in _decompress(archive.data):
+            if doc["_id"] == stub["_id"]:
+                return doc
+        return None
+
+    async def archived_history(
+        self,
+        user_id: PydanticObjectId,
+        before: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        A user's archived generations, newest first, created before `before`
+
+        Only as many bundles as needed to fill `limit` are decompressed.
+        """
+        query: Dict[str, Any] = {"user_id": user_id}
+        if before is not None:
+            query["first_created_at"] = {"$lt": before}
+        cursor = get_collection(GenerationArchive).find(query).sort("last_created_at", -1)
+
+        documents: List[Dict[str, Any]] = []
+        seen = set()
+        async for archive in cursor:
+            # Bundles come newest first; once `limit` documents newer than
+            # everything in the next bundle are collected, stop decompressing
+            if (
+                limit is not None
+                and len(documents) >= limit
+                and archive["last_created_at"] < documents[limit - 1]["created_at"]
+            ):
+                break
+            for doc in await self._live(archive["_id"], _decompress(archive["data"])):
+                if doc["_id"] in seen or (before is not None and doc["created_at"] >= before):
+                    continue
+                seen.add(doc["_id"])
+                documents.append(doc)
+            documents.sort(key=lambda doc: doc["created_at"], reverse=True)
+
+        return documents[:limit] if limit is not None else documents
+
+    async def iter_archived(self, user_id: PydanticObjectId) -> AsyncIterator[Dict[str, Any]]:
+        """All of a user's archived generations, decompressing one bundle at a time"""
+        cursor = get_collection(GenerationArchive).find({"user_id": user_id}).sort("last_created_at", -1)
+        seen = set()
+        async for archive in cursor:
+            for doc in await self._live(archive["_id"], _decompress(archive["data"])):
+                if doc["_id"] not in seen:
+                    seen.add(doc["_id"])
+                    yield doc
+
+    async def remove(self, stub: Dict[str, Any]) -> None:
+        """Drop an archived generation from its bundle"""
+        archive = await GenerationArchive.get(stub["archive_id"])
+        if archive is None:
+            return
+        remaining = [doc for doc in _decompress(archive.data) if doc["_id"] != stub["_id"]]
+        collection = get_collection(GenerationArchive)
+        if not remaining:
+            await collection.delete_one({"_id": archive.id})
+            return
+        await collection.update_one(
+            {"_id": archive.id},
+            {"$set": {
+                "generation_count": len(remaining),
+                "first_created_at": remaining[0]["created_at"],
+                "last_created_at": remaining[-1]["created_at"],
+                "data": _compress(remaining),
+            }}
+        )
+
+    async def clear(self, user_id: PydanticObjectId) -> int:
+        """Delete all of a user's archive bundles"""
+        result = await get_collection(GenerationArchive).delete_many({"user_id": user_id})
+        return result.deleted_count
+
+
+# Create a singleton instance of ArchiveService
+archive_service = ArchiveService()
+
+
+if __name__ == "__main__":
+    # Archival job: python -m app.services.archive_service [older-than-days]
+    import asyncio
+    import sys
+    from app.core.database import init_db, close_db
+
+    async def main():
+        await init_db()
+        days = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        archived = await archive_service.archive(days)
+        print(f"Archived {archived} generations")
+        await close_db()
+
+    asyncio.run(main())
@@ -2,6 +2,11 @@
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.utils
+
+# Import socket and urlsplit for resolving the upload host during warm-up
+import socket
+from urllib.parse import urlsplit
 
 # Import base64 for decoding base64 images
 import base64
@@ -90,7 +95,7 @@ class CloudinaryService:
         except Exception as e:
             raise Exception(f"Failed to upload file to Cloudinary: {str(e)}")
 
-    def upload_bytes_image(self, image_bytes: bytes, folder: str = "ai-generated", public_id: str = None) -> str:
+    def upload_bytes_image(self, image_bytes: bytes, folder: str = "ai-generated", public_id: str = None, timeout: float = None) -> str:
         """
         Upload image bytes to Cloudinary and return the URL
 
@@ -98,6 +103,7 @@ class CloudinaryService:
             image_bytes: Raw image bytes
             folder: Cloudinary folder to store the image in (default: "ai-generated")
             public_id: Optional custom public ID for the image
+            timeout: Optional HTTP timeout in seconds (e.g. the request's remaining deadline)
 
         Returns:
             str: Public URL of the uploaded image
@@ -110,13 +116,17 @@ class CloudinaryService:
             image_buffer = BytesIO(image_bytes)
 
             # Upload the image bytes to Cloudinary
+            options = {}
+            if timeout is not None:
+                options["timeout"] = timeout
             upload_result = cloudinary.uploader.upload(
                 image_buffer,
                 folder=folder,
                 resource_type="image",
                 public_id=public_id,
                 overwrite=True,
-                invalidate=True
+                invalidate=True,
+                **options
             )
 
             # Return the secure URL of the uploaded image
@@ -125,6 +135,23 @@ class CloudinaryService:
         except Exception as e:
             raise Exception(f"Failed to upload bytes to Cloudinary: {str(e)}")
 
+    def warm_up(self, timeout: float = None) -> None:
+        """
+        Open an upload connection ahead of the first upload (DNS lookup,
+        TCP and TLS handshake)
+
+        Sends a HEAD request to the upload endpoint through the uploader's
+        own connection pool, which keeps the connection for the next upload.
+        The response status doesn't matter, and no credentials are checked.
+        If the SDK doesn't expose that pool, only the host name is resolved.
+        """
+        url = cloudinary.utils.cloudinary_api_url("upload")
+        http = getattr(cloudinary.uploader, "_http", None)
+        if http is not None and hasattr(http, "request"):
+            http.request("HEAD", url, timeout=timeout, retries=False)
+        else:
+            socket.getaddrinfo(urlsplit(url).hostname, 443, type=socket.SOCK_STREAM)
+
     def delete_image(self, public_id: str) -> bool:
         """
         Delete an image from Cloudinary by public ID
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+import httpx
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.database import get_collection
+from app.models.generation import Generation, GenerationMode, GenerationStatus, QualityTier
+from app.services.archive_service import archive_service
+
+
+EXPORT_PROJECTION = {
+    "prompt": 1,
+    "image_url": 1,
+    "status": 1,
+    "settings": 1,
+    "priority": 1,
+    "mode": 1,
+    "quality_tier": 1,
+    "source_image_url": 1,
+    "created_at": 1,
+}
+
+_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp", "image/gif": "gif"}
+
+
+class _StreamBuffer:
+    """Write-only, unseekable file for ZipFile; the stream drains it after every entry"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _extension(content_type: str, url: str) -> str:
+    extension = _EXTENSIONS.get(content_type.split(";")[0].strip())
+    if extension:
+        return extension
+    suffix = os.path.splitext(url.split("?")[0])[1].lstrip(".").lower()
+    return suffix if suffix in _EXTENSIONS.values() else "png"
+
+
+class ExportService:
+    """
+    Streams a user's generations as a ZIP built on the fly.
+
+    Generations are read with a cursor (then from the archive), images are
+    fetched by a bounded pool of tasks sharing one HTTP client, and each
+    image is written to the ZIP and sent as soon as it arrives. Fetched
+    images wait in a bounded queue, so a slow client stops the fetchers and
+    the cursor instead of growing memory. Manifest entries are spooled
+    (to disk past 1 MB) and written as manifest.json at the end.
+    """
+
+    async def _documents(self, user_id: PydanticObjectId) -> AsyncIterator[Dict[str, Any]]:
+        cursor = get_collection(Generation).find(
+            {"user_id": user_id, "archived": {"$ne": True}},
+            EXPORT_PROJECTION
+        ).sort("created_at", -1)
+        async for doc in cursor:
+            yield doc
+        async for doc in archive_service.iter_archived(user_id):
+            yield doc
+
+    @staticmethod
+    def _manifest_entry(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": str(doc["_id"]),
+            "prompt": doc.get("prompt"),
+            "status": doc.get("status"),
+            "settings": doc.get("settings"),
+            "priority": doc.get("priority"),
+            "mode": doc.get("mode", GenerationMode.TEXT_TO_IMAGE.value),
+            "quality_tier": doc.get("quality_tier", QualityTier.FULL.value),
+            "source_image_url": doc.get("source_image_url"),
+            "image_url": doc.get("image_url") or None,
+            "created_at": doc["created_at"].isoformat() if doc.get("created_at") else None,
+            "file": None,
+        }
+
+    async def _fetch(self, client: httpx.AsyncClient, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Download one image; returns the manifest entry plus the bytes (or the error)"""
+        entry = self._manifest_entry(doc)
+        try:
+            response = await client.get(doc["image_url"])
+            if response.status_code != 200:
+                raise Exception(f"HTTP {response.status_code}")
+            created_at = doc.get("created_at") or datetime.now()
+            extension = _extension(response.headers.get("content-type", ""), doc["image_url"])
+            entry["file"] = f"images/{created_at:%Y%m%d-%H%M%S}_{entry['id']}.{extension}"
+            return {"entry": entry, "content": response.content}
+        except Exception as e:
+            entry["error"] = f"Failed to fetch image: {str(e) or type(e).__name__}"
+            return {"entry": entry, "content": None}
+
+    async def _produce(self, user_id: PydanticObjectId, results: asyncio.Queue) -> None:
+        """
+        Feed fetch results (and image-less entries) into `results`, then
+        None - or the exception if reading the generations failed
+        """
+        slots = asyncio.Semaphore(settings.EXPORT_CONCURRENCY)
+        tasks = set()
+
+        async def fetch(client: httpx.AsyncClient, doc: Dict[str, Any]) -> None:
+            try:
+                await results.put(await self._fetch(client, doc))
+            finally:
+                slots.release()
+
+        limits = httpx.Limits(max_connections=settings.EXPORT_CONCURRENCY)
+        try:
+            async with httpx.AsyncClient(timeout=settings.EXPORT_FETCH_TIMEOUT_SECONDS, limits=limits) as client:
+                try:
+                    async for doc in self._documents(user_id):
+                        if doc.get("status") != GenerationStatus.COMPLETED.value or not doc.get("image_url"):
+                            await results.put({"entry": self._manifest_entry(doc), "content": None})
+                            continue
+                        await slots.acquire()  # Blocks while the pool is busy
+                        task = asyncio.create_task(fetch(client, doc))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    if tasks:
+                        await asyncio.gather(*tasks)
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+        except Exception as e:
+            # Hand the error to the stream, which would otherwise wait for the end marker
+            await results.put(e)
+            raise
+        await results.put(None)
+
+    async def stream(self, user_id: str) -> AsyncIterator[bytes]:
+        """Yield the ZIP archive in chunks"""
+        results: asyncio.Queue = asyncio.Queue(maxsize=settings.EXPORT_BUFFERED_IMAGES)
+        producer = asyncio.create_task(self._produce(PydanticObjectId(user_id), results))
+
+        buffer = _StreamBuffer()
+        archive = zipfile.ZipFile(buffer, mode="w")
+        manifest = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+b")
+        entries = 0
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                if isinstance(result, Exception):
+                    # Cut the response off: a truncated ZIP rather than a stalled download
+                    raise result
+
+                if result["content"] is not None:
+                    info = zipfile.ZipInfo(result["entry"]["file"], date_time=datetime.now().timetuple()[:6])
+                    # Images are already compressed
+                    archive.writestr(info, result["content"], compress_type=zipfile.ZIP_STORED)
+
+                manifest.write(b",\n" if entries else b"[\n")
+                manifest.write(json.dumps(result["entry"], default=str).encode())
+                entries += 1
+
+                chunk = buffer.drain()
+                if chunk:
+                    yield chunk
+
+            await producer
+
+            manifest.write(b"\n]\n" if entries else b"[]\n")
+            manifest.seek(0)
+            info = zipfile.ZipInfo("manifest.json", date_time=datetime.now().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, mode="w") as manifest_file:
+                while True:
+                    block = manifest.read(64 * 1024)
+                    if not block:
+                        break
+                    manifest_file.write(block)
+                    chunk = buffer.drain()
+                    if chunk:
+                        yield chunk
+            archive.close()
+            yield buffer.drain()
+
+        finally:
+            # Client went away or something failed: stop fetching
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            manifest.close()
+
+
+# Create a singleton instance of ExportService
+export_service = ExportService()
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.services.load_policy import RollingLatency
+
+T = TypeVar("T")
+
+
+class HedgedCalls:
+    """
+    Hedged provider calls for tail latency.
+
+    A call that has not returned by the rolling p90 latency of its kind
+    (HEDGE_MIN_DELAY_SECONDS at the earliest) is sent again to an alternate
+    endpoint; whichever succeeds first is used and the other is cancelled.
+    Hedges are capped at HEDGE_BUDGET_PERCENT of the recent calls, so a
+    provider that is slow across the board is not sent double the traffic.
+
+    Provider clients are synchronous and run in worker threads, so a
+    cancelled call stops being awaited but its thread runs to completion
+    in the background and the result is discarded.
+
+    Models the alternate endpoint turned out not to serve are excluded from
+    hedging (see exclude()).
+    """
+
+    def __init__(self):
+        self._latencies: Dict[str, RollingLatency] = {}
+        self._recent: Deque[bool] = deque(maxlen=settings.HEDGE_LATENCY_WINDOW)  # Hedged or not, per call
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0  # Alternate finished first
+        self.budget_denied = 0  # Would have hedged, but the budget was used up
+        self.excluded: Dict[str, str] = {}  # Model -> error from the alternate endpoint
+
+    def accepts(self, model: str) -> bool:
+        """Whether calls for `model` may be hedged"""
+        return model not in self.excluded
+
+    def exclude(self, model: str, error: str) -> None:
+        """Stop hedging `model` (the alternate endpoint doesn't serve it)"""
+        if model not in self.excluded:
+            self.excluded[model] = error
+            print(f"⚠️  Hedging disabled for {model}: {error}")
+
+    def _latency(self, key: str) -> RollingLatency:
+        if key not in self._latencies:
+            self._latencies[key] = RollingLatency(settings.HEDGE_LATENCY_WINDOW, settings.HEDGE_MIN_SAMPLES)
+        return self._latencies[key]
+
+    def _delay(self, key: str) -> Optional[float]:
+        """How long to wait for the primary call before hedging, None to never hedge"""
+        p90 = self._latency(key).percentile(90)
+        if p90 is None:
+            return None
+        return max(p90, settings.HEDGE_MIN_DELAY_SECONDS)
+
+    def _within_budget(self) -> bool:
+        return sum(self._recent) + 1 <= len(self._recent) * settings.HEDGE_BUDGET_PERCENT / 100
+
+    async def run(
+        self,
+        key: str,
+        primary: Callable[[], Awaitable[T]],
+        alternate: Optional[Callable[[], Awaitable[T]]] = None
+    ) -> T:
+        """
+        Run `primary`, hedging with `alternate` if it is slow
+
+        Args:
+            key: Kind of call (e.g. model and quality tier); latency
+                percentiles are tracked per key
+            primary: Starts the call to the primary endpoint
+            alternate: Starts the same call on the alternate endpoint
+
+        Raises:
+            The primary's exception if it fails before a hedge is sent, or
+            if both calls fail
+        """
+        self.calls += 1
+        started = time.perf_counter()
+        hedged = False
+        first = asyncio.ensure_future(primary())
+        try:
+            delay = self._delay(key) if alternate is not None else None
+            if delay is not None:
+                done, _ = await asyncio.wait({first}, timeout=delay)
+                if not done:
+                    if self._within_budget():
+                        hedged = True
+                    else:
+                        self.budget_denied += 1
+
+            if not hedged:
+                result = await first
+                self._latency(key).add(time.perf_counter() - started)
+                return result
+            return await self._race(key, first, alternate, started)
+        finally:
+            first.cancel()
+            self._recent.append(hedged)
+
+    async def _race(
+        self,
+        key: str,
+        first: "asyncio.Future[T]",
+        alternate: Callable[[], Awaitable[T]],
+        started: float
+    ) -> T:
+        """First successful result of the running primary and a new alternate call"""
+        self.hedged += 1
+        second = asyncio.ensure_future(alternate())
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (first, second):
+                    if task in done and task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        # The primary's latency is at least this long, even if it lost
+                        self._latency(key).add(time.perf_counter() - started)
+                        return task.result()
+            # Both failed
+            return first.result()
+        finally:
+            second.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedging counters and current hedge delays for this worker"""
+        delays = {key: self._delay(key) for key in self._latencies}
+        return {
+            "enabled": bool(settings.HEDGE_PROVIDER),
+            "alternate_provider": settings.HEDGE_PROVIDER or None,
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": round(self.hedge_wins / self.hedged, 4) if self.hedged else 0.0,
+            "budget_denied": self.budget_denied,
+            "budget_percent": settings.HEDGE_BUDGET_PERCENT,
+            "excluded_models": dict(self.excluded),
+            "hedge_delay_seconds": {
+                key: round(delay, 3) for key, delay in delays.items() if delay is not None
+            },
+        }
+
+
+# Create a singleton instance of HedgedCalls
+hedged_calls = HedgedCalls()
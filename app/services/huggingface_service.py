@@ -1,8 +1,30 @@
-from huggingface_hub import InferenceClient
+import asyncio
+import time
+from functools import partial
+from typing import Optional
+from huggingface_hub import InferenceClient, get_session
 from io import BytesIO
 from app.core.config import settings
-from app.schemas.generation import GenerationCreate
-from app.services.cloudinary_service import cloudinary_service
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.profiling import stage
+from app.models.generation import QualityTier
+from app.schemas.generation import GenerationCreate, GeneratedImage
+from app.services.hedging import hedged_calls
+from app.services.image_service import image_service
+from app.services.load_policy import load_policy
+
+
+def _model_unavailable(error: Exception) -> bool:
+    """
+    The provider doesn't serve the model: HTTP 404, or the client's provider
+    mapping refused it before calling ("Model ... is not supported with ...").
+    Other errors (e.g. a malformed response) don't say anything about the model.
+    """
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 404:
+        return True
+    message = str(error)
+    return isinstance(error, ValueError) and message.startswith("Model ") and "is not supported" in message
 
 
 class HuggingFaceService:
@@ -14,25 +36,148 @@ class HuggingFaceService:
             api_key=settings.HUGGIN_API_KEY
         )
         self.model = "stabilityai/stable-diffusion-xl-base-1.0"
+        # Alternate provider for hedged text-to-image calls
+        self.hedge_client = InferenceClient(
+            provider=settings.HEDGE_PROVIDER,
+            api_key=settings.HUGGIN_API_KEY
+        ) if settings.HEDGE_PROVIDER else None
 
 
     async def generate_image(self, data: GenerationCreate) -> str:
+        """Generate an image and return its Cloudinary URL"""
+        result = await self.generate(data)
+        return result.url
+
+    async def generate(self, data: GenerationCreate, deadline: Optional[Deadline] = None) -> GeneratedImage:
+        """
+        Generate an image, upload it and return the URL with its stored size
+
+        Args:
+            data: GenerationCreate schema with prompt and settings
+            deadline: Optional request deadline; each stage is bounded by the
+                time remaining and skipped once it has passed
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the image is stored
+        """
         
         print(data,'data inside hugging face service')
         print()         
         
-        try:
-            # Use InferenceClient to generate image from text prompt
-            # This returns a PIL.Image object
-            image = self.client.text_to_image(
+        # Under load the policy trades steps, size or model for throughput
+        params = load_policy.text_to_image(data.settings, self.model)
+
+        return await self._run(
+            self.client.text_to_image,
+            deadline,
+            tier=params.tier,
+            alternate=self._hedge_text_to_image if self.hedge_client and hedged_calls.accepts(params.model) else None,
             prompt=data.prompt,
-            model=self.model,
-            width=data.settings.width,          # ✅ image width
-            height=data.settings.height,         # ✅ image height
-            guidance_scale=7.5,  # optional (CFG scale)
-            num_inference_steps=30,  # optional
+            model=params.model,
+            width=params.width,          # ✅ image width
+            height=params.height,         # ✅ image height
+            guidance_scale=params.guidance_scale,  # optional (CFG scale)
+            num_inference_steps=params.num_inference_steps,  # optional
             seed=42              # optional (for reproducibility)
-            )
+        )
+
+    async def warm_up(self, connections: int, timeout: float) -> None:
+        """
+        Open pooled connections to the inference endpoints ahead of the
+        first generation. The client keeps one HTTP session per thread, so
+        the endpoints are contacted from `connections` worker threads at once;
+        any response will do.
+        """
+        def connect():
+            session = get_session()
+            for url in settings.WARMUP_HUGGINGFACE_URLS:
+                session.head(url, timeout=timeout)
+
+        await asyncio.gather(*(asyncio.to_thread(connect) for _ in range(connections)))
+
+    async def warm_up_inference(self) -> None:
+        """Run a tiny text-to-image call so the provider has the model loaded"""
+        await asyncio.to_thread(
+            self.client.text_to_image,
+            prompt="warm-up",
+            model=self.model,
+            width=256,
+            height=256,
+            num_inference_steps=1
+        )
+
+    def _hedge_text_to_image(self, **params):
+        """Text-to-image on the alternate provider; stops hedging models it doesn't serve"""
+        try:
+            return self.hedge_client.text_to_image(**params)
+        except Exception as e:
+            if _model_unavailable(e):
+                hedged_calls.exclude(params["model"], str(e))
+            raise
+
+    async def image_to_image(
+        self,
+        data: GenerationCreate,
+        source: bytes,
+        deadline: Optional[Deadline] = None
+    ) -> GeneratedImage:
+        """
+        Transform a source image guided by the prompt, upload the result and
+        return the URL with its stored size
+
+        Args:
+            data: Prompt and settings (width/height of the prepared source,
+                strength: how far the result may move from it)
+            source: Prepared source image (see ImageService.prepare_source)
+            deadline: Optional request deadline
+        """
+        return await self._run(
+            self.client.image_to_image,
+            deadline,
+            image=source,
+            prompt=data.prompt,
+            model=settings.IMAGE_TO_IMAGE_MODEL,
+            target_size={"width": data.settings.width, "height": data.settings.height},
+            strength=data.settings.strength,
+            guidance_scale=7.5,
+            num_inference_steps=30
+        )
+
+    async def _run(
+        self,
+        inference,
+        deadline: Optional[Deadline],
+        tier: QualityTier = QualityTier.FULL,
+        alternate=None,
+        **params
+    ) -> GeneratedImage:
+        """
+        Run one inference call and store the resulting image
+
+        With an `alternate` inference function, a slow call is hedged by
+        sending the same request to it (see HedgedCalls)
+        """
+        try:
+            # The client returns a PIL.Image object. It is synchronous, so
+            # run it in a worker thread to keep the event loop free for
+            # other requests
+            if deadline:
+                deadline.check("inference")
+            with stage("inference"):
+                started = time.perf_counter()
+                if alternate is None:
+                    call = asyncio.to_thread(inference, **params)
+                else:
+                    call = hedged_calls.run(
+                        f"{params['model']}:{tier.value}",
+                        partial(asyncio.to_thread, inference, **params),
+                        partial(asyncio.to_thread, alternate, **params)
+                    )
+                image = await asyncio.wait_for(
+                    call,
+                    timeout=deadline.remaining() if deadline else None
+                )
+                load_policy.record_latency(time.perf_counter() - started)
 
 
             # print(image.show(), 'hugging face response')
@@ -42,19 +187,24 @@ class HuggingFaceService:
             img_buffer = BytesIO()
             image.save(img_buffer, format='PNG')  # Save image as PNG to buffer
             img_buffer.seek(0)  # Reset buffer position to beginning
+            image_bytes = img_buffer.getvalue()  # Get bytes from buffer
 
-            # Upload the image directly to Cloudinary
-            # This returns the secure HTTPS URL of the uploaded image
-            cloudinary_url = cloudinary_service.upload_bytes_image(
-                image_bytes=img_buffer.getvalue(),  # Get bytes from buffer
-                folder="ai-generated",  # Store in ai-generated folder
-                public_id=None  # Let Cloudinary auto-generate ID
-            )
-
-            # print(f"Image uploaded to Cloudinary: {cloudinary_url}")
-
-            return cloudinary_url
+            # Upload the image (and its resized variants) to Cloudinary
+            stored = await image_service.store(image_bytes, folder="ai-generated", deadline=deadline)
+            return stored.model_copy(update={
+                "provider": "huggingface",
+                "model": params["model"],
+                "quality_tier": tier,
+                "width": image.width,
+                "height": image.height,
+            })
 
+        except asyncio.TimeoutError as e:
+            if deadline is None or not deadline.expired:
+                raise Exception(f"Failed to generate image with Hugging Face: {str(e)}")
+            raise DeadlineExceeded(f"Deadline of {deadline.timeout:g}s exceeded during inference")
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             # Catch any errors (API failures, network issues, authentication errors, etc.)
             # Re-raise with a descriptive error message
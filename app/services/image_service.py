@@ -0,0 +1,188 @@
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import BinaryIO, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.profiling import stage
+from app.models.generation import ImageVariant
+from app.schemas.generation import GeneratedImage
+from app.services.cloudinary_service import cloudinary_service
+
+
+# Formats accepted for uploaded source images
+SOURCE_FORMATS = {"PNG", "JPEG", "WEBP"}
+
+
+class InvalidImage(Exception):
+    """Uploaded file is not an acceptable image"""
+    pass
+
+
+class ImageService:
+    """Service for image processing (resized variants, uploaded sources)"""
+
+    def __init__(self, max_workers: int):
+        # Pillow releases the GIL while decoding/resizing, so threads scale
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-variants")
+
+    @staticmethod
+    def resize(image_bytes: bytes, size: int) -> Tuple[bytes, int, int]:
+        """
+        Resize an image so its longest side is at most `size` pixels
+
+        Uses Pillow's fast paths: draft() lets the JPEG decoder scale while
+        decoding, and reduce() does cheap integer downscaling before the
+        final high-quality resample.
+
+        Returns:
+            (encoded WebP bytes, width, height)
+        """
+        with Image.open(BytesIO(image_bytes)) as image:
+            image.draft("RGB", (size, size))
+            image = image.convert("RGB")
+
+            factor = min(image.width, image.height) // size
+            if factor >= 2:
+                image = image.reduce(factor)
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+            buffer = BytesIO()
+            image.save(buffer, format="WEBP", quality=settings.IMAGE_VARIANT_QUALITY)
+            return buffer.getvalue(), image.width, image.height
+
+    @staticmethod
+    def prepare_source(source: BinaryIO, max_side: int, square: bool = False) -> Tuple[bytes, int, int]:
+        """
+        Validate an uploaded image and downscale it for a provider
+
+        Only the header is read before the format and pixel count are
+        checked, so oversized images are refused without being decoded.
+        The EXIF orientation is applied; with `square` the image is
+        center-cropped to a square (required for variations).
+
+        Returns:
+            (encoded PNG bytes, width, height)
+
+        Raises:
+            InvalidImage: Not a supported image, or too large to decode
+        """
+        try:
+            with Image.open(source) as image:
+                if image.format not in SOURCE_FORMATS:
+                    raise InvalidImage(f"Unsupported image format: {image.format or 'unknown'}")
+                if image.width * image.height > settings.SOURCE_IMAGE_MAX_PIXELS:
+                    raise InvalidImage(f"Image is too large ({image.width}x{image.height})")
+
+                image.draft("RGB", (max_side, max_side))
+                image = ImageOps.exif_transpose(image)
+                has_alpha = "A" in image.getbands() or "transparency" in image.info
+                image = image.convert("RGBA" if has_alpha else "RGB")
+
+                if square:
+                    side = min(image.width, image.height)
+                    left = (image.width - side) // 2
+                    top = (image.height - side) // 2
+                    image = image.crop((left, top, left + side, top + side))
+
+                factor = min(image.width, image.height) // max_side
+                if factor >= 2:
+                    image = image.reduce(factor)
+                image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+                buffer = BytesIO()
+                image.save(buffer, format="PNG", optimize=False)
+                return buffer.getvalue(), image.width, image.height
+
+        except InvalidImage:
+            raise
+        except Image.UnidentifiedImageError:
+            raise InvalidImage("Unsupported or corrupt image file")
+        except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+            raise InvalidImage(f"Invalid image: {str(e)}")
+
+    async def store(
+        self,
+        image_bytes: bytes,
+        folder: str = "ai-generated",
+        deadline: Optional[Deadline] = None
+    ) -> GeneratedImage:
+        """
+        Upload a generated image and its resized variants
+
+        Raises:
+            DeadlineExceeded: If the deadline passed before the upload
+        """
+        # Nobody is waiting for the image anymore if the deadline passed
+        if deadline:
+            deadline.check("upload")
+        public_id = uuid.uuid4().hex  # Variants are stored as <public_id>_<size>
+        with stage("upload"):
+            url = await asyncio.to_thread(
+                cloudinary_service.upload_bytes_image,
+                image_bytes=image_bytes,
+                folder=folder,
+                public_id=public_id,
+                timeout=deadline.remaining() if deadline else None
+            )
+
+        # Resized variants for thumbnails / responsive images.
+        # The original is already stored, so a failure here is not fatal.
+        variants = []
+        try:
+            with stage("variants"):
+                variants = await self.create_variants(image_bytes, public_id, folder=folder, deadline=deadline)
+        except Exception as e:
+            print(f"⚠️  Failed to create image variants: {e}")
+
+        return GeneratedImage(
+            url=url,
+            bytes=len(image_bytes) + sum(variant.bytes for variant in variants),
+            variants=variants
+        )
+
+    async def create_variants(
+        self,
+        image_bytes: bytes,
+        public_id: str,
+        folder: str = "ai-generated",
+        deadline: Optional[Deadline] = None
+    ) -> List[ImageVariant]:
+        """
+        Resize an image to every configured variant size and upload each
+        one next to the original (`<public_id>_<size>`)
+
+        Args:
+            image_bytes: Original encoded image
+            public_id: Cloudinary public ID of the original
+            folder: Cloudinary folder of the original
+            deadline: Optional request deadline for the uploads
+
+        Returns:
+            List[ImageVariant]: Stored variants, smallest first
+        """
+        loop = asyncio.get_running_loop()
+
+        async def build(size: int) -> ImageVariant:
+            variant_bytes, width, height = await loop.run_in_executor(
+                self.executor, self.resize, image_bytes, size
+            )
+            url = await asyncio.to_thread(
+                cloudinary_service.upload_bytes_image,
+                image_bytes=variant_bytes,
+                folder=folder,
+                public_id=f"{public_id}_{size}",
+                timeout=deadline.remaining() if deadline else None
+            )
+            return ImageVariant(size=size, width=width, height=height, url=url, bytes=len(variant_bytes))
+
+        sizes = sorted(settings.IMAGE_VARIANT_SIZES)
+        return list(await asyncio.gather(*(build(size) for size in sizes)))
+
+
+# Create a singleton instance of ImageService
+image_service = ImageService(settings.IMAGE_WORKERS)
@@ -0,0 +1,143 @@
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.models.generation import GenerationSettings, QualityTier
+from app.services.scheduler import generation_scheduler
+
+
+# Tiers from best quality to highest throughput; the policy's level indexes this
+TIERS = [QualityTier.FULL, QualityTier.REDUCED, QualityTier.FAST]
+
+
+class InferenceParams(BaseModel):
+    """Text-to-image parameters for one request"""
+    tier: QualityTier = QualityTier.FULL
+    model: str
+    width: int
+    height: int
+    num_inference_steps: int = 30
+    guidance_scale: float = 7.5
+
+
+class RollingLatency:
+    """Latencies (seconds) of the most recent provider calls"""
+
+    def __init__(self, size: int, min_samples: int = 5):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile, or None until enough calls were seen"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+
+def _fit(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """Scale down to fit `max_side`, keeping the aspect ratio and multiples of 8"""
+    factor = min(1.0, max_side / max(width, height))
+    if factor == 1.0:
+        return width, height
+    return max(64, int(width * factor) // 8 * 8), max(64, int(height * factor) // 8 * 8)
+
+
+class LoadPolicy:
+    """
+    Load-aware degradation of text-to-image parameters.
+
+    When this worker's scheduler queue or the p90 latency of recent inference
+    calls reaches a tier's threshold, requests are served with fewer steps
+    and a smaller size (reduced) or with a faster model variant (fast), so
+    throughput rises instead of every request timing out. The tier steps up
+    as soon as a threshold is reached but only steps back down once both
+    signals fall below DEGRADE_RECOVERY_RATIO of the thresholds, so it does
+    not flap around a threshold. Requests can opt out with
+    settings.allow_degraded=false.
+    """
+
+    def __init__(self):
+        self.level = 0
+        self.latency = RollingLatency(settings.DEGRADE_LATENCY_WINDOW)
+        self.applied: Counter = Counter()
+
+    @staticmethod
+    def _thresholds() -> List[Tuple[int, float]]:
+        """(queue depth, p90 latency) at which each degraded tier applies"""
+        return [
+            (settings.DEGRADE_REDUCED_QUEUE_DEPTH, settings.DEGRADE_REDUCED_LATENCY_SECONDS),
+            (settings.DEGRADE_FAST_QUEUE_DEPTH, settings.DEGRADE_FAST_LATENCY_SECONDS),
+        ]
+
+    def _level(self, queue_depth: int, latency: float, ratio: float = 1.0) -> int:
+        """Highest level whose thresholds (scaled by `ratio`) are reached"""
+        level = 0
+        for index, (depth, seconds) in enumerate(self._thresholds(), start=1):
+            if queue_depth >= depth * ratio or latency >= seconds * ratio:
+                level = index
+        return level
+
+    def record_latency(self, seconds: float) -> None:
+        """Feed the duration of a completed inference call"""
+        self.latency.add(seconds)
+
+    def current_tier(self) -> QualityTier:
+        """Tier for requests starting now"""
+        if not settings.DEGRADE_ENABLED:
+            return QualityTier.FULL
+
+        queue_depth = generation_scheduler.queue_depth
+        latency = self.latency.percentile(90) or 0.0
+        target = self._level(queue_depth, latency)
+        if target > self.level:
+            self.level = target
+        elif target < self.level:
+            self.level = max(target, self._level(queue_depth, latency, settings.DEGRADE_RECOVERY_RATIO))
+        return TIERS[self.level]
+
+    def text_to_image(self, generation_settings: GenerationSettings, model: str) -> InferenceParams:
+        """
+        Parameters for a text-to-image request
+
+        Args:
+            generation_settings: Requested settings
+            model: Model used at full quality
+        """
+        tier = self.current_tier() if generation_settings.allow_degraded else QualityTier.FULL
+        width, height = generation_settings.width, generation_settings.height
+        self.applied[tier.value] += 1
+
+        if tier == QualityTier.REDUCED:
+            width, height = _fit(width, height, settings.DEGRADE_REDUCED_MAX_SIDE)
+            return InferenceParams(
+                tier=tier, model=model, width=width, height=height,
+                num_inference_steps=settings.DEGRADE_REDUCED_STEPS
+            )
+        if tier == QualityTier.FAST:
+            width, height = _fit(width, height, settings.DEGRADE_FAST_MAX_SIDE)
+            # Turbo variants are distilled to run without classifier-free guidance
+            return InferenceParams(
+                tier=tier, model=settings.DEGRADE_FAST_MODEL, width=width, height=height,
+                num_inference_steps=settings.DEGRADE_FAST_STEPS, guidance_scale=0.0
+            )
+        return InferenceParams(tier=tier, model=model, width=width, height=height)
+
+    def stats(self) -> Dict[str, Any]:
+        latency = self.latency.percentile(90)
+        return {
+            "quality_tier": TIERS[self.level] if settings.DEGRADE_ENABLED else QualityTier.FULL,
+            "inference_latency_p90_seconds": round(latency, 3) if latency is not None else None,
+        }
+
+
+# Create a singleton instance of LoadPolicy
+load_policy = LoadPolicy()
@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.coordination import coordination
+from app.services.openai_service import openai_service
+
+
+class PromptRejected(Exception):
+    """Raised when a prompt fails validation or moderation"""
+
+
+@dataclass(frozen=True)
+class Verdict:
+    allowed: bool
+    reason: str = ""
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a prompt for matching and caching
+
+    NFKC folds compatibility characters (full-width letters, ligatures),
+    casefold() lowercases aggressively and whitespace runs collapse to one
+    space, so trivial variations share one verdict.
+    """
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of terms.
+
+    Building is O(total term length); matching is a single O(n) pass over
+    the text regardless of how many terms there are. Matches only count on
+    word boundaries, so "ass" does not match "class".
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]  # Longest term ending at the node
+        self._suffix_output: List[int] = [0]  # Next node on the fail chain with an output
+
+        for term in terms:
+            self._add(term)
+        self._build()
+
+    def __len__(self) -> int:
+        return sum(1 for output in self._output if output)
+
+    def _add(self, term: str) -> None:
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._suffix_output.append(0)
+            node = next_node
+        if node:
+            self._output[node] = term
+
+    def _build(self) -> None:
+        # Breadth-first so every node's fail target is finished before it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                fail_node = self._fail[child]
+                self._suffix_output[child] = fail_node if self._output[fail_node] else self._suffix_output[fail_node]
+
+    @staticmethod
+    def _is_boundary(text: str, index: int) -> bool:
+        return index < 0 or index >= len(text) or not text[index].isalnum()
+
+    def find(self, text: str) -> Optional[str]:
+        """First blocked term found in `text` on word boundaries, if any"""
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            match = node if self._output[node] else self._suffix_output[node]
+            while match:
+                term = self._output[match]
+                start = index - len(term) + 1
+                if self._is_boundary(text, start - 1) and self._is_boundary(text, index + 1):
+                    return term
+                match = self._suffix_output[match]
+        return None
+
+
+class VerdictCache:
+    """LRU cache of verdicts keyed by normalized prompt hash, with a TTL"""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[Verdict, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Verdict]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: str, verdict: Verdict) -> None:
+        self._entries[key] = (verdict, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def load_blocklist() -> List[str]:
+    """Blocked terms from PROMPT_BLOCKLIST and PROMPT_BLOCKLIST_FILE, normalized"""
+    terms = list(settings.PROMPT_BLOCKLIST)
+    if settings.PROMPT_BLOCKLIST_FILE:
+        with open(settings.PROMPT_BLOCKLIST_FILE, encoding="utf-8") as blocklist_file:
+            terms.extend(line for line in blocklist_file if not line.lstrip().startswith("#"))
+    return sorted({normalize_prompt(term) for term in terms if term.strip()})
+
+
+class ModerationService:
+    """
+    Pre-generation prompt checks, run before quotas, the database and the
+    provider so bad requests are rejected cheaply.
+
+    Stages, cheapest first: length limits, the compiled blocklist, then
+    (optionally) the OpenAI moderation API. Blocklist and moderation
+    verdicts are cached per normalized prompt, so repeats skip both;
+    moderation verdicts are also shared between workers through the
+    coordination cache.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.matcher = TermMatcher(terms)
+        self.cache = VerdictCache(settings.MODERATION_CACHE_SIZE, settings.MODERATION_CACHE_TTL_SECONDS)
+
+    async def _moderate(self, prompt: str) -> Optional[Verdict]:
+        """Ask the moderation API; None if it is unavailable (fail open)"""
+        try:
+            flagged, categories = await asyncio.wait_for(
+                openai_service.moderate(prompt),
+                timeout=settings.MODERATION_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            print(f"⚠️  Moderation check failed, allowing prompt: {e}")
+            return None
+
+        if flagged:
+            return Verdict(False, f"Prompt was flagged by moderation ({', '.join(categories) or 'unspecified'})")
+        return Verdict(True)
+
+    @staticmethod
+    async def _shared_verdict(key: str) -> Optional[Verdict]:
+        """Moderation verdict cached by any worker"""
+        try:
+            cached = await coordination.cache_get(f"moderation:{key}")
+        except Exception as e:
+            print(f"⚠️  Shared moderation cache unavailable: {e}")
+            return None
+        if cached is None:
+            return None
+        allowed, _, reason = cached.partition(":")
+        return Verdict(allowed == "1", reason)
+
+    @staticmethod
+    async def _share_verdict(key: str, verdict: Verdict) -> None:
+        try:
+            await coordination.cache_set(
+                f"moderation:{key}",
+                f"{int(verdict.allowed)}:{verdict.reason}",
+                settings.MODERATION_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            print(f"⚠️  Shared moderation cache unavailable: {e}")
+
+    async def check(self, prompt: str) -> Verdict:
+        """Validate a prompt and return the verdict"""
+        if len(prompt) > settings.PROMPT_MAX_LENGTH:
+            return Verdict(False, f"Prompt must be at most {settings.PROMPT_MAX_LENGTH} characters")
+
+        normalized = normalize_prompt(prompt)
+        if len(normalized) < settings.PROMPT_MIN_LENGTH:
+            return Verdict(False, f"Prompt must be at least {settings.PROMPT_MIN_LENGTH} characters")
+
+        key = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        verdict = self.cache.get(key)
+        if verdict is not None:
+            return verdict
+
+        term = self.matcher.find(normalized)
+        if term is not None:
+            verdict = Verdict(False, "Prompt contains blocked content")
+        elif settings.MODERATION_ENABLED:
+            verdict = await self._shared_verdict(key)
+            if verdict is None:
+                verdict = await self._moderate(prompt)
+                if verdict is None:
+                    return Verdict(True)  # Not cached, so the prompt is re-checked next time
+                await self._share_verdict(key, verdict)
+        else:
+            verdict = Verdict(True)
+
+        self.cache.set(key, verdict)
+        return verdict
+
+    async def validate(self, prompt: str) -> None:
+        """
+        Raises:
+            PromptRejected: If the prompt is not allowed
+        """
+        verdict = await self.check(prompt)
+        if not verdict.allowed:
+            raise PromptRejected(verdict.reason)
+
+
+# Create a singleton instance of ModerationService
+moderation_service = ModerationService(load_blocklist())
@@ -1,11 +1,19 @@
+import asyncio
+import base64
+from typing import Optional
+
 # Import the OpenAI client library to interact with OpenAI's API
 from openai import OpenAI
 
 # Import the settings module to access environment variables (API keys, config)
 from app.core.config import settings
 
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.profiling import stage
+
 # Import the GenerationCreate schema for type validation of incoming requests
-from app.schemas.generation import GenerationCreate
+from app.schemas.generation import GenerationCreate, GeneratedImage
+from app.services.image_service import image_service
 
 
 class OpenAIService:
@@ -91,41 +99,95 @@ class OpenAIService:
             # Re-raise with a more descriptive error message
             raise Exception(f"Failed to generate image: {str(e)}")
 
-    async def generate_image_variation(self, image_path: str, n: int = 1, size: str = "1024x1024") -> list[str]:
+    async def moderate(self, text: str) -> tuple[bool, list[str]]:
+        """
+        Check text with OpenAI's moderation endpoint
+
+        Args:
+            text: Text to check (e.g. an image prompt)
+
+        Returns:
+            tuple[bool, list[str]]: Whether the text was flagged, and the flagged categories
+        """
+        # The client is synchronous, so run the call in a worker thread
+        response = await asyncio.to_thread(
+            self.client.moderations.create,
+            model="omni-moderation-latest",
+            input=text
+        )
+        result = response.results[0]
+        categories = [name for name, flagged in result.categories.model_dump().items() if flagged]
+        return result.flagged, categories
+
+    async def warm_up(self, connections: int, timeout: float) -> None:
+        """
+        Open pooled connections to the API ahead of the first request
+
+        Args:
+            connections: Number of concurrent requests (one connection each)
+            timeout: HTTP timeout in seconds
         """
-        Create a variation of an existing image
-        This is a bonus feature that creates similar versions of an uploaded image
+        # A cheap model listing per connection; the client is thread-safe
+        # and shares its connection pool with copies made by with_options
+        client = self.client.with_options(max_retries=0, timeout=timeout)
+        await asyncio.gather(*(asyncio.to_thread(client.models.list) for _ in range(connections)))
+
+    async def generate_image_variation(
+        self,
+        image: bytes,
+        size: int = 1024,
+        deadline: Optional[Deadline] = None
+    ) -> GeneratedImage:
+        """
+        Create a variation of an uploaded image and store it
+        Generates a new image that is similar to the uploaded one
 
         Args:
-            image_path: Path to the original image file on the filesystem
-            n: Number of variations to generate (default: 1)
-            size: Size of the generated images (default: "1024x1024")
+            image: Square PNG source image (see ImageService.prepare_source)
+            size: Side of the generated image in pixels (256, 512 or 1024)
+            deadline: Optional request deadline
 
         Returns:
-            list[str]: List of URLs of generated image variations
+            GeneratedImage: Stored URL, size and variants of the new image
 
         Raises:
+            DeadlineExceeded: If the deadline passes before the image is stored
             Exception: If variation creation fails
         """
         try:
-            # Open the image file in binary read mode ("rb")
-            # Using 'with' ensures the file is properly closed after use
-            with open(image_path, "rb") as image_file:
-                # Call OpenAI API to create variations of the uploaded image
-                # This generates new images that are similar to the original
-                response = self.client.images.create_variation(
-                    image=image_file,  # The original image file object
-                    n=n,               # How many variations to create
-                    size=size          # Size of each variation image
+            if deadline:
+                deadline.check("inference")
+            # The client is synchronous, so run the call in a worker thread.
+            # The image is returned inline (base64) rather than as a
+            # temporary OpenAI URL, so it can be stored like any generation
+            with stage("inference"):
+                response = await asyncio.wait_for(
+                    asyncio.to_thread(
+                        self.client.images.create_variation,
+                        image=("source.png", image, "image/png"),
+                        model=settings.VARIATION_MODEL,
+                        n=1,
+                        size=f"{size}x{size}",
+                        response_format="b64_json"
+                    ),
+                    timeout=deadline.remaining() if deadline else None
                 )
 
-            # Extract URLs from all generated variations
-            # List comprehension loops through response.data and gets each image's URL
-            # Returns a list of URLs (one for each generated variation)
-            return [img.url for img in response.data]
+            if not response.data:
+                raise Exception("No image generated in response")
+            image_bytes = base64.b64decode(response.data[0].b64_json)
+
+            stored = await image_service.store(image_bytes, folder="ai-generated", deadline=deadline)
+            return stored.model_copy(update={"provider": "openai", "model": settings.VARIATION_MODEL})
 
+        except asyncio.TimeoutError as e:
+            if deadline is None or not deadline.expired:
+                raise Exception(f"Failed to create image variation: {str(e)}")
+            raise DeadlineExceeded(f"Deadline of {deadline.timeout:g}s exceeded during inference")
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            # Catch any errors (file not found, API failures, invalid image format, etc.)
+            # Catch any errors (API failures, invalid image format, etc.)
             # Re-raise with a descriptive error message
             raise Exception(f"Failed to create image variation: {str(e)}")
 
@@ -0,0 +1,73 @@
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+from app.core.coordination import CoordinationBackend, coordination
+
+
+class QuotaExceeded(Exception):
+    """Raised when a user is over one of their generation quotas"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaService:
+    """
+    Per-user generation quotas: concurrent in-flight, per-minute and per-day
+
+    State lives in the coordination backend, so with a shared backend the
+    quotas hold across all workers.
+    """
+
+    def __init__(self, backend: CoordinationBackend):
+        self.backend = backend
+
+    async def _check_rates(self, user_id: str) -> None:
+        """
+        Take a token from the user's bucket for each rate window. Taken from
+        all windows or none, so a request refused by one doesn't use up another.
+        """
+        windows = {
+            f"quota:{window}:{user_id}": (window, limit, seconds)
+            for window, limit, seconds in (
+                ("minute", settings.QUOTA_PER_MINUTE, 60),
+                ("day", settings.QUOTA_PER_DAY, 60 * 60 * 24),
+            )
+            if limit > 0
+        }
+        if not windows:
+            return
+        empty, wait = await self.backend.take_tokens([
+            (key, limit, limit / seconds) for key, (_, limit, seconds) in windows.items()
+        ])
+        if empty is not None:
+            window, limit, _ = windows[empty]
+            raise QuotaExceeded(
+                f"Generation quota exceeded ({limit} per {window})",
+                retry_after=max(int(wait) + 1, 1)
+            )
+
+    @asynccontextmanager
+    async def generation_slot(self, user_id: str):
+        """
+        Reserve quota for one generation.
+
+        Raises:
+            QuotaExceeded: If any quota is exhausted
+        """
+        concurrency_key = f"quota:inflight:{user_id}"
+        if not await self.backend.acquire_slot(concurrency_key, settings.QUOTA_MAX_CONCURRENT):
+            raise QuotaExceeded(
+                f"Too many generations in progress (max {settings.QUOTA_MAX_CONCURRENT})"
+            )
+
+        try:
+            await self._check_rates(user_id)
+            yield
+        finally:
+            await self.backend.release_slot(concurrency_key)
+
+
+# Create a singleton instance of QuotaService
+quota_service = QuotaService(coordination)
@@ -0,0 +1,208 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.profiling import stage
+from app.models.generation import GenerationPriority
+
+
+class _Waiter:
+    """A request waiting for a provider slot"""
+
+    __slots__ = ("future", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class _Lane:
+    """One priority lane: per-user queues served round-robin"""
+
+    def __init__(self, priority: GenerationPriority, weight: int):
+        self.priority = priority
+        self.weight = weight
+        self.credit = 0
+        # user_id -> waiters; key order is the round-robin order
+        self.queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.served = 0
+        self.avg_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def oldest_enqueued_at(self) -> Optional[float]:
+        """Enqueue time of the longest-waiting request (queue heads only)"""
+        heads = [queue[0].enqueued_at for queue in self.queues.values() if queue]
+        return min(heads) if heads else None
+
+    def push(self, user_id: str, waiter: _Waiter) -> None:
+        self.queues.setdefault(user_id, deque()).append(waiter)
+
+    def pop(self) -> _Waiter:
+        """Take the next waiter, rotating its user to the back of the line"""
+        user_id, queue = next(iter(self.queues.items()))
+        waiter = queue.popleft()
+        if queue:
+            self.queues.move_to_end(user_id)
+        else:
+            del self.queues[user_id]
+        return waiter
+
+    def discard(self, user_id: str, waiter: _Waiter) -> None:
+        queue = self.queues.get(user_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self.queues[user_id]
+
+    def record_wait(self, wait: float) -> None:
+        self.served += 1
+        self.max_wait = max(self.max_wait, wait)
+        # Exponentially weighted so the figure tracks current load
+        self.avg_wait = wait if self.served == 1 else 0.9 * self.avg_wait + 0.1 * wait
+
+
+class FairShareScheduler:
+    """
+    Limits concurrent provider calls and decides who gets the next free slot.
+
+    Requests wait in priority lanes that are dequeued by weight (smooth
+    weighted round-robin), so interactive work is served more often than
+    batch work without shutting it out. Within a lane, slots rotate
+    round-robin across users instead of first-come-first-served. A request
+    that has waited longer than LANE_STARVATION_SECONDS is served next
+    regardless of its lane.
+    """
+
+    def __init__(self, max_concurrency: int, weights: Dict[GenerationPriority, int], starvation_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.starvation_seconds = starvation_seconds
+        self._active = 0
+        self._lanes: Dict[GenerationPriority, _Lane] = {
+            priority: _Lane(priority, weight) for priority, weight in weights.items()
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot across all lanes"""
+        return sum(lane.depth for lane in self._lanes.values())
+
+    async def run(
+        self,
+        user_id: str,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        priority: GenerationPriority = GenerationPriority.STANDARD,
+        **kwargs
+    ) -> Any:
+        """Wait for a slot in the given lane, then await func(*args, **kwargs)"""
+        with stage("queue"):
+            await self._acquire(user_id, self._lanes[priority])
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait times per lane"""
+        now = time.monotonic()
+        lanes: List[Dict[str, Any]] = []
+        for lane in self._lanes.values():
+            oldest = lane.oldest_enqueued_at()
+            lanes.append({
+                "lane": lane.priority,
+                "weight": lane.weight,
+                "queue_depth": lane.depth,
+                "oldest_wait_seconds": round(now - oldest, 3) if oldest else 0.0,
+                "avg_wait_seconds": round(lane.avg_wait, 3),
+                "max_wait_seconds": round(lane.max_wait, 3),
+                "served": lane.served,
+            })
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "lanes": lanes,
+        }
+
+    async def _acquire(self, user_id: str, lane: _Lane) -> None:
+        if self._active < self.max_concurrency and not self.queue_depth:
+            self._active += 1
+            lane.record_wait(0.0)
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future())
+        lane.push(user_id, waiter)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted just before cancellation - hand it on
+                self._release()
+            else:
+                lane.discard(user_id, waiter)
+            raise
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._wake()
+
+    def _next_lane(self) -> Optional[_Lane]:
+        """Pick the lane to serve next"""
+        candidates = [lane for lane in self._lanes.values() if lane.queues]
+        if not candidates:
+            return None
+
+        # Starvation protection: the oldest overdue request goes first
+        now = time.monotonic()
+        overdue = [
+            (lane.oldest_enqueued_at(), lane) for lane in candidates
+            if now - lane.oldest_enqueued_at() >= self.starvation_seconds
+        ]
+        if overdue:
+            return min(overdue, key=lambda item: item[0])[1]
+
+        # Smooth weighted round-robin across non-empty lanes
+        total_weight = 0
+        for lane in candidates:
+            lane.credit += lane.weight
+            total_weight += lane.weight
+        chosen = max(candidates, key=lambda lane: lane.credit)
+        chosen.credit -= total_weight
+        return chosen
+
+    def _wake(self) -> None:
+        """Grant free slots to waiting requests"""
+        while self._active < self.max_concurrency:
+            lane = self._next_lane()
+            if lane is None:
+                return
+
+            waiter = lane.pop()
+            if waiter.future.done():
+                continue
+
+            self._active += 1
+            lane.record_wait(time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+
+# Create a singleton instance shared by all generation requests
+generation_scheduler = FairShareScheduler(
+    settings.PROVIDER_MAX_CONCURRENCY,
+    weights={
+        GenerationPriority.INTERACTIVE: settings.LANE_WEIGHT_INTERACTIVE,
+        GenerationPriority.STANDARD: settings.LANE_WEIGHT_STANDARD,
+        GenerationPriority.BATCH: settings.LANE_WEIGHT_BATCH,
+    },
+    starvation_seconds=settings.LANE_STARVATION_SECONDS,
+)
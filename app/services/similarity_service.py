@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.coordination import coordination
+from app.core.database import get_collection
+from app.models.generation import Generation, GenerationSettings, GenerationStatus, QualityTier
+from app.services.moderation_service import normalize_prompt
+
+
+# Words that rarely change what an image looks like
+STOPWORDS = frozenset({
+    "a", "an", "the", "of", "on", "in", "at", "with", "and", "to", "for",
+    "is", "are", "by", "from", "very", "some", "its", "his", "her", "their",
+})
+
+_NON_WORD = re.compile(r"[^\w]+")
+_CHANNEL = "similarity-index"
+_MERSENNE_PRIME = (1 << 61) - 1
+_LOAD_BATCH_SIZE = 1000  # Generations read per query while building the index
+
+# Index scope: (owner or "" when reuse is global, width, height)
+ScopeKey = Tuple[str, int, int]
+
+
+def canonical_prompt(prompt: str) -> str:
+    """
+    Prompt reduced to the words that matter for similarity
+
+    Builds on normalize_prompt() (unicode, case, whitespace) and also drops
+    punctuation and stopwords, so "A cat on the sofa." and "a cat on a sofa"
+    are the same canonical prompt.
+    """
+    words = _NON_WORD.sub(" ", normalize_prompt(prompt)).split()
+    kept = [word for word in words if word not in STOPWORDS]
+    return " ".join(kept or words)
+
+
+class MinHasher:
+    """
+    MinHash signatures over character 3-grams of the canonical prompt.
+
+    The fraction of equal positions in two signatures estimates the Jaccard
+    similarity of the prompts' 3-gram sets; 3-grams also make near spellings
+    ("cat"/"cats") similar.
+    """
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    @staticmethod
+    def shingles(text: str) -> Set[int]:
+        padded = f" {text} "
+        grams = {padded[i:i + 3] for i in range(max(len(padded) - 2, 1))}
+        return {
+            int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+            for gram in grams
+        }
+
+    def signature(self, prompt: str) -> List[int]:
+        hashes = self.shingles(canonical_prompt(prompt))
+        return [
+            min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+            for a, b in self._params
+        ]
+
+    @staticmethod
+    def similarity(first: List[int], second: List[int]) -> float:
+        if not first or len(first) != len(second):
+            return 0.0
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class SimilarityIndex:
+    """
+    In-memory LSH index over MinHash signatures.
+
+    Signatures are split into bands; prompts sharing any band (within the
+    same scope) become candidates, and candidates are ranked by their
+    estimated similarity. Lookups touch a handful of buckets instead of
+    every stored prompt.
+    """
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: Dict[tuple, Set[str]] = defaultdict(set)
+        self._entries: Dict[str, Tuple[ScopeKey, List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, scope: ScopeKey, signature: List[int]) -> Iterable[tuple]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (scope, band, tuple(signature[start:start + self.rows]))
+
+    def add(self, generation_id: str, scope: ScopeKey, signature: List[int]) -> None:
+        if len(signature) != self.bands * self.rows:
+            return  # Signature from a different configuration
+        self.remove(generation_id)
+        self._entries[generation_id] = (scope, signature)
+        for key in self._band_keys(scope, signature):
+            self._buckets[key].add(generation_id)
+
+    def remove(self, generation_id: str) -> None:
+        entry = self._entries.pop(generation_id, None)
+        if entry is None:
+            return
+        for key in self._band_keys(*entry):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(generation_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def query(self, scope: ScopeKey, signature: List[int], threshold: float) -> Optional[Tuple[str, float]]:
+        """Most similar indexed generation at or above `threshold`"""
+        candidates: Set[str] = set()
+        for key in self._band_keys(scope, signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best = None
+        for generation_id in candidates:
+            similarity = MinHasher.similarity(signature, self._entries[generation_id][1])
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (generation_id, similarity)
+        return best
+
+
+class SimilarityService:
+    """
+    Near-duplicate prompt lookup for "reuse similar" generations.
+
+    Each completed generation stores its prompt's MinHash signature in the
+    database (written with the completion update); the LSH index is rebuilt
+    from those signatures in the background after startup and updated
+    incrementally as generations complete or are deleted. Updates are
+    broadcast over the coordination pub/sub so every worker's index stays
+    current.
+
+    Signatures are pure-Python MinHash (a few ms for a long prompt), so
+    they are computed in a worker thread rather than on the event loop.
+    """
+
+    def __init__(self):
+        self.hasher = MinHasher(settings.PROMPT_REUSE_BANDS * settings.PROMPT_REUSE_ROWS)
+        self.index = SimilarityIndex(settings.PROMPT_REUSE_BANDS, settings.PROMPT_REUSE_ROWS)
+        self._task: Optional[asyncio.Task] = None
+
+    async def signature(self, prompt: str) -> List[int]:
+        return await asyncio.to_thread(self.hasher.signature, prompt)
+
+    @staticmethod
+    def scope(user_id: PydanticObjectId, generation_settings: GenerationSettings) -> ScopeKey:
+        """Only generations with the same size (and owner, unless reuse is global) can be reused"""
+        owner = "" if settings.PROMPT_REUSE_SCOPE == "global" else str(user_id)
+        return (owner, generation_settings.width, generation_settings.height)
+
+    async def add(self, generation: Generation) -> None:
+        """Index a completed, original (not itself reused), full-quality generation"""
+        if not generation.prompt_signature or generation.reused_from is not None:
+            return
+        if generation.quality_tier != QualityTier.FULL:
+            return  # Degraded under load; don't keep serving it for later prompts
+        generation_id = str(generation.id)
+        scope = self.scope(generation.user_id, generation.settings)
+        self.index.add(generation_id, scope, generation.prompt_signature)
+        await self._publish({
+            "op": "add",
+            "id": generation_id,
+            "scope": list(scope),
+            "signature": generation.prompt_signature,
+        })
+
+    async def remove(self, generation_ids: Iterable) -> None:
+        ids = [str(generation_id) for generation_id in generation_ids]
+        if not ids:
+            return
+        for generation_id in ids:
+            self.index.remove(generation_id)
+        await self._publish({"op": "remove", "ids": ids})
+
+    @staticmethod
+    async def _publish(message: dict) -> None:
+        """Broadcast an index update; other workers catch up on restart if it is lost"""
+        try:
+            await coordination.publish(_CHANNEL, {"origin": coordination.instance_id, **message})
+        except Exception as e:
+            print(f"⚠️  Failed to publish similarity index update: {e}")
+
+    def _apply(self, message: dict) -> None:
+        """Apply an index update published by another worker"""
+        if message.get("origin") == coordination.instance_id:
+            return
+        if message["op"] == "add":
+            self.index.add(message["id"], tuple(message["scope"]), message["signature"])
+        elif message["op"] == "remove":
+            for generation_id in message["ids"]:
+                self.index.remove(generation_id)
+
+    async def find_similar(
+        self,
+        user_id: PydanticObjectId,
+        generation_settings: GenerationSettings,
+        signature: List[int]
+    ) -> Optional[Tuple[Generation, float]]:
+        """
+        Completed generation whose prompt is similar enough to reuse
+
+        Returns:
+            (generation, estimated similarity), or None
+        """
+        scope = self.scope(user_id, generation_settings)
+        while True:
+            match = self.index.query(scope, signature, settings.PROMPT_REUSE_THRESHOLD)
+            if match is None:
+                return None
+            generation = await Generation.get(PydanticObjectId(match[0]))
+            if generation is not None and generation.status == GenerationStatus.COMPLETED:
+                return generation, match[1]
+            # Deleted by another worker since it was indexed
+            self.index.remove(match[0])
+
+    def start(self) -> None:
+        """Build the index in the background; lookups find fewer matches until it is loaded"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._load_in_background())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _load_in_background(self) -> None:
+        try:
+            indexed = await self.load()
+            print(f"🔎 Prompt similarity index loaded ({indexed} generations)")
+        except Exception as e:
+            print(f"⚠️  Prompt similarity index not loaded: {e}")
+
+    async def load(self) -> int:
+        """
+        Rebuild the index from stored signatures and follow other workers'
+        updates. Generations are read in pages of _LOAD_BATCH_SIZE; signatures
+        missing from older generations are computed, and written back by
+        whichever worker claims the backfill.
+
+        Returns:
+            int: Number of indexed generations
+        """
+        await coordination.subscribe(_CHANNEL, self._apply)
+        backfill = await coordination.claim("similarity:backfill", ttl_seconds=600)
+
+        collection = get_collection(Generation)
+        query = {
+            "status": GenerationStatus.COMPLETED.value,
+            "reused_from": None,
+            "source_image_url": None,  # Image-to-image results depend on more than the prompt
+            "quality_tier": {"$in": [None, QualityTier.FULL.value]},
+            "archived": {"$ne": True},
+        }
+        projection = {"user_id": 1, "prompt": 1, "settings": 1, "prompt_signature": 1}
+        last_id = None
+        try:
+            while True:
+                page_query = query if last_id is None else {**query, "_id": {"$gt": last_id}}
+                cursor = collection.find(page_query, projection).sort("_id", 1).limit(_LOAD_BATCH_SIZE)
+                docs = await cursor.to_list(None)
+                if not docs:
+                    break
+                last_id = docs[-1]["_id"]
+
+                missing = [
+                    doc for doc in docs
+                    if not doc.get("prompt_signature") or len(doc["prompt_signature"]) != self.hasher.num_perm
+                ]
+                if missing:
+                    signatures = await asyncio.to_thread(
+                        lambda: [self.hasher.signature(doc["prompt"]) for doc in missing]
+                    )
+                    for doc, signature in zip(missing, signatures):
+                        doc["prompt_signature"] = signature
+                        if backfill:
+                            await collection.update_one({"_id": doc["_id"]}, {"$set": {"prompt_signature": signature}})
+
+                for doc in docs:
+                    generation_settings = GenerationSettings(**(doc.get("settings") or {}))
+                    self.index.add(str(doc["_id"]), self.scope(doc["user_id"], generation_settings), doc["prompt_signature"])
+        finally:
+            if backfill:
+                await coordination.release_claim("similarity:backfill")
+        return len(self.index)
+
+
+# Create a singleton instance of SimilarityService
+similarity_service = SimilarityService()
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime
+from typing import Tuple
+
+import httpx
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.uploads import UploadedFile
+from app.models.source_image import SourceImage
+from app.services.cloudinary_service import cloudinary_service
+from app.services.image_service import image_service
+
+
+class SourceImageService:
+    """
+    Uploaded source images for image-to-image generations and variations.
+
+    Uploads are deduplicated by the SHA-256 of their content (computed while
+    the upload is spooled): the first upload is validated and downscaled in
+    the image worker pool and stored once; later uploads of the same file
+    reuse the stored image without processing or storing it again.
+    """
+
+    async def resolve(self, upload: UploadedFile, square: bool = False) -> Tuple[SourceImage, bytes]:
+        """
+        Prepared source for an upload
+
+        Args:
+            upload: Spooled upload
+            square: Center-crop to a square (variations)
+
+        Returns:
+            (stored source image, prepared PNG bytes to send to the provider)
+
+        Raises:
+            InvalidImage: The upload is not an acceptable image
+        """
+        existing = await SourceImage.find_one(
+            SourceImage.content_hash == upload.sha256,
+            SourceImage.square == square
+        )
+        if existing is not None:
+            try:
+                return existing, await self._download(existing.url)
+            except Exception as e:
+                print(f"⚠️  Stored source image {existing.id} unavailable, storing it again: {e}")
+
+        # Decoding and resizing are CPU-bound; keep them off the event loop
+        upload.file.seek(0)
+        loop = asyncio.get_running_loop()
+        content, width, height = await loop.run_in_executor(
+            image_service.executor,
+            image_service.prepare_source,
+            upload.file,
+            settings.SOURCE_IMAGE_MAX_SIDE,
+            square
+        )
+
+        # Content-addressed public ID: storing the same source again overwrites it
+        url = await asyncio.to_thread(
+            cloudinary_service.upload_bytes_image,
+            image_bytes=content,
+            folder="sources",
+            public_id=f"{upload.sha256[:32]}{'_square' if square else ''}"
+        )
+
+        # Upsert, so concurrent first uploads of the same file end up as one document
+        document = await get_collection(SourceImage).find_one_and_update(
+            {"content_hash": upload.sha256, "square": square},
+            {
+                "$set": {"url": url, "width": width, "height": height, "bytes": len(content)},
+                "$setOnInsert": {"created_at": datetime.now()},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return SourceImage.model_validate(document), content
+
+    @staticmethod
+    async def _download(url: str) -> bytes:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.get(url)
+            if response.status_code != 200:
+                raise Exception(f"HTTP {response.status_code}")
+            return response.content
+
+
+# Create a singleton instance of SourceImageService
+source_image_service = SourceImageService()
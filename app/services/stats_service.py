@@ -0,0 +1,179 @@
+from typing import Dict, List, Optional
+
+from beanie import PydanticObjectId
+
+from app.core.database import get_collection
+from app.models.generation import Generation, GenerationStatus
+from app.models.user_stats import UserStats
+
+# Stats documents checked per query when zeroing users without generations
+REPAIR_BATCH_SIZE = 1000
+
+# Counters of a user without generations
+ZEROED = {"total": 0, "completed": 0, "failed": 0, "cancelled": 0, "bytes_stored": 0, "last_generated_at": None}
+
+
+class StatsService:
+    """Service for maintaining denormalized per-user generation counters"""
+
+    async def _inc(self, user_id: PydanticObjectId, inc: Dict[str, int], session=None, **max_fields) -> None:
+        """
+        Atomically apply counter deltas to a user's stats document (upserted);
+        `max_fields` are only raised, never lowered
+        """
+        update = {"$inc": inc}
+        if max_fields:
+            update["$max"] = max_fields
+        await get_collection(UserStats).update_one(
+            {"user_id": user_id},
+            update,
+            upsert=True,
+            session=session
+        )
+
+    async def record_created(self, user_id: PydanticObjectId, session=None) -> None:
+        """Count a new generation record"""
+        await self._inc(user_id, {"total": 1}, session=session)
+
+    async def record_completed(self, generation: Generation, session=None) -> None:
+        """Count a generation that finished successfully"""
+        # Creation time, as repair() recomputes it from the generations
+        await self._inc(
+            generation.user_id,
+            {"completed": 1, "bytes_stored": generation.image_bytes},
+            session=session,
+            last_generated_at=generation.created_at
+        )
+
+    async def record_failed(self, user_id: PydanticObjectId, session=None) -> None:
+        """Count a generation that failed"""
+        await self._inc(user_id, {"failed": 1}, session=session)
+
+    async def record_cancelled(self, user_id: PydanticObjectId, session=None) -> None:
+        """Count a generation abandoned by its client"""
+        await self._inc(user_id, {"cancelled": 1}, session=session)
+
+    async def record_deleted(self, user_id: PydanticObjectId, documents: list, session=None) -> None:
+        """
+        Remove deleted generations from a user's counters
+
+        Args:
+            user_id: Owner of the deleted generations
+            documents: Deleted generations (documents or raw dicts with status/image_bytes)
+            session: Optional database session
+        """
+        if not documents:
+            return
+
+        inc = {"total": 0, "completed": 0, "failed": 0, "cancelled": 0, "bytes_stored": 0}
+        for doc in documents:
+            if not isinstance(doc, dict):
+                doc = {"status": doc.status, "image_bytes": doc.image_bytes}
+            inc["total"] -= 1
+            if doc.get("status") == GenerationStatus.COMPLETED:
+                inc["completed"] -= 1
+                inc["bytes_stored"] -= doc.get("image_bytes", 0)
+            elif doc.get("status") == GenerationStatus.FAILED:
+                inc["failed"] -= 1
+            elif doc.get("status") == GenerationStatus.CANCELLED:
+                inc["cancelled"] -= 1
+
+        await self._inc(user_id, inc, session=session)
+
+    async def get_stats(self, user_id: PydanticObjectId) -> UserStats:
+        """Read a user's counters (single indexed lookup)"""
+        stats = await UserStats.find_one(UserStats.user_id == user_id)
+        return stats or UserStats(user_id=user_id)
+
+    async def repair(self, user_id: Optional[PydanticObjectId] = None) -> int:
+        """
+        Recompute counters from the generations collection
+
+        Args:
+            user_id: Only repair this user (default: all users)
+
+        Returns:
+            int: Number of stats documents rewritten
+        """
+        pipeline = []
+        if user_id is not None:
+            pipeline.append({"$match": {"user_id": user_id}})
+        pipeline.append({
+            "$group": {
+                "_id": "$user_id",
+                "total": {"$sum": 1},
+                "completed": {"$sum": {"$cond": [{"$eq": ["$status", GenerationStatus.COMPLETED.value]}, 1, 0]}},
+                "failed": {"$sum": {"$cond": [{"$eq": ["$status", GenerationStatus.FAILED.value]}, 1, 0]}},
+                "cancelled": {"$sum": {"$cond": [{"$eq": ["$status", GenerationStatus.CANCELLED.value]}, 1, 0]}},
+                "bytes_stored": {"$sum": {"$cond": [
+                    {"$eq": ["$status", GenerationStatus.COMPLETED.value]},
+                    {"$ifNull": ["$image_bytes", 0]},
+                    0
+                ]}},
+                "last_generated_at": {"$max": {"$cond": [
+                    {"$eq": ["$status", GenerationStatus.COMPLETED.value]},
+                    "$created_at",
+                    None
+                ]}},
+            }
+        })
+
+        stats_collection = get_collection(UserStats)
+        cursor = get_collection(Generation).aggregate(pipeline)
+        repaired = 0
+        async for row in cursor:
+            repaired += 1
+            await stats_collection.update_one(
+                {"user_id": row["_id"]},
+                {"$set": {
+                    "total": row["total"],
+                    "completed": row["completed"],
+                    "failed": row["failed"],
+                    "cancelled": row["cancelled"],
+                    "bytes_stored": row["bytes_stored"],
+                    "last_generated_at": row["last_generated_at"],
+                }},
+                upsert=True
+            )
+
+        # Users whose generations are all gone get zeroed counters
+        if user_id is not None:
+            if repaired == 0:
+                await stats_collection.update_many({"user_id": user_id}, {"$set": ZEROED})
+        else:
+            batch: List[PydanticObjectId] = []
+            async for doc in stats_collection.find({}, {"user_id": 1}).batch_size(REPAIR_BATCH_SIZE):
+                batch.append(doc["user_id"])
+                if len(batch) >= REPAIR_BATCH_SIZE:
+                    await self._zero_without_generations(batch)
+                    batch = []
+            if batch:
+                await self._zero_without_generations(batch)
+
+        return repaired
+
+    @staticmethod
+    async def _zero_without_generations(user_ids: List[PydanticObjectId]) -> None:
+        """Zero the counters of those of `user_ids` that have no generations left"""
+        active = set(await get_collection(Generation).distinct("user_id", {"user_id": {"$in": user_ids}}))
+        stale = [user_id for user_id in user_ids if user_id not in active]
+        if stale:
+            await get_collection(UserStats).update_many({"user_id": {"$in": stale}}, {"$set": ZEROED})
+
+
+# Create a singleton instance of StatsService
+stats_service = StatsService()
+
+
+if __name__ == "__main__":
+    # Repair job: python -m app.services.stats_service
+    import asyncio
+    from app.core.database import init_db, close_db
+
+    async def main():
+        await init_db()
+        repaired = await stats_service.repair()
+        print(f"Repaired stats for {repaired} users")
+        await close_db()
+
+    asyncio.run(main())
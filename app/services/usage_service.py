@@ -0,0 +1,188 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.database import get_collection
+from app.models.generation import Generation, GenerationUsage
+from app.models.usage_bucket import UsageBucket
+from app.schemas.generation import GeneratedImage
+
+
+# Summed fields of a usage bucket
+COUNTERS = (
+    "generations", "completed", "failed", "cancelled", "cache_hits",
+    "queue_wait_ms", "inference_ms", "upload_ms", "bytes_stored", "estimated_cost_usd",
+)
+
+GRANULARITIES = ("hour", "day")
+
+
+def _hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def summarize(sums: Dict[str, float]) -> Dict[str, Any]:
+    """Report fields (counts, rates, averages) from summed bucket counters"""
+    generations = int(sums.get("generations", 0))
+    cache_hits = int(sums.get("cache_hits", 0))
+    calls = generations - cache_hits
+
+    def average(name: str) -> float:
+        return round(sums.get(name, 0.0) / calls, 1) if calls > 0 else 0.0
+
+    return {
+        "generations": generations,
+        "completed": int(sums.get("completed", 0)),
+        "failed": int(sums.get("failed", 0)),
+        "cancelled": int(sums.get("cancelled", 0)),
+        "cache_hits": cache_hits,
+        "cache_hit_rate": round(cache_hits / generations, 4) if generations else 0.0,
+        "avg_queue_wait_ms": average("queue_wait_ms"),
+        "avg_inference_ms": average("inference_ms"),
+        "avg_upload_ms": average("upload_ms"),
+        "bytes_stored": int(sums.get("bytes_stored", 0)),
+        "estimated_cost_usd": round(sums.get("estimated_cost_usd", 0.0), 4),
+    }
+
+
+class UsageService:
+    """
+    Cost and latency ledger.
+
+    Every finished generation carries a GenerationUsage entry (provider,
+    model, queue wait, inference and upload time, bytes, cache hit,
+    estimated cost) written in its final status transition. Hourly buckets
+    per user and per provider/model are incremented alongside, so reports
+    read a few pre-aggregated documents instead of scanning generations.
+    Buckets are a ledger of what happened: deleting generations does not
+    change them.
+    """
+
+    @staticmethod
+    def estimate_cost(model: str, width: int, height: int) -> float:
+        """Estimated provider cost in USD of one generated image"""
+        rate = settings.MODEL_COST_USD_PER_MEGAPIXEL.get(model, 0.0)
+        return round(rate * width * height / 1_000_000, 6)
+
+    def build(
+        self,
+        provider: str,
+        model: str,
+        timings: Dict[str, float],
+        width: int,
+        height: int,
+        image: Optional[GeneratedImage] = None,
+        cache_hit: bool = False
+    ) -> GenerationUsage:
+        """
+        Ledger entry for a generation
+
+        Args:
+            provider, model: Provider the request was sent to (overridden by
+                the ones reported in `image`)
+            timings: Stage timings collected while generating (seconds)
+            width, height: Requested size of the image
+            image: Provider result, or None if the generation did not finish
+            cache_hit: Served from an existing image without a provider call
+        """
+        if image is not None:
+            provider = image.provider or provider
+            model = image.model or model
+            if image.width and image.height:
+                width, height = image.width, image.height  # May be smaller under load
+        produced = image is not None and not cache_hit
+        return GenerationUsage(
+            provider=provider,
+            model=model,
+            queue_wait_ms=round(timings.get("queue", 0.0) * 1000, 1),
+            inference_ms=round(timings.get("inference", 0.0) * 1000, 1),
+            upload_ms=round((timings.get("upload", 0.0) + timings.get("variants", 0.0)) * 1000, 1),
+            bytes_stored=image.bytes if produced else 0,
+            cache_hit=cache_hit,
+            estimated_cost_usd=self.estimate_cost(model, width, height) if produced else 0.0
+        )
+
+    async def record(self, generation: Generation, session=None) -> None:
+        """Add a finished generation to the current hour's user and provider buckets"""
+        usage = generation.usage
+        if usage is None:
+            return
+        inc = {
+            "generations": 1,
+            generation.status.value: 1,
+            "cache_hits": int(usage.cache_hit),
+            "queue_wait_ms": usage.queue_wait_ms,
+            "inference_ms": usage.inference_ms,
+            "upload_ms": usage.upload_ms,
+            "bytes_stored": usage.bytes_stored,
+            "estimated_cost_usd": usage.estimated_cost_usd,
+        }
+        hour = _hour(datetime.now())
+        collection = get_collection(UsageBucket)
+        for key in (
+            {"user_id": generation.user_id, "provider": None, "model": None},
+            {"user_id": None, "provider": usage.provider, "model": usage.model},
+        ):
+            await collection.update_one({"hour": hour, **key}, {"$inc": inc}, upsert=True, session=session)
+
+    @staticmethod
+    def _series(buckets: List[Dict[str, Any]], granularity: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Totals and per-period summaries of a set of buckets"""
+        totals: Dict[str, float] = defaultdict(float)
+        periods: Dict[datetime, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for bucket in buckets:
+            period = bucket["hour"] if granularity == "hour" else bucket["hour"].replace(hour=0)
+            for name in COUNTERS:
+                value = bucket.get(name, 0)
+                totals[name] += value
+                periods[period][name] += value
+        series = [{"period": period, **summarize(sums)} for period, sums in sorted(periods.items())]
+        return summarize(totals), series
+
+    async def _buckets(self, query: Dict[str, Any], since: datetime, until: datetime) -> List[Dict[str, Any]]:
+        query = {**query, "hour": {"$gte": _hour(since), "$lt": until}}
+        return await get_collection(UsageBucket).find(query).to_list(length=None)
+
+    async def user_usage(
+        self,
+        user_id: PydanticObjectId,
+        since: datetime,
+        until: datetime,
+        granularity: str = "hour"
+    ) -> Dict[str, Any]:
+        """One user's usage between `since` and `until`"""
+        buckets = await self._buckets({"user_id": user_id, "provider": None, "model": None}, since, until)
+        totals, series = self._series(buckets, granularity)
+        return {"since": since, "until": until, "granularity": granularity, "totals": totals, "series": series}
+
+    async def provider_usage(self, since: datetime, until: datetime, granularity: str = "hour") -> Dict[str, Any]:
+        """Usage per provider and model between `since` and `until`, most expensive first"""
+        by_model: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        for bucket in await self._buckets({"user_id": None}, since, until):
+            by_model[(bucket["provider"] or "", bucket["model"] or "")].append(bucket)
+
+        providers = []
+        for (provider, model), buckets in by_model.items():
+            totals, series = self._series(buckets, granularity)
+            providers.append({"provider": provider, "model": model, "totals": totals, "series": series})
+        providers.sort(key=lambda entry: entry["totals"]["estimated_cost_usd"], reverse=True)
+        return {"since": since, "until": until, "granularity": granularity, "providers": providers}
+
+    async def top_users(self, since: datetime, until: datetime, limit: int = 20) -> Dict[str, Any]:
+        """Users with the highest estimated cost between `since` and `until`"""
+        pipeline = [
+            {"$match": {"user_id": {"$ne": None}, "hour": {"$gte": _hour(since), "$lt": until}}},
+            {"$group": {"_id": "$user_id", **{name: {"$sum": f"${name}"} for name in COUNTERS}}},
+            {"$sort": {"estimated_cost_usd": -1, "generations": -1}},
+            {"$limit": limit},
+        ]
+        rows = await get_collection(UsageBucket).aggregate(pipeline).to_list(length=None)
+        users = [{"user_id": str(row["_id"]), **summarize(row)} for row in rows]
+        return {"since": since, "until": until, "users": users}
+
+
+# Create a singleton instance of UsageService
+usage_service = UsageService()
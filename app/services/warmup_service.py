@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.services.cloudinary_service import cloudinary_service
+from app.services.huggingface_service import huggingface_service
+from app.services.openai_service import openai_service
+
+
+class WarmupService:
+    """
+    Startup warm-up of provider and storage connections.
+
+    A new worker's first generations would otherwise pay for DNS lookups,
+    TLS handshakes and, on serverless providers, model loading. The warm-up
+    runs in the background from startup; the worker reports ready (see
+    /health/ready) once every step finished or WARMUP_TIMEOUT_SECONDS
+    passed. A failed step is logged and does not keep the worker unready.
+    """
+
+    def __init__(self):
+        self.status = "pending"  # pending, running, ready, timed_out or disabled
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.duration_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("ready", "timed_out", "disabled")
+
+    def start(self) -> None:
+        """Start the warm-up in the background"""
+        if not settings.WARMUP_ENABLED:
+            self.status = "disabled"
+            return
+        if self._task is None:
+            self.status = "running"
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _step(self, name: str, warm_up: Callable[[], Awaitable[Any]]) -> None:
+        """Run one warm-up step, recording its duration or error"""
+        self.results[name] = {"status": "running"}
+        started = time.perf_counter()
+        try:
+            await warm_up()
+            self.results[name] = {"status": "ok"}
+        except Exception as e:
+            self.results[name] = {"status": "failed", "error": str(e)}
+            print(f"⚠️  Warm-up of {name} failed: {e}")
+        self.results[name]["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def _run(self) -> None:
+        timeout = settings.WARMUP_TIMEOUT_SECONDS
+        connections = settings.WARMUP_CONNECTIONS
+        steps = {
+            "huggingface": lambda: huggingface_service.warm_up(connections, timeout),
+            "openai": lambda: openai_service.warm_up(connections, timeout),
+            "cloudinary": lambda: asyncio.to_thread(cloudinary_service.warm_up, timeout),
+        }
+        if settings.WARMUP_INFERENCE:
+            steps["inference"] = huggingface_service.warm_up_inference
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(self._step(name, warm_up) for name, warm_up in steps.items())),
+                timeout=timeout
+            )
+            self.status = "ready"
+        except asyncio.TimeoutError:
+            self.status = "timed_out"
+            for result in self.results.values():
+                if result["status"] == "running":
+                    result["status"] = "timed_out"
+            print(f"⚠️  Warm-up timed out after {timeout:g}s, reporting ready anyway")
+        self.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"🔥 Warm-up {self.status} in {self.duration_ms / 1000:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "steps": self.results,
+        }
+
+
+# Create a singleton instance of WarmupService
+warmup_service = WarmupService()
@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Optional, Set
+
+import httpx
+from beanie import PydanticObjectId
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.public_http import PublicOnlyTransport
+from app.models.webhook import (
+    DeliveryStatus,
+    WebhookDeadLetter,
+    WebhookDelivery,
+    WebhookEndpoint,
+    WebhookEvent,
+)
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """
+    Signature for the X-Webhook-Signature header: "t=<unix time>,v1=<hex>"
+
+    Receivers recompute HMAC-SHA256(secret, "<t>.<raw body>") and should
+    reject old timestamps to prevent replays.
+    """
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+
+class WebhookService:
+    """
+    Webhook delivery through a MongoDB outbox.
+
+    Events are written to the webhook_deliveries collection; a background
+    dispatcher in every worker claims due deliveries with an atomic
+    find-and-update lease (so workers never send the same delivery twice
+    concurrently, and leases of crashed workers expire), posts them through
+    one pooled HTTP client with bounded concurrency, and reschedules
+    failures with exponential backoff. Deliveries that fail every attempt
+    are moved to webhook_dead_letters.
+    """
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._deliveries: Set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(settings.WEBHOOK_MAX_CONCURRENCY)
+        self._wakeup = asyncio.Event()
+
+        # Metrics (per worker)
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.dead_lettered = 0
+        self._latencies: Deque[float] = deque(maxlen=1000)  # Per HTTP attempt
+        self._delays: Deque[float] = deque(maxlen=1000)  # Event to successful delivery
+
+    # Producing events
+
+    async def enqueue(self, user_id: PydanticObjectId, event: WebhookEvent, data: Dict[str, Any]) -> int:
+        """
+        Queue an event for every active endpoint of the user subscribed to it
+
+        Returns:
+            int: Number of deliveries queued
+        """
+        endpoints = await WebhookEndpoint.find(
+            WebhookEndpoint.user_id == user_id,
+            WebhookEndpoint.is_active == True,
+        ).to_list()
+        endpoints = [endpoint for endpoint in endpoints if event in endpoint.events]
+        if not endpoints:
+            return 0
+
+        now = datetime.now()
+        deliveries = [
+            WebhookDelivery(
+                endpoint_id=endpoint.id,
+                user_id=user_id,
+                url=endpoint.url,
+                event=event,
+                payload={"event": event.value, "created_at": now.isoformat(), "data": data},
+                next_attempt_at=now,
+                created_at=now
+            )
+            for endpoint in endpoints
+        ]
+        await WebhookDelivery.insert_many(deliveries)
+        self._wakeup.set()
+        return len(deliveries)
+
+    # Dispatcher
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        # Endpoint URLs are user-supplied: only public addresses are contacted
+        # (checked on every connect), and redirects are never followed
+        self.client = httpx.AsyncClient(
+            timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+            transport=PublicOnlyTransport(
+                allow_private=settings.WEBHOOK_ALLOW_PRIVATE,
+                limits=httpx.Limits(
+                    max_connections=settings.WEBHOOK_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.WEBHOOK_MAX_CONCURRENCY
+                )
+            ),
+            follow_redirects=False,
+            headers={"User-Agent": "ai-image-gen-webhooks/1.0", "Content-Type": "application/json"}
+        )
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop claiming new deliveries and let in-flight ones finish"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._deliveries:
+            await asyncio.wait(self._deliveries, timeout=settings.WEBHOOK_TIMEOUT_SECONDS)
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _claim_next(self) -> Optional[WebhookDelivery]:
+        """Lease one due delivery (or one whose lease expired)"""
+        now = datetime.now()
+        document = await get_collection(WebhookDelivery).find_one_and_update(
+            {"$or": [
+                {"status": DeliveryStatus.PENDING.value, "next_attempt_at": {"$lte": now}},
+                {"status": DeliveryStatus.DELIVERING.value, "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {
+                "status": DeliveryStatus.DELIVERING.value,
+                "lease_until": now + timedelta(seconds=settings.WEBHOOK_TIMEOUT_SECONDS * 3),
+            }},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        return WebhookDelivery.model_validate(document) if document else None
+
+    async def _run(self) -> None:
+        while True:
+            await self._slots.acquire()
+            try:
+                self._wakeup.clear()
+                delivery = await self._claim_next()
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            except Exception as e:
+                self._slots.release()
+                print(f"⚠️  Webhook dispatcher error: {e}")
+                await asyncio.sleep(settings.WEBHOOK_POLL_SECONDS)
+                continue
+
+            if delivery is None:
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.WEBHOOK_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._deliver(delivery))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _send(self, delivery: WebhookDelivery, secret: str) -> None:
+        """POST one signed delivery; raises on network errors and non-2xx responses"""
+        body = json.dumps({"id": str(delivery.id), **delivery.payload}, default=str).encode()
+        headers = {
+            "X-Webhook-Id": str(delivery.id),
+            "X-Webhook-Event": delivery.event.value,
+            "X-Webhook-Signature": sign_payload(secret, int(time.time()), body),
+        }
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(delivery.url, content=body, headers=headers)
+        finally:
+            self._latencies.append(time.perf_counter() - start)
+        if not 200 <= response.status_code < 300:
+            raise Exception(f"HTTP {response.status_code}")
+
+    async def _deliver(self, delivery: WebhookDelivery) -> None:
+        collection = get_collection(WebhookDelivery)
+        try:
+            endpoint = await WebhookEndpoint.get(delivery.endpoint_id)
+            if endpoint is None or not endpoint.is_active:
+                await collection.delete_one({"_id": delivery.id})  # Endpoint removed meanwhile
+                return
+
+            try:
+                await self._send(delivery, endpoint.secret)
+            except Exception as e:
+                await self._failed(delivery, str(e) or type(e).__name__)
+                return
+
+            await collection.delete_one({"_id": delivery.id})
+            self.delivered += 1
+            self._delays.append((datetime.now() - delivery.created_at).total_seconds())
+
+        except Exception as e:
+            # Bookkeeping failed; the lease expires and another attempt follows
+            print(f"⚠️  Webhook delivery {delivery.id} error: {e}")
+        finally:
+            self._slots.release()
+
+    async def _failed(self, delivery: WebhookDelivery, error: str) -> None:
+        """Reschedule with exponential backoff, or dead-letter after the last attempt"""
+        self.failed_attempts += 1
+        attempts = delivery.attempts + 1
+        collection = get_collection(WebhookDelivery)
+
+        if attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            await WebhookDeadLetter(
+                endpoint_id=delivery.endpoint_id,
+                user_id=delivery.user_id,
+                url=delivery.url,
+                event=delivery.event,
+                payload=delivery.payload,
+                attempts=attempts,
+                last_error=error,
+                created_at=delivery.created_at
+            ).insert()
+            await collection.delete_one({"_id": delivery.id})
+            self.dead_lettered += 1
+            return
+
+        backoff = min(
+            settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+            settings.WEBHOOK_RETRY_MAX_SECONDS
+        )
+        backoff *= random.uniform(0.8, 1.2)  # Jitter so retries to one receiver spread out
+        await collection.update_one(
+            {"_id": delivery.id},
+            {"$set": {
+                "status": DeliveryStatus.PENDING.value,
+                "attempts": attempts,
+                "next_attempt_at": datetime.now() + timedelta(seconds=backoff),
+                "lease_until": None,
+                "last_error": error,
+            }}
+        )
+
+    async def redeliver(self, dead_letter: WebhookDeadLetter) -> None:
+        """Move a dead letter back into the outbox for a fresh set of attempts"""
+        await WebhookDelivery(
+            endpoint_id=dead_letter.endpoint_id,
+            user_id=dead_letter.user_id,
+            url=dead_letter.url,
+            event=dead_letter.event,
+            payload=dead_letter.payload,
+            created_at=dead_letter.created_at
+        ).insert()
+        await dead_letter.delete()
+        self._wakeup.set()
+
+    async def metrics(self) -> Dict[str, Any]:
+        pending = await get_collection(WebhookDelivery).count_documents({})
+        return {
+            "delivered": self.delivered,
+            "failed_attempts": self.failed_attempts,
+            "dead_lettered": self.dead_lettered,
+            "in_flight": len(self._deliveries),
+            "pending": pending,
+            "latency_p50_ms": round(_percentile(self._latencies, 50) * 1000, 1),
+            "latency_p95_ms": round(_percentile(self._latencies, 95) * 1000, 1),
+            "delivery_delay_p95_ms": round(_percentile(self._delays, 95) * 1000, 1),
+        }
+
+
+# Create a singleton instance of WebhookService
+webhook_service = WebhookService()
@@ -0,0 +1,99 @@
+"""
+Fake provider and storage backends for benchmarks
+
+They replace the network calls at the lowest level the app makes them:
+InferenceClient.text_to_image (Hugging Face) and
+CloudinaryService.upload_bytes_image, with the same signatures, sleeping for
+a sampled latency and failing at a configurable rate. Everything in between
+(load policy, hedging, PNG encoding, variant resizing and upload staging in
+image_service.store) runs for real, as in production.
+"""
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image
+
+from app.services.cloudinary_service import cloudinary_service
+from app.services.huggingface_service import huggingface_service
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Log-normal latency distribution with an error rate
+
+    median: median latency in seconds
+    sigma: log-normal shape; 0.5 gives a p99 about 3x the median
+    error_rate: fraction of calls that raise
+    """
+    median: float
+    sigma: float = 0.5
+    error_rate: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        return self.median * rng.lognormvariate(0, self.sigma)
+
+    def fails(self, rng: random.Random) -> bool:
+        return rng.random() < self.error_rate
+
+
+class FakeCloudinaryService:
+    """Stand-in for CloudinaryService.upload_bytes_image (called in worker threads)"""
+
+    def __init__(self, profile: LatencyProfile, seed: Optional[int] = None):
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.uploads = 0
+
+    def upload_bytes_image(
+        self,
+        image_bytes: bytes,
+        folder: str = "ai-generated",
+        public_id: str = None,
+        timeout: float = None
+    ) -> str:
+        latency = self.profile.sample(self.rng)
+        time.sleep(latency if timeout is None else min(latency, timeout))
+        if self.profile.fails(self.rng):
+            raise Exception("Failed to upload bytes to Cloudinary: fake storage error")
+        self.uploads += 1
+        public_id = public_id or uuid.uuid4().hex
+        return f"https://fake-storage.local/{folder}/{public_id}.png"
+
+
+class FakeInferenceClient:
+    """
+    Stand-in for huggingface_hub.InferenceClient.text_to_image (called in
+    worker threads). Returns a noise image of the requested size, so
+    encoding and resizing cost about as much as for a real result.
+    """
+
+    def __init__(self, profile: LatencyProfile, seed: Optional[int] = None):
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def text_to_image(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        **params
+    ) -> Image.Image:
+        self.calls += 1
+        time.sleep(self.profile.sample(self.rng))
+        if self.profile.fails(self.rng):
+            raise Exception("fake provider error")
+        return Image.effect_noise((width or 512, height or 512), 64).convert("RGB")
+
+
+def install(client: FakeInferenceClient, storage: FakeCloudinaryService) -> None:
+    """Route the app's provider and storage calls to the fakes"""
+    huggingface_service.client = client
+    huggingface_service.hedge_client = None
+    cloudinary_service.upload_bytes_image = storage.upload_bytes_image
@@ -0,0 +1,252 @@
+"""
+Load-testing harness
+
+Runs the FastAPI app in-process against an in-memory MongoDB stand-in
+(mongomock-motor) or a real mongod, with fake provider and storage
+backends, and reports throughput and latency percentiles per endpoint.
+
+Scenarios:
+    login     - login storm: many users logging in (registering) at once
+    generate  - generation burst: every user fires several generations
+    history   - history scroll: users repeatedly fetch their history
+
+Run from the repository root:
+    pip install mongomock-motor            # only for the in-memory database
+    python -m benchmarks.load_test --users 50 --requests-per-user 5
+    python -m benchmarks.load_test --mongo-uri mongodb://localhost:27017 --output bench.json
+    python -m benchmarks.load_test --baseline bench.json --tolerance 0.2   # exits 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+# Settings are required at import time; real credentials are never used
+for _key in (
+    "MONGODB_URI", "DATABASE_NAME", "JWT_SECRET", "OPENAI_API_KEY", "HUGGIN_API_KEY",
+    "CLOUDINARY_CLOUD_NAME", "CLOUDINARY_API_KEY", "CLOUDINARY_API_SECRET",
+):
+    os.environ.setdefault(_key, "benchmark")
+
+import httpx
+from beanie import init_beanie
+
+from app.core import database
+from app.core.config import settings
+from app.main import app
+from app.models import User, Generation, Session, UserStats, GenerationArchive, SourceImage, UsageBucket, WebhookEndpoint, WebhookDelivery, WebhookDeadLetter
+from app.services.scheduler import generation_scheduler
+from benchmarks.fakes import FakeCloudinaryService, FakeInferenceClient, LatencyProfile, install
+
+
+LOGIN = "POST /api/auth/login"
+CREATE = "POST /api/generations/"
+HISTORY = "GET /api/generations/"
+
+
+class Recorder:
+    """Collects latency and status codes per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][response.status_code] += 1
+        return response
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(q / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+async def login_storm(client: httpx.AsyncClient, recorder: Recorder, users: int) -> List[str]:
+    """Log in (and implicitly register) all users concurrently; returns their tokens"""
+
+    async def login(i: int) -> str:
+        response = await recorder.request(
+            client, LOGIN, "POST", "/api/auth/login",
+            json={"email": f"bench-user-{i}@example.com", "password": "benchmark-password"}
+        )
+        return response.json()["data"]["access_token"] if response.status_code == 200 else ""
+
+    tokens = await asyncio.gather(*(login(i) for i in range(users)))
+    return [token for token in tokens if token]
+
+
+async def generation_burst(client: httpx.AsyncClient, recorder: Recorder, tokens: List[str], per_user: int) -> None:
+    """Every user fires `per_user` generations at once"""
+
+    async def generate(token: str, i: int) -> None:
+        await recorder.request(
+            client, CREATE, "POST", "/api/generations/",
+            headers={"Authorization": f"Bearer {token}"},
+            json={"prompt": f"A lighthouse at dusk, study {i}", "settings": {"width": 512, "height": 512}}
+        )
+
+    await asyncio.gather(*(generate(token, i) for token in tokens for i in range(per_user)))
+
+
+async def history_scroll(client: httpx.AsyncClient, recorder: Recorder, tokens: List[str], pages: int) -> None:
+    """Every user fetches their history `pages` times in a row"""
+
+    async def scroll(token: str) -> None:
+        for _ in range(pages):
+            await recorder.request(
+                client, HISTORY, "GET", "/api/generations/",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+
+    await asyncio.gather(*(scroll(token) for token in tokens))
+
+
+def summarize(recorder: Recorder, elapsed: Dict[str, float]) -> Dict[str, dict]:
+    summary = {}
+    for endpoint, latencies in recorder.latencies.items():
+        statuses = recorder.statuses[endpoint]
+        errors = sum(count for status, count in statuses.items() if status >= 400)
+        summary[endpoint] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "rps": round(len(latencies) / elapsed[endpoint], 1) if elapsed.get(endpoint) else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        }
+    return summary
+
+
+def compare(summary: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Endpoints whose p95 or throughput regressed by more than `tolerance`"""
+    regressions = []
+    for endpoint, current in summary.items():
+        previous = baseline.get(endpoint)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{endpoint}: rps {previous['rps']} -> {current['rps']}")
+    return regressions
+
+
+async def setup_database(mongo_uri: str) -> None:
+    """Point the app at a real mongod or an in-memory stand-in"""
+    if mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_uri)
+        database_name = f"benchmark_{int(time.time())}"
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("mongomock-motor is not installed; pass --mongo-uri or pip install mongomock-motor")
+        client = AsyncMongoMockClient()
+        database_name = "benchmark"
+
+    database.client = client
+    await init_beanie(database=client[database_name], document_models=[
+        User, Generation, Session, UserStats, GenerationArchive, SourceImage, UsageBucket, WebhookEndpoint, WebhookDelivery, WebhookDeadLetter
+    ])
+
+
+async def run(args: argparse.Namespace) -> Dict[str, dict]:
+    await setup_database(args.mongo_uri)
+
+    # Fake backends with the requested latency/error distributions, behind
+    # the real generation pipeline
+    install(
+        FakeInferenceClient(
+            LatencyProfile(args.provider_median, sigma=args.provider_sigma, error_rate=args.provider_error_rate),
+            seed=2
+        ),
+        FakeCloudinaryService(LatencyProfile(args.storage_median, error_rate=args.storage_error_rate), seed=1)
+    )
+    generation_scheduler.max_concurrency = args.provider_concurrency
+
+    if not args.with_quotas:
+        settings.QUOTA_MAX_CONCURRENT = 1_000_000
+        settings.QUOTA_PER_MINUTE = 0
+        settings.QUOTA_PER_DAY = 0
+
+    recorder = Recorder()
+    elapsed: Dict[str, float] = {}
+    scenarios = args.scenario.split(",")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        start = time.perf_counter()
+        tokens = await login_storm(client, recorder, args.users)
+        elapsed[LOGIN] = time.perf_counter() - start
+
+        if "generate" in scenarios or "all" in scenarios:
+            start = time.perf_counter()
+            await generation_burst(client, recorder, tokens, args.requests_per_user)
+            elapsed[CREATE] = time.perf_counter() - start
+
+        if "history" in scenarios or "all" in scenarios:
+            start = time.perf_counter()
+            await history_scroll(client, recorder, tokens, args.pages)
+            elapsed[HISTORY] = time.perf_counter() - start
+
+    return summarize(recorder, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with fake provider and storage")
+    parser.add_argument("--scenario", default="all", help="Comma-separated: login, generate, history, all")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests-per-user", type=int, default=5, help="Generations per user in the burst")
+    parser.add_argument("--pages", type=int, default=10, help="History fetches per user")
+    parser.add_argument("--provider-median", type=float, default=0.2, help="Median inference latency (s)")
+    parser.add_argument("--provider-sigma", type=float, default=0.5, help="Log-normal tail shape")
+    parser.add_argument("--provider-error-rate", type=float, default=0.02)
+    parser.add_argument("--provider-concurrency", type=int, default=settings.PROVIDER_MAX_CONCURRENCY)
+    parser.add_argument("--storage-median", type=float, default=0.05, help="Median upload latency (s)")
+    parser.add_argument("--storage-error-rate", type=float, default=0.0)
+    parser.add_argument("--with-quotas", action="store_true", help="Keep per-user quotas enabled")
+    parser.add_argument("--mongo-uri", default="", help="Use a real mongod instead of mongomock-motor")
+    parser.add_argument("--output", help="Write the summary as JSON (e.g. to use as a baseline)")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs. baseline")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+
+    print(f"{'endpoint':<24} {'reqs':>6} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, row in summary.items():
+        print(
+            f"{endpoint:<24} {row['requests']:>6} {row['errors']:>6} {row['rps']:>8} "
+            f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(summary, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(summary, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
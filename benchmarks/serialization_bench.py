@@ -0,0 +1,107 @@
+"""
+Benchmark for the history response serialization path
+
+Compares the original path (GenerationResponse models -> success_response
+dict -> jsonable_encoder -> json.dumps) with the fast path (projected raw
+document -> plain dict -> pydantic-core to_json) for history lists of 1k
+to 10k items. Beanie document parsing, which the fast path also skips,
+needs a live database and is not included, so the real gap is larger.
+
+Run from the repository root:
+    python -m benchmarks.serialization_bench
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+# Settings are required at import time; the benchmark never uses them
+for _key in (
+    "MONGODB_URI", "DATABASE_NAME", "JWT_SECRET", "OPENAI_API_KEY", "HUGGIN_API_KEY",
+    "CLOUDINARY_CLOUD_NAME", "CLOUDINARY_API_KEY", "CLOUDINARY_API_SECRET",
+):
+    os.environ.setdefault(_key, "benchmark")
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import FastJSONResponse
+from app.handlers.generation import history_item
+from app.schemas.generation import GenerationResponse
+from app.schemas.response import success_response
+
+
+SIZES = [1_000, 5_000, 10_000]
+ROUNDS = 5
+
+
+def make_documents(count: int) -> list:
+    """Raw generation documents as they come back from MongoDB"""
+    user_id = ObjectId()
+    now = datetime.now()
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "prompt": f"A watercolor painting of a lighthouse at dusk, variation {i}",
+            "image_url": f"https://res.cloudinary.com/demo/image/upload/ai-generated/{i}.png",
+            "variants": [
+                {"size": size, "width": size, "height": size, "bytes": size * 40,
+                 "url": f"https://res.cloudinary.com/demo/image/upload/ai-generated/{i}_{size}.webp"}
+                for size in (128, 256, 512)
+            ],
+            "status": "completed",
+            "settings": {"width": 512, "height": 512},
+            "priority": "interactive",
+            "image_bytes": 400_000,
+            "created_at": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def original_path(documents: list) -> bytes:
+    data = [
+        GenerationResponse(
+            id=str(doc["_id"]),
+            user_id=str(doc["user_id"]),
+            prompt=doc["prompt"],
+            image_url=doc["image_url"],
+            thumbnail_url=doc["variants"][1]["url"],
+            status=doc["status"],
+            settings=doc["settings"],
+            priority=doc["priority"],
+            created_at=doc["created_at"]
+        )
+        for doc in documents
+    ]
+    content = jsonable_encoder(success_response("Generations fetched successfully", data))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(documents: list) -> bytes:
+    data = [history_item(doc) for doc in documents]
+    return FastJSONResponse(success_response("Generations fetched successfully", data)).body
+
+
+def best_of(func, documents: list) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(documents)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'items':>8} {'original (ms)':>14} {'fast (ms)':>10} {'speedup':>8}")
+    for size in SIZES:
+        documents = make_documents(size)
+        original = best_of(original_path, documents)
+        fast = best_of(fast_path, documents)
+        print(f"{size:>8} {original * 1000:>14.1f} {fast * 1000:>10.1f} {original / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
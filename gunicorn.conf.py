@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for multi-worker deployments
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Each worker is a uvicorn event loop. The app is imported once in the
+master (preload_app) and forked, so workers share its memory pages and
+start faster; database clients, the coordination backend connections and
+background tasks are created per worker in the startup event, after the
+fork. Set COORDINATION_BACKEND=redis so quotas, job claims, caches and
+index updates are shared between workers and nodes. See docs/DEPLOYMENT.md.
+"""
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+
+# One event loop per core; override with WEB_CONCURRENCY
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+# Generations can legitimately take minutes (see GENERATION_TIMEOUT_SECONDS)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = 1000
+
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,47 @@
+"""
+Test script for the streaming ZIP export
+Checks that a failure while reading the generations ends the stream with the
+error instead of leaving the download waiting forever
+"""
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.services.export_service import ExportService
+
+
+class CursorFailed(Exception):
+    pass
+
+
+async def _consume(export: ExportService) -> int:
+    chunks = 0
+    async for _ in export.stream(str(ObjectId())):
+        chunks += 1
+    return chunks
+
+
+def test_stream_fails_when_cursor_fails():
+    """The stream raises the cursor's error (within a few seconds)"""
+    export = ExportService()
+
+    async def documents(user_id):
+        # One generation without an image (no fetch needed), then the cursor breaks
+        yield {"_id": ObjectId(), "prompt": "a red fox", "status": "failed", "created_at": datetime.now()}
+        raise CursorFailed("cursor lost")
+
+    export._documents = documents
+
+    try:
+        asyncio.run(asyncio.wait_for(_consume(export), timeout=3))
+    except CursorFailed as e:
+        print(f"✅ Stream ended with the cursor error: {e}")
+        return
+    except asyncio.TimeoutError:
+        raise AssertionError("Stream hung after the cursor failed")
+    raise AssertionError("Stream completed although the cursor failed")
+
+
+if __name__ == "__main__":
+    test_stream_fails_when_cursor_fails()